@@ -0,0 +1,70 @@
+"""
+Чтение большого сгенерированного конфига (таблица маршрутов, json) в сжатом виде:
+обычный файл против .gz, .bz2, .xz и .zst (если установлен zstandard).
+Скорость считается по размеру распакованных данных.
+
+Запуск из корня репозитория:
+python benchmarks/bench_compressed.py
+"""
+import bz2
+import gzip
+import json
+import lzma
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.adapters import FileAdapter  # noqa: E402
+from bestconfig.compressed import open_file  # noqa: E402
+
+ROUTES = 100_000
+REPEAT = 3
+
+
+def generate() -> dict:
+    return {
+        'routes': [
+            {'path': f'/api/v1/resource_{i}', 'upstream': f'backend-{i % 32}', 'weight': i % 7, 'enabled': i % 3 != 0}
+            for i in range(ROUTES)
+        ],
+        'flags': {f'feature_{i}': i % 2 == 0 for i in range(ROUTES // 10)},
+    }
+
+
+def writers() -> dict:
+    result = {'': open, '.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+    try:
+        import zstandard  # noqa: F401
+        result['.zst'] = lambda filepath, mode: open_file(filepath, mode)
+    except ImportError:
+        pass
+    return result
+
+
+def measure(filepath: str) -> float:
+    parser = FileAdapter.parsers.get('json')
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        parser.read(filepath)
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    data = generate()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain_size = None
+        for ext, opener in writers().items():
+            filepath = os.path.join(tmp_dir, f'routes.json{ext}')
+            with opener(filepath, 'wt') as file:
+                json.dump(data, file)
+            size = os.path.getsize(filepath)
+            plain_size = plain_size or size
+            elapsed = measure(filepath)
+            print(f'{"routes.json" + ext:<16}{size / 2 ** 20:8.2f} MiB {elapsed * 1000:10.1f} ms '
+                  f'{plain_size / 2 ** 20 / elapsed:8.1f} MiB/s')
+
+if __name__ == '__main__':
+    main()
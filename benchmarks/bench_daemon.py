@@ -0,0 +1,63 @@
+"""
+Запуск процесса с конфигом: собственный поиск и разбор файлов (Config())
+против получения готового снимка от ConfigDaemon, и запрос одного ключа у демона.
+
+Запуск из корня репозитория:
+python benchmarks/bench_daemon.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig import Config  # noqa: E402
+from bestconfig.daemon import ConfigDaemon, DaemonClient, DaemonConfigProvider  # noqa: E402
+from bestconfig.source_resolver import discovery_cache  # noqa: E402
+
+SECTIONS = 100
+OPTIONS = 50
+REPEAT = 50
+
+
+def generate(dir_path: str) -> str:
+    filepath = os.path.join(dir_path, 'config.json')
+    with open(filepath, 'w') as file:
+        json.dump({f'section_{i}': {f'option_{j}': f'value_{i}_{j}' for j in range(OPTIONS)}
+                   for i in range(SECTIONS)}, file)
+    return filepath
+
+
+def timed(function, repeat: int = REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = generate(tmp_dir)
+        daemon = ConfigDaemon(os.path.join(tmp_dir, 'config.sock'), [filepath])
+        daemon.start()
+
+        def own_config():
+            discovery_cache.clear()
+            Config(filepath)
+
+        def from_daemon():
+            DaemonConfigProvider(daemon.socket_path).close()
+
+        client = DaemonClient(daemon.socket_path)
+        print(f'config: {SECTIONS * OPTIONS} keys')
+        print(f'{"Config() with discovery:":<28}{timed(own_config) * 1000:9.3f} ms')
+        print(f'{"DaemonConfigProvider():":<28}{timed(from_daemon) * 1000:9.3f} ms')
+        print(f'{"DaemonClient.get():":<28}{timed(lambda: client.get("section_7.option_3"), 1000) * 1000:9.3f} ms')
+        client.close()
+        daemon.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Время первого и повторных вызовов Config() в одном процессе
+и количество обращений к файловой системе (os.stat) при повторных вызовах.
+
+Запуск из корня репозитория:
+python benchmarks/bench_discovery.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig import Config  # noqa: E402
+
+REPEAT = 200
+
+
+def main():
+    start = time.perf_counter()
+    Config(exclude=['__ENV__'])
+    first = time.perf_counter() - start
+
+    stats = []
+    original_stat = os.stat
+
+    def counting_stat(path, *args, **kwargs):
+        stats.append(path)
+        return original_stat(path, *args, **kwargs)
+
+    os.stat = counting_stat
+    try:
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            Config(exclude=['__ENV__'])
+        repeated = (time.perf_counter() - start) / REPEAT
+    finally:
+        os.stat = original_stat
+
+    print(f'{"first Config():":<30}{first * 1000:9.3f} ms')
+    print(f'{"repeated Config():":<30}{repeated * 1000:9.3f} ms')
+    print(f'{"os.stat per repeated call:":<30}{len(stats) / REPEAT:9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Хеш большого вложенного конфига как ключ кеша:
+json.dumps(sort_keys=True) + sha256 на каждый запрос против config.fingerprint(),
+который после set пересчитывает только измененную ветку.
+
+Запуск из корня репозитория:
+python benchmarks/bench_fingerprint.py
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.config_provider import ConfigProvider  # noqa: E402
+
+SECTIONS = 200
+OPTIONS = 50
+REPEAT = 100
+
+
+def generate() -> dict:
+    return {
+        f'section_{i}': {f'option_{j}': [j, f'value_{i}_{j}'] for j in range(OPTIONS)}
+        for i in range(SECTIONS)
+    }
+
+
+def timed(function, repeat: int = REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    config = ConfigProvider(generate())
+
+    def full_hash():
+        return hashlib.sha256(json.dumps(config.to_dict(), sort_keys=True).encode()).hexdigest()
+
+    counter = iter(range(10 ** 9))
+
+    def set_and_fingerprint():
+        config.set('section_7', {'option_0': next(counter)})
+        return config.fingerprint()
+
+    print(f'config: {SECTIONS} sections x {OPTIONS} options')
+    print(f'{"json + sha256:":<28}{timed(full_hash) * 1000:9.3f} ms')
+    print(f'{"fingerprint (first):":<28}{timed(lambda: ConfigProvider(config).fingerprint(), 5) * 1000:9.3f} ms')
+    config.fingerprint()
+    print(f'{"fingerprint (unchanged):":<28}{timed(config.fingerprint) * 1000:9.3f} ms')
+    print(f'{"set + fingerprint:":<28}{timed(set_and_fingerprint) * 1000:9.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
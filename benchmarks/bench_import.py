@@ -0,0 +1,52 @@
+"""
+Время импорта bestconfig.
+
+PyYAML и configparser подгружаются только при чтении файлов
+соответствующего типа, поэтому приложения, использующие лишь .env
+и переменные окружения, их не импортируют.
+Для сравнения замеряется `import bestconfig, yaml, configparser`,
+что соответствует прежнему поведению с импортом всех парсеров сразу.
+
+Запуск из корня репозитория:
+python benchmarks/bench_import.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPEAT = 15
+
+
+def measure(statement: str) -> float:
+    """Медиана времени выполнения statement в свежем интерпретаторе, мс"""
+    code = (
+        'import time; start = time.perf_counter(); '
+        f'{statement}; '
+        'print((time.perf_counter() - start) * 1000)'
+    )
+    timings = []
+    for _ in range(REPEAT):
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+        timings.append(float(output))
+    return statistics.median(timings)
+
+
+def main():
+    lazy = measure('import bestconfig')
+    eager = measure('import bestconfig, yaml, configparser')
+    yaml_loaded = subprocess.check_output(
+        [sys.executable, '-c', 'import sys, bestconfig; print("yaml" in sys.modules)'],
+        cwd=ROOT
+    ).decode().strip()
+
+    print(f'{"import bestconfig:":<42}{lazy:7.2f} ms')
+    print(f'{"import bestconfig + yaml + configparser:":<42}{eager:7.2f} ms')
+    print(f'{"gain:":<42}{eager - lazy:7.2f} ms')
+    print(f'{"yaml imported by bestconfig:":<42}{yaml_loaded:>7}')
+
+
+if __name__ == '__main__':
+    main()
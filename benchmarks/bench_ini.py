@@ -0,0 +1,72 @@
+"""
+Чтение большого .cfg файла (сотни секций), из которого нужны несколько секций:
+ленивый IniParser против полного разбора configparser.
+Время и пиковая память через tracemalloc.
+
+Запуск из корня репозитория:
+python benchmarks/bench_ini.py
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.file_parsers import IniParser  # noqa: E402
+
+SECTIONS = 500
+OPTIONS = 40
+WANTED = ['section_10', 'section_250', 'section_499']
+REPEAT = 5
+
+
+def generate(filepath: str):
+    with open(filepath, 'w') as file:
+        file.write('[DEFAULT]\nroot = /opt/legacy\n\n')
+        for i in range(SECTIONS):
+            file.write(f'[section_{i}]\n')
+            for j in range(OPTIONS):
+                file.write(f'option_{j} = %(root)s/section_{i}/value_{j}\n')
+            file.write('\n')
+
+
+def eager(filepath: str):
+    data = IniParser.parse(open(filepath).read())
+    return [dict(data[name]) for name in WANTED]
+
+
+def lazy(filepath: str):
+    data = IniParser.read(filepath)
+    return [dict(data[name]) for name in WANTED]
+
+
+def measure(function, filepath: str):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function(filepath)
+    elapsed = (time.perf_counter() - start) / REPEAT
+
+    tracemalloc.start()
+    function(filepath)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, 'legacy.cfg')
+        generate(filepath)
+        size = os.path.getsize(filepath)
+        assert eager(filepath) == lazy(filepath)
+
+        print(f'file: {size / 1024:.0f} KiB, {SECTIONS} sections, reading {len(WANTED)}')
+        for name, function in (('configparser', eager), ('lazy', lazy)):
+            elapsed, peak = measure(function, filepath)
+            print(f'{name + ":":<15}{elapsed * 1000:9.2f} ms  peak {peak / 1024:9.1f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Изменение одного ключа в конфиге с тысячами шаблонов ${...}:
+set пересчитывает только зависимые шаблоны и обновляет индексы
+только для шаблонов измененного ключа.
+
+Запуск из корня репозитория:
+python benchmarks/bench_interpolation.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.config_provider import ConfigProvider  # noqa: E402
+
+SERVICES = 2000
+REPEAT = 200
+
+
+def generate() -> dict:
+    data = {'domain': 'example.com', 'port': 443}
+    for i in range(SERVICES):
+        data[f'service_{i}'] = {
+            'host': f'svc{i}.${{domain}}',
+            'url': f'https://${{service_{i}.host}}:${{port}}/v1',
+            'name': f'service-{i}',
+        }
+    return data
+
+
+def timed(function, repeat: int = REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    start = time.perf_counter()
+    config = ConfigProvider(generate(), interpolate=True)
+    load = time.perf_counter() - start
+
+    counter = iter(range(10 ** 9))
+
+    def set_leaf():
+        config.set('service_7', {'host': f'h{next(counter)}.${{domain}}', 'url': '${service_7.host}'})
+
+    def set_unrelated():
+        config.set('unrelated', next(counter))
+
+    print(f'config: {SERVICES} services, {SERVICES * 2} templates')
+    print(f'{"load:":<28}{load * 1000:9.3f} ms')
+    print(f'{"set (2 dependents):":<28}{timed(set_leaf) * 1000:9.3f} ms')
+    print(f'{"set (no dependents):":<28}{timed(set_unrelated) * 1000:9.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Память, занимаемая ConfigProvider для плоского конфига с большим количеством
+ключей (как большой .env или os.environ), в обычном и компактном режиме,
+измеряется через tracemalloc.
+Первый компактный провайдер дополнительно платит за интернирование ключей,
+следующие (например после перезагрузки конфига) используют уже интернированные.
+
+Запуск из корня репозитория:
+python benchmarks/bench_memory.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.config_provider import ConfigProvider  # noqa: E402
+
+KEYS = 10000
+LOOKUPS = 100000
+SETS = 200
+
+
+def allocated(data: dict, compact: bool):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    config = ConfigProvider(data, compact=compact)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return config, size
+
+
+def measure(data: dict, compact: bool):
+    _, first = allocated(data, compact)
+    config, size = allocated(data, compact)
+
+    keys = list(data)
+    start = time.perf_counter()
+    for i in range(LOOKUPS):
+        config.get_raw(keys[i % KEYS])
+    lookup = (time.perf_counter() - start) / LOOKUPS
+
+    start = time.perf_counter()
+    for i in range(SETS):
+        config.set(keys[i % KEYS], f'changed_{i}')
+    update = (time.perf_counter() - start) / SETS
+    return first, size, lookup, update
+
+
+def main():
+    # Ключи и значения создаются заранее и не входят в замер
+    data = {f'SERVICE_SETTING_{i}': f'value_{i}' for i in range(KEYS)}
+    for compact in (False, True):
+        first, size, lookup, update = measure(data, compact)
+        name = 'compact' if compact else 'dict'
+        print(f'{name + ":":<10}first {first / 1024:9.1f} KiB   next {size / 1024:9.1f} KiB'
+              f'{lookup * 10 ** 6:9.3f} us/get{update * 1000:9.3f} ms/set')
+
+
+if __name__ == '__main__':
+    main()
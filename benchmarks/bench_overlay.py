@@ -0,0 +1,77 @@
+"""
+1000 арендаторов с небольшими переопределениями поверх одного большого базового конфига:
+отдельный ConfigProvider со слитыми данными на каждого против base.overlay(tenant).
+Время построения, память всех арендаторов (tracemalloc) и время обращения к ключам.
+
+Запуск из корня репозитория:
+python benchmarks/bench_overlay.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.config_provider import ConfigProvider  # noqa: E402
+from bestconfig.includes import merge_dicts  # noqa: E402
+
+TENANTS = 1000
+SECTIONS = 200
+OPTIONS = 50
+KEYS = ['section_0.option_0', 'section_7.option_3', 'section_199.option_49', 'tenant.name']
+
+
+def generate_base() -> dict:
+    return {
+        f'section_{i}': {f'option_{j}': f'value_{i}_{j}' for j in range(OPTIONS)}
+        for i in range(SECTIONS)
+    }
+
+
+def generate_tenant(number: int) -> dict:
+    return {
+        'tenant': {'name': f'tenant_{number}'},
+        'section_7': {'option_3': number},
+        f'section_{10 + number % (SECTIONS - 10)}': {'option_0': 'override'},
+    }
+
+
+def merged(base: ConfigProvider, base_data: dict, tenants: list) -> list:
+    return [ConfigProvider(merge_dicts(base_data, tenant)) for tenant in tenants]
+
+
+def layered(base: ConfigProvider, base_data: dict, tenants: list) -> list:
+    return [base.overlay(tenant) for tenant in tenants]
+
+
+def main():
+    base_data = generate_base()
+    base = ConfigProvider(base_data)
+    tenants = [generate_tenant(number) for number in range(TENANTS)]
+    print(f'base: {SECTIONS * OPTIONS} keys, tenants: {TENANTS}')
+
+    for name, build in (('full provider', merged), ('overlay', layered)):
+        start = time.perf_counter()
+        build(base, base_data, tenants)
+        elapsed = time.perf_counter() - start
+
+        # Память отдельным прогоном, tracemalloc сильно замедляет построение
+        tracemalloc.start()
+        providers = build(base, base_data, tenants)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for provider in providers:
+            for key in KEYS:
+                provider.get(key)
+        lookup = (time.perf_counter() - start) / (len(providers) * len(KEYS))
+
+        assert providers[7].get('section_7.option_3') == 7
+        print(f'{name + ":":<15}build {elapsed * 1000:8.1f} ms  memory {memory / 2 ** 20:8.2f} MiB  '
+              f'lookup {lookup * 1e6:6.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Передача ConfigProvider в процессы ProcessPoolExecutor:
+размер pickle и время передачи туда и обратно
+по сравнению с прежним способом dict(config) и ConfigProvider(...) в задаче.
+
+Запуск из корня репозитория:
+python benchmarks/bench_pickle.py
+"""
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.config_provider import ConfigProvider  # noqa: E402
+
+KEYS = 5000
+TASKS = 200
+
+
+def task_provider(config):
+    return config.get('section_10.key_1')
+
+
+def task_dict(data):
+    return ConfigProvider(data).get('section_10.key_1')
+
+
+def make_data() -> dict:
+    return {f'section_{i}': {f'key_{j}': f'value_{i}_{j}' for j in range(5)} for i in range(KEYS // 5)}
+
+
+def main():
+    data = make_data()
+    cases = [
+        ('dict + rewrap', task_dict, dict(ConfigProvider(data))),
+        ('provider', task_provider, ConfigProvider(data)),
+        ('provider compact', task_provider, ConfigProvider(data, compact=True)),
+    ]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        # Прогрев процессов
+        list(executor.map(abs, range(4)))
+        for name, task, payload in cases:
+            size = len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+            start = time.perf_counter()
+            restored = pickle.loads(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+            local = time.perf_counter() - start
+            assert restored == payload
+
+            start = time.perf_counter()
+            results = list(executor.map(task, [payload] * TASKS))
+            remote = (time.perf_counter() - start) / TASKS
+            assert set(results) == {'value_10_1'}
+
+            print(f'{name + ":":<20}{size / 1024:8.1f} KiB  pickle round trip {local * 1000:7.3f} ms'
+                  f'  per task {remote * 1000:7.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Сравнение скорости разбора одинаковых конфигов в форматах TOML и YAML,
+а также чтения одной таблицы из большого pyproject.toml
+через TomlParser.read_table против разбора всего файла.
+
+Запуск из корня репозитория:
+python benchmarks/bench_toml.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bestconfig.file_parsers import TomlParser, YamlParser  # noqa: E402
+
+SECTIONS = 300
+KEYS = 20
+REPEAT = 5
+
+
+def write_configs(directory: str):
+    """Генерирует одинаковые по содержанию config.toml, config.yaml и pyproject.toml"""
+    toml_lines, yaml_lines, pyproject_lines = [], [], ['[project]', 'name = "bench"', '']
+    for section in range(SECTIONS):
+        toml_lines.append(f'[section_{section}]')
+        yaml_lines.append(f'section_{section}:')
+        pyproject_lines.append(f'[tool.plugin_{section}]')
+        for key in range(KEYS):
+            toml_lines.append(f'key_{key} = "value_{section}_{key}"')
+            yaml_lines.append(f'  key_{key}: value_{section}_{key}')
+            pyproject_lines.append(f'key_{key} = {key}')
+        toml_lines.append('')
+        pyproject_lines.append('')
+
+    pyproject_lines.append('[tool.myapp]')
+    pyproject_lines += [f'key_{key} = {key}' for key in range(KEYS)]
+
+    paths = {}
+    for name, lines in [('config.toml', toml_lines), ('config.yaml', yaml_lines),
+                        ('pyproject.toml', pyproject_lines)]:
+        paths[name] = os.path.join(directory, name)
+        with open(paths[name], 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+    return paths
+
+
+def bench(name: str, func, number: int):
+    seconds = min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+    print(f'{name:<45}{seconds * 1000:9.3f} ms')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_configs(directory)
+        print(f'{SECTIONS} sections x {KEYS} keys')
+        bench('YamlParser.read(config.yaml)', lambda: YamlParser.read(paths['config.yaml']), 3)
+        bench('TomlParser.read(config.toml)', lambda: TomlParser.read(paths['config.toml']), 10)
+        bench('TomlParser.read(pyproject.toml)', lambda: TomlParser.read(paths['pyproject.toml']), 10)
+        bench('TomlParser.read_table(pyproject, tool.myapp)',
+              lambda: TomlParser.read_table(paths['pyproject.toml'], 'tool.myapp'), 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 from .config import Config, Source
+from .search import SearchStrategy
 
 __all__ = [
     Config,
-    Source
+    Source,
+    SearchStrategy
 ]
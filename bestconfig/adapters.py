@@ -1,9 +1,14 @@
 import os
+from collections.abc import MutableMapping
 from pathlib import Path
 import typing as t
+from warnings import warn
 
 from .source import Source
 from .file_parsers import *
+from . import remote
+from .includes import IncludeError, find_include, include_resolver
+from .compressed import open_file, split_compression
 
 
 class AbstractAdapter(metaclass=ABCMeta):
@@ -32,8 +37,46 @@ class DictAdapter(AbstractAdapter):
         return source.get('data')
 
 
+class ParsersView(MutableMapping):
+    """
+    Реестр парсеров в виде словаря расширение -> парсер,
+    как раньше выглядел FileAdapter.specific_parsers.
+    Изменения сразу попадают в реестр
+    """
+
+    def __init__(self, registry: ParsersRegistry):
+        self._registry = registry
+
+    def __getitem__(self, extension: str) -> t.Type[AbstractFileParser]:
+        parser = self._registry.get(extension)
+        if parser is None:
+            raise KeyError(extension)
+        return parser
+
+    def __setitem__(self, extension: str, parser: t.Type[AbstractFileParser]):
+        self._registry.register(parser, extension)
+
+    def __delitem__(self, extension: str):
+        self._registry.unregister(extension)
+
+    def __iter__(self):
+        return iter(self._registry.extensions())
+
+    def __len__(self) -> int:
+        return len(self._registry.extensions())
+
+
+class _DeprecatedParsersView:
+    """Атрибут класса, который при обращении предупреждает об устаревании"""
+
+    def __get__(self, instance, owner) -> ParsersView:
+        warn('FileAdapter.specific_parsers устарел, используйте register_parser или FileAdapter.parsers',
+             DeprecationWarning, stacklevel=2)
+        return ParsersView(owner.parsers)
+
+
 class FileAdapter(AbstractAdapter):
-    """Читает и пишет в файл"""
+    """Читает и пишет в файл, в том числе сжатый (.gz, .bz2, .xz, .zst), см. compressed"""
 
     @classmethod
     def get_dict(cls, source: Source) -> dict:
@@ -41,24 +84,48 @@ class FileAdapter(AbstractAdapter):
         assert isinstance(filepath, Path)
         filetype = cls._get_file_type(filepath)
 
-        if filetype in cls.specific_parsers:
-            parser = cls.specific_parsers[filetype]
+        parser = cls.parsers.get(filetype) if filetype else None
+        if parser is None:
+            raise NotImplementedError('This file type does not supported yet %s' % filepath)
+        if source.has('table'):
+            data = parser.read_table(str(filepath), source.get('table'))
         else:
+            data = parser.read(str(filepath))
+        if filetype in cls.include_resolver.formats:
+            data = cls.include_resolver.compose(data, filepath)
+        return data
+
+    """Подставляет !include и extends, см. includes.IncludeResolver"""
+    include_resolver = include_resolver
+
+    @classmethod
+    def write(cls, filepath: t.Union[str, Path], data: dict, filetype: t.Optional[str] = None,
+              sort_keys: bool = True):
+        """
+        Записывает data в файл формата filetype (по умолчанию по расширению).
+        Файл сначала пишется во временный рядом и затем подменяет старый,
+        поэтому читатели не увидят наполовину записанный конфиг
+        """
+        filetype = filetype or cls._get_file_type(Path(filepath))
+        parser = cls.parsers.get(filetype) if filetype else None
+        if parser is None:
             raise NotImplementedError('This file type does not supported yet %s' % filepath)
-        return parser.read(str(filepath))
-
-    # TODO добавить .env .cfg .ini
-    """Обработчики файлов нужного типа"""
-    specific_parsers = {
-        'json': JsonParser,
-        'yaml': YamlParser,
-        'yml': YamlParser,
-        'ini': IniParser,
-        # same with .ini
-        'cfg': IniParser,
-        'env': EnvParser,
-        'py': PyParser,
-    }
+
+        tmp_path = f'{filepath}.{os.getpid()}.tmp'
+        compression = split_compression(filepath)[1]
+        try:
+            with open_file(tmp_path, 'w', encoding='utf-8', compression=compression) as file:
+                parser.write(data, file, sort_keys=sort_keys)
+            os.replace(tmp_path, filepath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    """Обработчики файлов нужного типа, см. file_parsers.register_parser"""
+    parsers = parsers
+
+    """Устаревший словарь парсеров, изменения попадают в parsers"""
+    specific_parsers = _DeprecatedParsersView()
 
     """Общепринятые названия и соответствующие им расширения"""
     file_types = {
@@ -69,15 +136,69 @@ class FileAdapter(AbstractAdapter):
     @classmethod
     def _get_file_type(cls, filepath: Path) -> t.Optional[str]:
         """Возвращает тип файла, обычно просто его расширение
+        Расширение сжатия пропускается: config.json.gz - json
         None если не найдено"""
+        filepath, _ = split_compression(filepath)
         _, ext = os.path.splitext(filepath)
         filename = os.path.basename(filepath)
 
         ext = ext.strip('.')
-        if ext in cls.specific_parsers:
+        if ext and ext in cls.parsers:
             return ext
 
         if filename in cls.file_types:
             return cls.file_types[filename]
 
+        # Файлы профилей вида .env.production
+        for name, filetype in cls.file_types.items():
+            if filename.startswith(name + '.'):
+                return filetype
+
         return None
+
+
+class UrlAdapter(AbstractAdapter):
+    """
+    Загружает конфиг по http(s), см. remote.HttpFetcher.
+    Формат определяется по расширению в url или по Content-Type ответа
+    Настройки загрузки можно поменять:
+    UrlAdapter.fetcher = HttpFetcher(timeout=1, stale_while_revalidate=60)
+    Содержимое ответа не выполняется: yaml читается без тегов !!python,
+    а форматы, чтение которых выполняет код (.py), не поддерживаются.
+    Включения !include в загруженном конфиге запрещены: IncludeError
+    """
+
+    fetcher = remote.default_fetcher
+
+    """Парсеры для загруженных конфигов вместо обычных парсеров FileAdapter"""
+    safe_parsers = {
+        'yaml': SafeYamlParser,
+        'yml': SafeYamlParser,
+    }
+
+    @classmethod
+    def get_dict(cls, source: Source) -> dict:
+        url = source.get('url')
+        body_path, filetype = cls.fetcher.fetch(url)
+
+        parser = cls.get_parser(filetype)
+        if parser is None:
+            raise NotImplementedError('This file type does not supported yet %s' % url)
+        if parser.executes_code:
+            raise ValueError(f'Конфиг {url} формата {filetype} выполняет код, его нельзя загружать по сети')
+        if source.has('table'):
+            data = parser.read_table(str(body_path), source.get('table'))
+        else:
+            data = parser.read(str(body_path))
+
+        include = find_include(data)
+        if include is not None:
+            raise IncludeError(f'Конфиг {url} включает {include.target}, '
+                               f'включения в загруженных по сети конфигах не поддерживаются')
+        return data
+
+    @classmethod
+    def get_parser(cls, filetype: t.Optional[str]) -> t.Optional[t.Type[AbstractFileParser]]:
+        if not filetype:
+            return None
+        return cls.safe_parsers.get(filetype) or FileAdapter.parsers.get(filetype)
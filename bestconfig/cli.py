@@ -0,0 +1,269 @@
+"""
+Консольная утилита для диагностики конфигов в текущей директории
+
+bestconfig show [--origin]     итоговый конфиг (и файл, из которого взят каждый ключ)
+bestconfig paths               где искались файлы и что найдено
+bestconfig get KEY             значение одного ключа
+bestconfig validate            разобрать все найденные файлы и сообщить об ошибках
+bestconfig bench               время поиска, разбора и обращения к ключам
+bestconfig daemon --socket P   раздавать конфиг другим процессам через unix сокет, см. daemon.py
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+import typing as t
+
+from .config import Config
+from .config_provider import ConfigProvider, default_converter
+from .file_parsers import flatten_dict, redact_dict, default_redact_patterns
+from .search import SearchStrategy
+from .source import Source, SourceType, TargetType
+from .source_resolver import SourceResolver, ConfigSourceAdapter, discovery_cache
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='bestconfig', description='Диагностика файлов конфигурации')
+    parser.add_argument('-f', '--file', dest='files', action='append', default=[],
+                        help='дополнительный источник, как аргумент Config(), можно повторять')
+    parser.add_argument('--exclude-default', action='store_true', help='не искать файлы по умолчанию')
+    parser.add_argument('--no-env', action='store_true', help='не учитывать переменные окружения')
+    parser.add_argument('--profile', help='профиль окружения, см. Config(profile=...)')
+    parser.add_argument('--depth', type=int, default=4, help='сколько директорий проверять вверх')
+    parser.add_argument('--interpolate', action='store_true', help='подставлять ${...}')
+
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show = commands.add_parser('show', help='итоговый конфиг')
+    show.add_argument('--format', default='yaml', choices=['yaml', 'json', 'env'])
+    show.add_argument('--origin', action='store_true', help='показать источник каждого ключа')
+    show.add_argument('--no-redact', action='store_true', help='не скрывать пароли и токены')
+
+    paths = commands.add_parser('paths', help='где искались файлы')
+    paths.add_argument('--all', action='store_true', help='показать и не найденные имена')
+
+    get = commands.add_parser('get', help='значение ключа')
+    get.add_argument('key')
+    get.add_argument('--raw', action='store_true', help='без преобразования типа')
+
+    validate = commands.add_parser('validate', help='проверить все найденные файлы')
+    validate.add_argument('--require', action='append', default=[], metavar='KEY',
+                          help='ключ, который обязан быть в конфиге')
+
+    bench = commands.add_parser('bench', help='замер загрузки конфига')
+    bench.add_argument('--repeat', type=int, default=100)
+
+    daemon = commands.add_parser('daemon', help='раздавать конфиг через unix сокет')
+    daemon.add_argument('--socket', required=True, help='путь к сокету')
+    daemon.add_argument('--reload-interval', type=float, default=None, metavar='SECONDS',
+                        help='перечитывать файлы с этим интервалом, также перечитываются по SIGHUP')
+    return parser
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    command = {
+        'show': show_command,
+        'paths': paths_command,
+        'get': get_command,
+        'validate': validate_command,
+        'bench': bench_command,
+        'daemon': daemon_command,
+    }[args.command]
+    return command(args) or 0
+
+
+def get_targets(args) -> t.List[TargetType]:
+    exclude = [Source.env] if args.no_env else []
+    profiles = Config._get_profiles(args.profile)
+    return Config._get_targets(*args.files, exclude_default=args.exclude_default,
+                               exclude=exclude, profiles=profiles)
+
+
+def get_resolver(args) -> SourceResolver:
+    # Файлы ищутся от текущей директории, как если бы Config() вызвали в ней
+    caller_path = os.path.join(os.getcwd(), '__bestconfig__')
+    return SourceResolver(caller_path, strategy=SearchStrategy(depth_limit=args.depth))
+
+
+def describe(source: Source) -> str:
+    if source.source_type == SourceType.FILE:
+        name = str(source.get('filepath'))
+    elif source.source_type == SourceType.URL:
+        name = source.get('url')
+    elif source.source_type == SourceType.ENV:
+        return 'environment'
+    else:
+        return 'dict'
+    return f'{name}#{source.get("table")}' if source.has('table') else name
+
+
+def load(args) -> t.Tuple[dict, t.Dict[str, str]]:
+    """Итоговый словарь и источник каждого ключа верхнего уровня"""
+    resolver = get_resolver(args)
+    data, origins = {}, {}
+    for target in get_targets(args):
+        for source in resolver.sources(target):
+            source_data = ConfigSourceAdapter(source).get_dict() or {}
+            data.update(source_data)
+            origins.update(dict.fromkeys(source_data, describe(source)))
+    return data, origins
+
+
+def show_command(args):
+    data, origins = load(args)
+    config = ConfigProvider(data, interpolate=args.interpolate)
+    if not args.origin:
+        config.dump(sys.stdout, args.format, redact=not args.no_redact)
+        return
+
+    data = config.to_dict()
+    if not args.no_redact:
+        data = redact_dict(data, default_redact_patterns)
+    for key in sorted(data, key=str):
+        values = flatten_dict({key: data[key]})
+        for path, value in values.items():
+            print(f'{path}={value}  # {origins[key]}')
+
+
+def paths_command(args):
+    resolver = get_resolver(args)
+    scanner = resolver.scanner
+    for target in get_targets(args):
+        if not isinstance(target, str) or target == Source.env or '://' in target:
+            continue
+        filename = target.partition('#')[0]
+        start = time.perf_counter()
+        found = scanner.find_all_files(filename)
+        elapsed = time.perf_counter() - start
+        if found:
+            print(f'{target}  ({elapsed * 1000:.3f} ms)')
+            for path in found:
+                print(f'  found  {path}')
+        elif args.all:
+            print(f'{target}  ({elapsed * 1000:.3f} ms)  not found')
+
+    print('searched directories (low to high priority):')
+    for dir_path in scanner.search_dirs('config'):
+        print(f'  {dir_path}')
+
+
+def get_command(args):
+    data, _ = load(args)
+    config = ConfigProvider(data, interpolate=args.interpolate)
+    try:
+        value = config.get(args.key, raise_absent=True, cast=None if args.raw else default_converter)
+    except KeyError:
+        print(f'{args.key} not found', file=sys.stderr)
+        return 1
+    if isinstance(value, dict):
+        value = json.dumps(dict(value), indent=2, ensure_ascii=False, default=str)
+    print(value)
+
+
+def validate_command(args):
+    resolver = get_resolver(args)
+    errors = 0
+    data = {}
+    for target in get_targets(args):
+        try:
+            sources = resolver.sources(target)
+        except Exception as e:
+            print(f'ERROR {target}: {e!r}')
+            errors += 1
+            continue
+        for source in sources:
+            try:
+                data.update(ConfigSourceAdapter(source).get_dict() or {})
+            except Exception as e:
+                print(f'ERROR {describe(source)}: {e!r}')
+                errors += 1
+            else:
+                if source.source_type == SourceType.FILE:
+                    print(f'ok    {describe(source)}')
+
+    config = ConfigProvider(data)
+    if args.interpolate:
+        try:
+            config = ConfigProvider(data, interpolate=True)
+        except ValueError as e:
+            print(f'ERROR interpolation: {e}')
+            errors += 1
+    for key in args.require:
+        if not config.contains(key):
+            print(f'ERROR required key {key} is missing')
+            errors += 1
+    return 1 if errors else 0
+
+
+def bench_command(args):
+    repeat = args.repeat
+    targets = get_targets(args)
+
+    def timed(function, count=1) -> float:
+        start = time.perf_counter()
+        for _ in range(count):
+            function()
+        return (time.perf_counter() - start) / count
+
+    def discover():
+        resolver = get_resolver(args)
+        return [source for target in targets for source in resolver.sources(target)]
+
+    def cold_discover():
+        discovery_cache.clear()
+        discover()
+
+    sources = discover()
+    data, _ = load(args)
+    config = ConfigProvider(data)
+    keys = list(data) or ['__missing__']
+
+    def parse():
+        for source in sources:
+            ConfigSourceAdapter(source).get_dict()
+
+    def lookup():
+        for key in keys:
+            config.get(key)
+
+    results = [
+        ('discovery (cold)', timed(cold_discover, repeat)),
+        ('discovery (cached)', timed(discover, repeat)),
+        ('parse all sources', timed(parse, repeat)),
+        (f'lookup {len(keys)} keys', timed(lookup, repeat)),
+        ('full load (cached)', timed(lambda: load(args), repeat)),
+    ]
+    print(f'sources: {len(sources)}, keys: {len(data)}, repeat: {repeat}')
+    for name, seconds in results:
+        print(f'{name + ":":<28}{seconds * 1000:10.3f} ms')
+
+
+def daemon_command(args):
+    from .daemon import ConfigDaemon, DaemonError
+
+    daemon = ConfigDaemon(args.socket, get_targets(args), resolver=get_resolver(args),
+                          interpolate=args.interpolate)
+    try:
+        thread = daemon.start()
+    except DaemonError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda *_: daemon.reload())
+    print(f'serving {len(daemon.config)} keys on {args.socket}', file=sys.stderr)
+    try:
+        while thread.is_alive():
+            thread.join(args.reload_interval)
+            if args.reload_interval:
+                daemon.reload()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Сжатые файлы конфигов: config.json.gz, routes.yaml.xz, flags.ini.zst.
+Файл распаковывается потоком при чтении, на диск распакованная копия не пишется
+"""
+import os
+import typing as t
+
+
+def _open_gzip(filepath: str, mode: str, encoding: t.Optional[str]):
+    import gzip
+    return gzip.open(filepath, mode, encoding=encoding)
+
+
+def _open_bz2(filepath: str, mode: str, encoding: t.Optional[str]):
+    import bz2
+    return bz2.open(filepath, mode, encoding=encoding)
+
+
+def _open_lzma(filepath: str, mode: str, encoding: t.Optional[str]):
+    import lzma
+    return lzma.open(filepath, mode, encoding=encoding)
+
+
+def _open_zstd(filepath: str, mode: str, encoding: t.Optional[str]):
+    # zstd есть в стандартной библиотеке только с python 3.14,
+    # на более старых версиях нужен пакет zstandard
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise ImportError(
+                f'Для чтения {filepath} нужен пакет zstandard: pip install zstandard'
+            ) from None
+    return zstd.open(filepath, mode, encoding=encoding)
+
+
+"""Расширение сжатого файла -> функция открытия (filepath, mode, encoding)"""
+compressions: t.Dict[str, t.Callable] = {
+    'gz': _open_gzip,
+    'bz2': _open_bz2,
+    'xz': _open_lzma,
+    'zst': _open_zstd,
+}
+
+
+def split_compression(filepath: t.Union[str, os.PathLike]) -> t.Tuple[str, t.Optional[str]]:
+    """
+    Отделяет расширение сжатия: config.json.gz -> (config.json, gz)
+    Для обычного файла (путь, None)
+    """
+    filepath = str(filepath)
+    base, ext = os.path.splitext(filepath)
+    ext = ext.strip('.')
+    if ext in compressions:
+        return base, ext
+    return filepath, None
+
+
+def is_compressed(filepath: t.Union[str, os.PathLike]) -> bool:
+    return split_compression(filepath)[1] is not None
+
+
+def open_file(filepath: t.Union[str, os.PathLike], mode: str = 'r',
+              encoding: t.Optional[str] = None, compression: t.Optional[str] = None) -> t.IO:
+    """
+    Открывает файл как open(), сжатый файл распаковывается (или сжимается при записи) на лету.
+    Сжатие определяется по расширению, либо задается compression,
+    например при записи во временный файл рядом с config.json.gz
+    """
+    filepath = str(filepath)
+    if compression is None:
+        compression = split_compression(filepath)[1]
+    if compression is None:
+        return open(filepath, mode, encoding=encoding)
+
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+    return compressions[compression](filepath, mode, encoding)
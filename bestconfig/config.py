@@ -1,22 +1,51 @@
+import os
 import typing as t
 from .config_provider import ConfigProvider
+from .secret_store import SecretStore, default_secret_store
+from .search import SearchStrategy
 from .source import Source, TargetType
 from .source_resolver import SourceResolver, FilesScanner
 
-supported_extensions = ['json', 'yaml', 'yml', 'ini', 'cfg', 'env']
+supported_extensions = ['json', 'yaml', 'yml', 'ini', 'cfg', 'env', 'toml']
 applicant_files = ['config', 'conf', 'setting', 'settings', 'configuration']
 
 
-def generate_targets(files: t.List[str], extensions: t.List[str]) -> t.List[str]:
+def generate_targets(files: t.List[str], extensions: t.List[str],
+                     profiles: t.Sequence[str] = ()) -> t.List[str]:
     """Генерирует всевозможные названия файлов
-    на основе предоставленных претендентов на названия и расширения"""
-    return list(sum(
-        [
-            [f'{filename}.{ext}' for ext in extensions]
+    на основе предоставленных претендентов на названия и расширения.
+    Для каждого профиля добавляются файлы вида config.<profile>.yaml,
+    они идут после базовых и поэтому перезаписывают их"""
+    targets = []
+    for profile in [None, *profiles]:
+        suffix = f'.{profile}' if profile else ''
+        targets += [
+            f'{filename}{suffix}.{ext}'
             for filename in files
-        ],
-        []
-    ))
+            for ext in extensions
+        ]
+    return targets
+
+
+def profile_targets(target: TargetType, profiles: t.Sequence[str]) -> t.List[TargetType]:
+    """
+    Цель и ее варианты для профилей:
+    myconfig.json -> myconfig.json, myconfig.production.json, myconfig.local.json
+    .env -> .env, .env.production, .env.local
+    """
+    if not profiles or not isinstance(target, str) or target == Source.env or '://' in target:
+        return [target]
+
+    filename, sep, table = target.partition('#')
+    name, ext = os.path.splitext(filename)
+    if ext:
+        variants = [f'{name}.{profile}{ext}' for profile in profiles]
+    elif os.path.basename(filename).startswith('.'):
+        # Файлы вида .env, у которых нет расширения
+        variants = [f'{filename}.{profile}' for profile in profiles]
+    else:
+        return [target]
+    return [target] + [f'{variant}{sep}{table}' for variant in variants]
 
 
 class Config:
@@ -31,31 +60,79 @@ class Config:
     print(config.limit)
     """
 
-    def __new__(cls, *args, exclude_default=False, raise_on_absent=False, exclude: list = None) -> ConfigProvider:
+    def __new__(cls, *args, exclude_default=False, raise_on_absent=False, exclude: list = None,
+                search: t.Optional[SearchStrategy] = None,
+                profile: t.Union[str, t.Sequence[str], None] = None,
+                interpolate: bool = False,
+                secrets: t.Union[SecretStore, bool] = False,
+                compact: bool = False,
+                normalize_keys: bool = False) -> ConfigProvider:
+        """
+        :param search: где искать файлы, см. SearchStrategy
+        :param profile: профиль окружения (например production) или список профилей,
+        по умолчанию берется из переменной окружения BESTCONFIG_PROFILE.
+        Поверх каждого файла применяются config.<profile>.yaml и затем config.local.yaml
+        :param interpolate: подставлять значения в строки вида '${db.host}' и '${PORT:-8080}'
+        :param secrets: разрешать ссылки вида 'secret://db/password', True - default_secret_store
+        :param compact: компактное хранение для конфигов с тысячами ключей, см. ConfigProvider
+        :param normalize_keys: находить ключи без учета регистра и разделителей:
+        config.db_host найдет DB_HOST, db-host или dbHost, а config.get('db.host') - DB__HOST
+        """
+        profiles = cls._get_profiles(profile)
         # Добавить значения по умолчанию
-        targets = cls._get_targets(*args, exclude_default=exclude_default, exclude=exclude or set())
+        targets = cls._get_targets(*args, exclude_default=exclude_default, exclude=exclude or set(),
+                                   profiles=profiles)
         # Передаем файл, из которого был совершен вызов Config()
-        # в объекте traceback.extract_stack, последний вызов это данная функция, а перед ним, вызывающая
-        resolver = SourceResolver(caller_path=FilesScanner.get_caller_path())
+        # последний вызов это данная функция, а перед ним, вызывающая
+        resolver = SourceResolver(caller_path=FilesScanner.get_caller_path(), strategy=search)
         # Преобразует все цели в один словарь
-        config_dict = resolver.resolve_all(targets)
-        return ConfigProvider(config_dict)
+        aggregator = resolver.aggregate(targets, normalize_keys=normalize_keys)
+        config_dict = aggregator.to_dict()
+        if secrets is True:
+            secrets = default_secret_store
+        return ConfigProvider(config_dict, interpolate=interpolate, secrets=secrets or None,
+                              compact=compact, normalize_keys=aggregator.key_index or normalize_keys)
 
     """Начало и конец списка источников конфигов, те, что ближе к концу 
     при коллизии перезаписывают более ранние"""
     _targets_begin = generate_targets(applicant_files, supported_extensions)
     _targets_end = ['.env', 'env_file', Source.env]
 
+    """Переменная окружения с профилем по умолчанию"""
+    profile_env_var = 'BESTCONFIG_PROFILE'
+    """Профиль локальных настроек, применяется последним, если задан любой профиль"""
+    local_profile = 'local'
+
+    @classmethod
+    def _get_profiles(cls, profile: t.Union[str, t.Sequence[str], None]) -> t.List[str]:
+        """Список профилей в порядке применения"""
+        if profile is None:
+            profile = os.environ.get(cls.profile_env_var, '')
+        if isinstance(profile, str):
+            profile = profile.split(',')
+        profiles = [name.strip() for name in profile if name.strip()]
+        if profiles and cls.local_profile not in profiles:
+            profiles.append(cls.local_profile)
+        return profiles
+
     @classmethod
-    def _get_targets(cls, *args, exclude_default, exclude: list) -> t.List[TargetType]:
+    def _get_targets(cls, *args, exclude_default, exclude: list,
+                     profiles: t.Sequence[str] = ()) -> t.List[TargetType]:
         """Дополняет переданные пользователем источники (файлы) стандартными путями"""
         exclude_set = set(exclude)
         targets = []
         if not exclude_default:
-            targets += [target for target in cls._targets_begin if target not in exclude_set]
-        targets += args
+            begin = generate_targets(applicant_files, supported_extensions, profiles) if profiles \
+                else cls._targets_begin
+            targets += [target for target in begin if target not in exclude_set]
+        for target in args:
+            targets += profile_targets(target, profiles)
         if not exclude_default:
-            targets += [target for target in cls._targets_end if target not in exclude_set]
+            for target in cls._targets_end:
+                targets += [
+                    variant for variant in profile_targets(target, profiles)
+                    if variant not in exclude_set
+                ]
 
         return targets
 
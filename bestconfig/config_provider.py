@@ -1,6 +1,19 @@
+import sys
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from warnings import warn
-import inspect
 from .converters import *
+from .diff import ConfigDiff
+from .fingerprint import Fingerprint
+from .adapters import FileAdapter
+from .file_parsers import flatten_dict, redact_dict, default_redact_patterns, LazyIniSection
+from .interpolation import Interpolator
+from .memoize import Memoized, track_read
+from .normalization import KeyIndex, PrefixedKeyIndex, normalize_key
+from .secret_store import SecretStore
+from .storage import CompactMapping, LayeredMapping
 from .source_resolver import SourceResolver, FilesScanner
 from .source import TargetType
 
@@ -15,6 +28,14 @@ config.get()
 default_converter = UniversalConverter()
 
 
+class ConfigKeyError(KeyError, AttributeError):
+    """
+    Ключ не найден при обращении через точку: config.unknown.
+    Является и KeyError, как раньше, и AttributeError, поэтому
+    hasattr(config, 'key') и getattr(config, 'key', default) работают как обычно
+    """
+
+
 class ConfigProvider(dict):
     """
     Основной класс, с которым имеет дело пользователь
@@ -28,10 +49,110 @@ class ConfigProvider(dict):
     print(config['logger']['format'])
     print(config.logger['format'])
     print(config.get('logger'))
+
+    Потокобезопасность: данные хранятся в неизменяемом снимке (self._snapshot).
+    Чтение берет ссылку на текущий снимок без блокировок,
+    запись строит новый снимок и публикует его одним присваиванием.
+    Поэтому читатель никогда не увидит наполовину примененное обновление.
+    Вложенные словари снимка никогда не изменяются на месте.
+    Все методы dict работают со снимком, встроенное хранилище dict
+    лишь зеркалит его для C-кода (например json.dumps(config))
+
+    При interpolate=True строки вида '${db.host}:${PORT:-5432}' заменяются
+    значениями других ключей или переменных окружения, см. Interpolator.
+    После set/insert пересчитываются только зависящие от изменений значения
+
+    С secrets=SecretStore() значения вида 'secret://db/password' хранятся
+    ссылками, а при чтении заменяются секретами, см. SecretStore.
+    to_dict() и dict(config) секретов не содержат
+
+    compact=True хранит снимок в CompactMapping вместо dict и отключает
+    зеркалирование во встроенное хранилище dict, что заметно экономит память
+    для плоских конфигов с тысячами ключей. Ключи при этом обходятся по алфавиту,
+    а C-код, читающий dict напрямую (json.dumps(config)), видит пустой словарь,
+    используйте json.dumps(config.to_dict())
+
+    При normalize_keys=True ключ, не найденный как есть, ищется без учета регистра
+    и разделителей (DB_HOST, db-host, dbHost) и с вложенностью через __, см. KeyIndex.
+    Индекс строится при загрузке и заново при первом поиске после изменений
+
+    config.overlay(tenant_data) - легкий конфиг поверх неизменного снимка этого,
+    хранит только свои значения, см. LayeredMapping
     """
 
-    def __init__(self, data: dict):
-        super().__init__(data)
+    """Вычисляет подстановки, задан только при interpolate=True,
+    тогда исходные данные без подстановок хранятся в self._raw"""
+    _interpolator: t.Optional[Interpolator] = None
+    """Хранилище секретов, общее для провайдера и вложенных в него"""
+    _secrets: t.Optional[SecretStore] = None
+    """Подписки (префикс, callback), кортеж заменяется целиком, как и снимок"""
+    _subscriptions: t.Tuple[t.Tuple[str, t.Callable], ...] = ()
+    """Сколько блоков override сейчас открыто во всех потоках,
+    пока 0, get не обращается к ContextVar"""
+    _override_count = 0
+    _override_var: t.Optional[ContextVar] = None
+    """(снимок, PresenceIndex или None), индекс строится со второй проверки
+    для одного и того же снимка, поэтому после изменений он перестраивается сам"""
+    _presence: t.Optional[tuple] = None
+    """Поиск ключей без учета регистра и разделителей, индекс (снимок, KeyIndex)"""
+    _normalize_keys = False
+    _key_index: t.Optional[tuple] = None
+    """Сколько запоминаемых функций (memoize) сейчас выполняется,
+    пока 0, чтения не записываются"""
+    _tracking_count = 0
+    """(снимок, Fingerprint), следующий снимок хешируется с опорой на предыдущий"""
+    _fingerprint: t.Optional[tuple] = None
+
+    def __init__(self, data: dict, interpolate: bool = False, secrets: t.Optional[SecretStore] = None,
+                 compact: bool = False, normalize_keys: t.Union[bool, KeyIndex] = False):
+        """
+        :param normalize_keys: True или уже построенный по data KeyIndex
+        (например ConfigAggregator.key_index)
+        """
+        super().__init__()
+        if isinstance(data, ConfigProvider):
+            data = data._snapshot
+        self._compact = compact
+        if secrets is not None:
+            self._secrets = secrets
+            # Все секреты конфига запрашиваются параллельно одной пачкой
+            secrets.prefetch(secrets.collect(data))
+        if interpolate:
+            self._interpolator = Interpolator()
+            self._raw = dict(data)
+            self._init_snapshot(self._storage(self._interpolator.resolve(self._raw)))
+        else:
+            self._init_snapshot(self._storage(data))
+        if normalize_keys:
+            self._normalize_keys = True
+            if not isinstance(normalize_keys, KeyIndex):
+                normalize_keys = KeyIndex(self._snapshot)
+                normalize_keys.report()
+            self._key_index = (self._snapshot, normalize_keys)
+
+    def _init_snapshot(self, snapshot: dict):
+        self._lock = threading.RLock()
+        with self._lock:
+            self._publish(snapshot)
+
+    def _child(self, value: dict, item: t.Optional[str] = None) -> 'ConfigProvider':
+        """Провайдер для вложенного словаря, разделяет данные с родителем без копирования.
+        item - ключ, по которому value получено, вложенный провайдер
+        с normalize_keys ищет ключи в индексе родителя"""
+        if isinstance(value, ConfigProvider):
+            value = value._snapshot
+        child = self.__class__.__new__(self.__class__)
+        dict.__init__(child)
+        child._secrets = self._secrets
+        child._normalize_keys = self._normalize_keys
+        # Копия компактного провайдера разделяет с ним хранилище
+        child._compact = isinstance(value, CompactMapping)
+        child._init_snapshot(value)
+        if self._normalize_keys and item is not None:
+            index = self._child_key_index(item, value)
+            if index is not None:
+                child._key_index = (value, index)
+        return child
 
     def get(self, item: str, default_value=None, raise_absent=False,
             cast: t.Optional[AbstractConverter] = default_converter) -> ConfigType:
@@ -50,13 +171,25 @@ class ConfigProvider(dict):
         :return: значение по ключу, None или KeyError
         """
         assert isinstance(item, str), 'Key must be str, not %s' % type(item)
+        if self._tracking_count:
+            track_read(self, item)
 
         try:
             # Обработка случая config.get('key.other')
-            value = self._unsafe_access_key(item)
+            try:
+                if self._override_count:
+                    value = self._access_with_overrides(item)
+                else:
+                    value = self._unsafe_access_key(item)
+            except KeyError:
+                if not self._normalize_keys:
+                    raise
+                value = self._normalized_access(item)
             # Возвращаем словарь в виде класса ConfigProvider
-            if isinstance(value, dict):
-                return self.__class__(value)
+            if isinstance(value, Mapping):
+                return self._child(value, item)
+            if self._secrets is not None:
+                value = self._secrets.reveal(value)
 
             # Преобразуем объект в соответствии с переданным в параметрах cast
             if cast:
@@ -73,8 +206,50 @@ class ConfigProvider(dict):
         Такое, какое было считано из файла"""
         return self.get(item, cast=None)
 
-    def contains(self, item: str):
-        return self.get(item) is not None
+    def contains(self, item: str) -> bool:
+        """
+        Есть ли ключ, в том числе путь через точку.
+        Значение не преобразуется и не копируется, ключ со значением None существует
+        """
+        if self._tracking_count:
+            track_read(self, item)
+        if self._contains_exact(item):
+            return True
+        if self._normalize_keys:
+            try:
+                self._normalized_access(item)
+                return True
+            except KeyError:
+                pass
+        return False
+
+    def _contains_exact(self, item: str) -> bool:
+        if self._override_count:
+            try:
+                self._access_with_overrides(item)
+                return True
+            except KeyError:
+                return False
+
+        snapshot = self._snapshot
+        presence = self._presence
+        if presence is None or presence[0] is not snapshot:
+            # Одна проверка дешевле построения индекса
+            self._presence = (snapshot, None)
+            return self._has_path(item)
+        index = presence[1]
+        if index is None:
+            index = PresenceIndex(snapshot)
+            self._presence = (snapshot, index)
+        found = index.lookup(item)
+        return self._has_path(item) if found is None else found
+
+    def _has_path(self, item: str) -> bool:
+        try:
+            self._unsafe_access_key(item)
+            return True
+        except KeyError:
+            return False
 
     def assert_contains(self, item: str):
         """Бросает исключение KeyError, если ключ не найден"""
@@ -84,12 +259,176 @@ class ConfigProvider(dict):
         """Устанавливает значение по ключу"""
         if not item:
             warn('Использование пустой строки в качестве ключа', UserWarning)
-        self[item] = value
+        self._update_snapshot({item: value})
 
-    def to_dict(self) -> dict:
+    def to_dict(self, reveal_secrets: bool = False) -> dict:
         """Возвращает весь конфигурационные словарь, содержащий имеющиеся данные
-        Эквивалентно dict(config)"""
-        return dict(self)
+        без преобразования значений.
+        Секреты остаются ссылками, если не передан reveal_secrets=True.
+        Ленивые секции ini разбираются и возвращаются обычными словарями"""
+        if self._tracking_count:
+            track_read(self, '')
+        if reveal_secrets and self._secrets is not None:
+            data = self._secrets.reveal(self._snapshot)
+        elif isinstance(self._snapshot, LayeredMapping):
+            data = self._snapshot.to_dict()
+        else:
+            data = dict(self._snapshot)
+        for key, value in data.items():
+            if isinstance(value, LazyIniSection):
+                data[key] = dict(value.items())
+        return data
+
+    def dump(self, target: t.Union[str, t.TextIO], filetype: t.Optional[str] = None,
+             flatten: bool = False, redact: t.Union[bool, t.Iterable[str]] = True,
+             sort_keys: bool = True, reveal_secrets: bool = False):
+        """
+        Выгружает итоговый конфиг в файл или открытый текстовый поток
+        config.dump('effective.yaml')
+        config.dump(sys.stdout, 'env')
+
+        :param filetype: json, yaml, env, ini, по умолчанию по расширению файла
+        :param flatten: вложенные ключи через точку: {'db.host': 'localhost'}
+        :param redact: скрыть значения паролей, токенов и т.п. (default_redact_patterns)
+        или свой список glob шаблонов, False - ничего не скрывать
+        :param sort_keys: одинаковый вывод при любом порядке источников
+        """
+        data = self.to_dict(reveal_secrets=reveal_secrets)
+        if redact:
+            data = redact_dict(data, default_redact_patterns if redact is True else redact)
+        if flatten:
+            data = flatten_dict(data)
+
+        if hasattr(target, 'write'):
+            parser = FileAdapter.parsers.get(filetype) if filetype else None
+            if parser is None:
+                raise ValueError('Для записи в поток нужно указать filetype')
+            parser.write(data, target, sort_keys=sort_keys)
+        else:
+            FileAdapter.write(target, data, filetype=filetype, sort_keys=sort_keys)
+
+    def diff(self, other: t.Mapping) -> ConfigDiff:
+        """
+        Изменения, которые превращают этот конфиг в other:
+        old = config.copy()
+        config.insert('new.yaml')
+        old.diff(config).changed -> {'logger.mode': ('INFO', 'DEBUG')}
+        Общие для снимков ветки не обходятся, поэтому сравнение копии
+        с измененным оригиналом стоит пропорционально изменениям
+        """
+        if isinstance(other, ConfigProvider):
+            other = other._snapshot
+        return ConfigDiff.compute(self._snapshot, other)
+
+    def memoize(self, function: t.Optional[t.Callable] = None, maxsize: t.Optional[int] = 128):
+        """
+        Декоратор: результат функции кешируется, пока не изменятся
+        прочитанные ею ключи конфига, см. Memoized
+
+        @config.memoize
+        def get_pool():
+            return create_pool(config.get('db.host'), config.get('db.port'))
+
+        @config.memoize(maxsize=16)
+        def route(name): ...
+
+        get_pool.cache_info() -> CacheInfo(hits=..., misses=..., invalidations=..., ...)
+        :param maxsize: сколько результатов хранить (вытесняются давно не использованные),
+        None - без ограничения
+        """
+        def decorator(func: t.Callable) -> Memoized:
+            return Memoized(self, func, maxsize=maxsize)
+
+        return decorator(function) if function is not None else decorator
+
+    def fingerprint(self, item: str = '') -> str:
+        """
+        Хеш содержимого конфига или его части, например config.fingerprint('db'),
+        для ключей кешей, зависящих от конфига.
+        Не зависит от порядка ключей и совпадает в разных процессах для одинаковых данных.
+        После изменений пересчитываются только измененные ветки, см. Fingerprint.
+        Активные override не учитываются, KeyError если ключа нет.
+        Элементы списков указываются индексом: config.fingerprint('hosts.0')
+        """
+        snapshot = self._snapshot
+        cached = self._fingerprint
+        if cached is None or cached[0] is not snapshot:
+            cached = (snapshot, Fingerprint.compute(snapshot, cached[1] if cached is not None else None))
+            self._fingerprint = cached
+        node = cached[1]
+        if item in node.children:
+            node = node.child(item)
+        elif item:
+            for key in item.split('.'):
+                # Элементы списков хранятся под числовыми индексами
+                if key.isdigit() and node.children is not None and key not in node.children:
+                    key = int(key)
+                node = node.child(key)
+        return node.hexdigest
+
+    def subscribe(self, prefix: str, callback: t.Callable[[ConfigDiff], t.Any]) -> t.Callable:
+        """
+        callback(diff) вызывается после каждого изменения внутри prefix
+        ('' - любого изменения), diff содержит только изменения внутри prefix.
+        Вызывается в потоке, сделавшем изменение, пока удерживается блокировка записи.
+        Исключение в callback выводится предупреждением и не прерывает изменение
+        """
+        with self._lock:
+            self._subscriptions = self._subscriptions + ((prefix, callback),)
+        return callback
+
+    def unsubscribe(self, callback: t.Callable):
+        with self._lock:
+            self._subscriptions = tuple(
+                subscription for subscription in self._subscriptions if subscription[1] != callback
+            )
+
+    @contextmanager
+    def override(self, overrides: t.Dict[str, ConfigType]):
+        """
+        Временно подменяет значения только для текущего потока или asyncio задачи,
+        другие потоки продолжают видеть исходные данные
+
+        with config.override({'db.timeout': 1}):
+            assert config.get('db.timeout') == 1
+
+        Ключи - пути через точку, блоки можно вкладывать друг в друга.
+        Подмена действует на чтение через get, config.key и config['key'],
+        вложенные конфиги, полученные внутри блока, сохраняют подмененные значения
+        """
+        with self._lock:
+            if self._override_var is None:
+                self._override_var = ContextVar(f'bestconfig_override_{id(self)}', default=None)
+            self._override_count += 1
+        current = self._override_var.get()
+        token = self._override_var.set({**current, **overrides} if current else dict(overrides))
+        try:
+            yield self
+        finally:
+            self._override_var.reset(token)
+            with self._lock:
+                self._override_count -= 1
+
+    @contextmanager
+    def transaction(self):
+        """
+        Несколько изменений, которые публикуются одним снимком.
+        Читатели видят либо все изменения, либо ни одного.
+        При исключении внутри блока изменения отбрасываются
+
+        with config.transaction() as tx:
+            tx['db_host'] = 'localhost'
+            tx.update({'db_port': 5432})
+            del tx['old_key']
+
+        Блокировка записи удерживается весь блок, поэтому чтение и изменение
+        tx['n'] = tx['n'] + 1 из разных потоков не теряют обновления.
+        Читатели блокировку не берут и не ждут
+        """
+        with self._lock:
+            draft = Transaction(self._snapshot)
+            yield draft
+            self._update_snapshot(draft.updates, draft.removed)
 
     def insert(self, target: TargetType):
         """
@@ -99,7 +438,34 @@ class ConfigProvider(dict):
         """
         resolver = SourceResolver(FilesScanner.get_caller_path())
         new_data = resolver.resolve(target)
-        self.update(new_data)
+        with self._lock:
+            self._update_snapshot(new_data)
+            if self._normalize_keys:
+                snapshot = self._snapshot
+                self._key_index = (snapshot, KeyIndex(snapshot))
+                self._key_index[1].report()
+
+    def overlay(self, target: TargetType) -> 'ConfigProvider':
+        """
+        Новый конфиг: target (то же самое, что аргумент в Config()) поверх этого.
+        Вложенные словари сливаются на любой глубине:
+        base = Config('base.yaml')
+        tenant = base.overlay({'db': {'host': 'tenant-db'}})
+        tenant.db.port == base.db.port
+
+        Текущий снимок не копируется, а становится нижним слоем, поэтому
+        наложение стоит памяти только на данные target.
+        Последующие изменения этого конфига в наложении не видны,
+        изменения наложения (set, insert) не затрагивают этот конфиг.
+        Подстановки ${...} в target не вычисляются
+        """
+        if isinstance(target, Mapping):
+            data = target
+        else:
+            data = SourceResolver(FilesScanner.get_caller_path()).resolve(target)
+        snapshot = self._snapshot
+        layers = snapshot.layers if isinstance(snapshot, LayeredMapping) else (snapshot,)
+        return self._child(LayeredMapping((dict(data),) + layers))
 
     def update_from_locals(self):
         """Обновляет словарь отфильтрованными локальными переменными
@@ -118,7 +484,7 @@ class ConfigProvider(dict):
                 return False
             return True
 
-        local_vars = inspect.currentframe().f_back.f_locals
+        local_vars = sys._getframe(1).f_locals
         data = {
             key: value for key, value in local_vars.items()
             if is_config_var(key, value)
@@ -151,7 +517,14 @@ class ConfigProvider(dict):
 
     def __getattr__(self, item):
         """attr_name = config.attr_name"""
-        return self.get(item, raise_absent=True)
+        # Служебные имена ищут pickle, copy и прочие протоколы,
+        # а до инициализации (при восстановлении объекта) данных еще нет
+        if (item.startswith('__') and item.endswith('__')) or '_snapshot' not in self.__dict__:
+            raise AttributeError(item)
+        try:
+            return self.get(item, raise_absent=True)
+        except KeyError as e:
+            raise ConfigKeyError(*e.args) from None
 
     def __getitem__(self, item):
         """attr_name = config['attr_name']"""
@@ -160,6 +533,281 @@ class ConfigProvider(dict):
     def __contains__(self, item: str):
         return self.contains(item)
 
+    def __setitem__(self, item, value):
+        self._update_snapshot({item: value})
+
+    def __delitem__(self, item):
+        with self._lock:
+            if item not in self._snapshot:
+                raise KeyError(item)
+            self._update_snapshot(removed=[item])
+
+    def update(self, *args, **kwargs):
+        self._update_snapshot(dict(*args, **kwargs))
+
+    def pop(self, item, *default):
+        with self._lock:
+            if item not in self._snapshot:
+                if default:
+                    return default[0]
+                raise KeyError(item)
+            value = self._snapshot[item]
+            self._update_snapshot(removed=[item])
+            return value
+
+    def popitem(self):
+        with self._lock:
+            if not self._snapshot:
+                raise KeyError('popitem(): config is empty')
+            item = next(reversed(self._snapshot))
+            return item, self.pop(item)
+
+    def setdefault(self, item, default=None):
+        with self._lock:
+            if item not in self._snapshot:
+                self._update_snapshot({item: default})
+            return self._snapshot[item]
+
+    def clear(self):
+        with self._lock:
+            if self._interpolator is not None:
+                self._raw = {}
+                self._interpolator.resolve(self._raw)
+            self._publish(self._storage({}))
+
+    def copy(self) -> 'ConfigProvider':
+        """Копия разделяет со своим источником неизменяемый снимок, поэтому стоит O(1)"""
+        return self._child(self._snapshot)
+
+    def keys(self):
+        if self._tracking_count:
+            track_read(self, '')
+        return self._snapshot.keys()
+
+    def values(self):
+        if self._tracking_count:
+            track_read(self, '')
+        return self._snapshot.values()
+
+    def items(self):
+        if self._tracking_count:
+            track_read(self, '')
+        return self._snapshot.items()
+
+    def __iter__(self):
+        if self._tracking_count:
+            track_read(self, '')
+        return iter(self._snapshot)
+
+    def __reversed__(self):
+        return reversed(self._snapshot)
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def __eq__(self, other):
+        if isinstance(other, ConfigProvider):
+            other = other._snapshot
+        return self._snapshot == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self._snapshot)
+
+    def __reduce__(self):
+        """
+        Передается только итоговый снимок и настройки, без повторного поиска файлов.
+        Подписки не передаются, секреты остаются ссылками и
+        запрашиваются заново в процессе, где объект восстановлен
+        """
+        # Снимок неизменяем, поэтому и copy.copy(config) может разделять его с оригиналом
+        data = self._raw if self._interpolator is not None else self._snapshot
+        settings = {
+            'interpolate': self._interpolator is not None,
+            'secrets': self._secrets,
+            'compact': self._compact,
+            'normalize_keys': self._normalize_keys,
+        }
+        return self.__class__._restore, (data, settings)
+
+    @classmethod
+    def _restore(cls, data: t.Mapping, settings: dict) -> 'ConfigProvider':
+        """Обратная операция к __reduce__, использует data без копирования"""
+        provider = cls.__new__(cls)
+        dict.__init__(provider)
+        provider._compact = settings['compact']
+        provider._secrets = settings['secrets']
+        provider._normalize_keys = settings.get('normalize_keys', False)
+        if settings['secrets'] is not None:
+            settings['secrets'].prefetch(settings['secrets'].collect(data))
+        if settings['interpolate']:
+            provider._interpolator = Interpolator()
+            provider._raw = dict(data)
+            data = provider._storage(provider._interpolator.resolve(provider._raw))
+        provider._init_snapshot(data)
+        return provider
+
+    def _update_snapshot(self, updates: t.Optional[t.Dict] = None, removed: t.Iterable = ()):
+        """Строит новый снимок из текущего и публикует его.
+        Писатели упорядочены блокировкой, читатели ее не берут"""
+        if updates and self._secrets is not None:
+            self._secrets.prefetch(self._secrets.collect(updates))
+        with self._lock:
+            if self._interpolator is not None:
+                self._publish(self._storage(self._interpolate(updates or {}, removed)))
+                return
+            if not isinstance(self._snapshot, dict):
+                # CompactMapping и LayeredMapping неизменяемы и сами строят новый снимок
+                self._publish(self._snapshot.replace(updates, removed))
+                return
+            snapshot = dict(self._snapshot)
+            if updates:
+                snapshot.update(updates)
+            for item in removed:
+                snapshot.pop(item, None)
+            self._publish(snapshot)
+
+    def _interpolate(self, updates: t.Dict, removed: t.Iterable) -> t.Dict:
+        """Применяет изменения к исходным данным и пересчитывает зависимые подстановки"""
+        raw = dict(self._raw)
+        raw.update(updates)
+        removed = [item for item in removed if item in raw]
+        for item in removed:
+            del raw[item]
+        self._raw = raw
+        return self._interpolator.update(raw, set(updates) | set(removed))
+
+    def _storage(self, data: t.Mapping) -> t.Mapping:
+        """Новый снимок из словаря в зависимости от режима хранения"""
+        return CompactMapping(data) if self._compact else dict(data)
+
+    def _publish(self, snapshot: t.Mapping):
+        """Подменяет текущий снимок, вызывается только под self._lock"""
+        previous = self.__dict__.get('_snapshot')
+        self._snapshot = snapshot
+        self._mirror(snapshot)
+        if self._subscriptions and previous is not None:
+            self._notify(ConfigDiff.compute(previous, snapshot))
+
+    def _mirror(self, snapshot: t.Mapping):
+        """Повторяет снимок во встроенном хранилище dict.
+        Сначала записываются новые значения, затем удаляются лишние ключи,
+        поэтому C-код не увидит пустой словарь посреди записи.
+        Компактный и слоистый снимки не зеркалируются, иначе теряется экономия памяти"""
+        if not isinstance(snapshot, dict):
+            dict.clear(self)
+            return
+        dict.update(self, snapshot)
+        if dict.__len__(self) != len(snapshot):
+            for key in [key for key in dict.keys(self) if key not in snapshot]:
+                dict.__delitem__(self, key)
+
+    def _notify(self, diff: ConfigDiff):
+        """Вызывает подписчиков, чьих префиксов касаются изменения.
+        Новый снимок уже опубликован, поэтому ошибка подписчика
+        не прерывает изменение и не мешает остальным подписчикам"""
+        if not diff:
+            return
+        for prefix, callback in self._subscriptions:
+            changes = diff.filter(prefix)
+            if changes:
+                try:
+                    callback(changes)
+                except Exception as e:
+                    warn(f'Ошибка в подписчике {callback!r} на "{prefix}": {e!r}', UserWarning)
+
+    def _access_with_overrides(self, item: str) -> t.Optional[ConfigType]:
+        """_unsafe_access_key с учетом активных в текущем контексте override"""
+        overrides = self._override_var.get()
+        if not overrides:
+            return self._unsafe_access_key(item)
+        if item in overrides:
+            return overrides[item]
+
+        # Значение внутри подмененного словаря: override {'db': {...}}, запрос 'db.host'
+        for path, value in overrides.items():
+            if item.startswith(path + '.'):
+                for key in item[len(path) + 1:].split('.'):
+                    if not isinstance(value, Mapping) or key not in value:
+                        raise KeyError(f'Key "{key}" not found on path "{item}"')
+                    value = value[key]
+                return value
+
+        # Подмены внутри запрошенного словаря: override {'db.host': ...}, запрос 'db'
+        nested = sorted(
+            (path[len(item) + 1:].split('.'), value)
+            for path, value in overrides.items() if path.startswith(item + '.')
+        )
+        if not nested:
+            return self._unsafe_access_key(item)
+        try:
+            base = self._unsafe_access_key(item)
+        except KeyError:
+            base = {}
+        if not isinstance(base, Mapping):
+            return base
+        for keys, value in nested:
+            base = self._replace_path(base, keys, value)
+        return base
+
+    @classmethod
+    def _replace_path(cls, data: t.Mapping, keys: t.List[str], value) -> dict:
+        """Копия data с замененным значением, копируются только словари на пути"""
+        data = dict(data)
+        if len(keys) == 1:
+            data[keys[0]] = value
+        else:
+            child = data.get(keys[0])
+            data[keys[0]] = cls._replace_path(child if isinstance(child, Mapping) else {}, keys[1:], value)
+        return data
+
+    def _normalized_access(self, item: str) -> t.Optional[ConfigType]:
+        """Поиск по KeyIndex, индекс перестраивается, если снимок изменился.
+        Найденный путь читается с учетом override: DB_HOST найдет подмену db_host.
+        memoize запоминает настоящий путь (db_host), а при отсутствии ключа -
+        нормализованный, чтобы появление ключа в любом написании сбросило кеш"""
+        snapshot = self._snapshot
+        keys = self._current_key_index(snapshot).resolve(item, snapshot)
+        if self._tracking_count:
+            track_read(self, normalize_key(item) if keys is None else '.'.join(map(str, keys)))
+        if keys is None:
+            raise KeyError(f'Key "{item}" not found')
+        if self._override_count and self._override_var.get() and all(isinstance(key, str) for key in keys):
+            try:
+                return self._access_with_overrides('.'.join(keys))
+            except KeyError:
+                pass
+        value = snapshot
+        for key in keys:
+            value = value[key]
+        return value
+
+    def _current_key_index(self, snapshot: t.Mapping) -> t.Union[KeyIndex, PrefixedKeyIndex]:
+        key_index = self._key_index
+        if key_index is None or key_index[0] is not snapshot:
+            key_index = self._key_index = (snapshot, KeyIndex(snapshot))
+        return key_index[1]
+
+    def _child_key_index(self, item: str, value: t.Mapping) -> t.Optional[PrefixedKeyIndex]:
+        """Индекс вложенного словаря value, полученного по item, на основе индекса этого конфига"""
+        snapshot = self._snapshot
+        index = self._current_key_index(snapshot)
+        for keys in ((item,), tuple(item.split('.')), index.resolve(item, snapshot)):
+            if keys is None:
+                continue
+            # value могло быть получено иначе, например из override
+            found = snapshot
+            for key in keys:
+                if not isinstance(found, Mapping) or key not in found:
+                    found = None
+                    break
+                found = found[key]
+            if found is value:
+                return index.subindex(keys, snapshot)
+        return None
+
     def _unsafe_access_key(self, item: str) -> t.Optional[ConfigType]:
         """Возвращает значение из _data, пытаясь его найти
         по строке виде key.subkey.otherkey или без точки
@@ -168,14 +816,16 @@ class ConfigProvider(dict):
         Кидает KeyError, при отсутствии ключа
         """
 
-        if super().__contains__(item):
-            return super().__getitem__(item)
+        # Одно чтение ссылки, дальше работаем с неизменным снимком
+        snapshot = self._snapshot
+        if item in snapshot:
+            return snapshot[item]
 
         # Попытка пройти по частям ключей, разделенным точками
         keys = item.split('.')
-        value = self.to_dict()
+        value = snapshot
         for key in keys:
-            if not hasattr(value, '__getitem__'):
+            if not isinstance(value, Mapping):
                 raise KeyError(f'Key "{key}" not found on path "{item}"')
 
             if key not in value:
@@ -184,3 +834,87 @@ class ConfigProvider(dict):
             value = value[key]
 
         return value
+
+
+class PresenceIndex:
+    """
+    Все пути снимка через точку, 'a.b.c' in config - одна проверка в множестве.
+    Неразобранные секции ленивого ini в индекс не раскрываются,
+    пути внутри них проверяются обычным обходом
+    """
+    __slots__ = ('paths', 'opaque')
+
+    def __init__(self, snapshot: t.Mapping):
+        self.paths: t.Set[str] = set()
+        self.opaque: t.Set[str] = set()
+        self._add(snapshot, '')
+
+    def _add(self, data: t.Mapping, prefix: str):
+        for key, value in data.items():
+            if not isinstance(key, str):
+                continue
+            path = prefix + key
+            self.paths.add(path)
+            if isinstance(value, LazyIniSection) and not value._loaded:
+                self.opaque.add(path)
+            elif isinstance(value, Mapping):
+                self._add(value, path + '.')
+
+    def lookup(self, item: str) -> t.Optional[bool]:
+        """True/False, или None, если путь ведет внутрь неразобранной секции"""
+        if item in self.paths:
+            return True
+        if self.opaque:
+            prefix = item
+            while '.' in prefix:
+                prefix = prefix.rsplit('.', 1)[0]
+                if prefix in self.opaque:
+                    return None
+        return False
+
+
+class Transaction:
+    """
+    Черновик изменений для ConfigProvider.transaction()
+    Чтение видит сделанные в черновике изменения поверх исходного снимка
+    """
+
+    def __init__(self, snapshot: dict):
+        self._snapshot = snapshot
+        self.updates = {}
+        self.removed = set()
+
+    def set(self, item: str, value: ConfigType):
+        self.updates[item] = value
+        self.removed.discard(item)
+
+    def update(self, data: dict):
+        for item, value in data.items():
+            self.set(item, value)
+
+    def delete(self, item: str):
+        self.updates.pop(item, None)
+        self.removed.add(item)
+
+    def get(self, item: str, default_value=None):
+        if item in self.updates:
+            return self.updates[item]
+        if item in self.removed:
+            return default_value
+        return self._snapshot.get(item, default_value)
+
+    def __setitem__(self, item, value):
+        self.set(item, value)
+
+    def __delitem__(self, item):
+        self.delete(item)
+
+    def __getitem__(self, item):
+        if item in self.updates:
+            return self.updates[item]
+        if item in self.removed:
+            raise KeyError(item)
+        return self._snapshot[item]
+
+    def __contains__(self, item):
+        return item in self.updates or (item not in self.removed and item in self._snapshot)
@@ -0,0 +1,761 @@
+"""
+Локальный демон конфигов: один процесс ищет и разбирает файлы,
+остальные процессы хоста получают готовый конфиг через unix сокет
+и поэтому видят одинаковые значения.
+
+Сервер:
+    daemon = ConfigDaemon('/run/myapp/config.sock', ['config.yaml', Source.env])
+    daemon.serve_forever()           # или daemon.start() в фоновом потоке
+    daemon.reload()                  # перечитать файлы, клиенты получат уведомление
+или из консоли: bestconfig daemon --socket /run/myapp/config.sock
+
+Клиент:
+    config = DaemonConfigProvider('/run/myapp/config.sock')
+    config.db.host                   # из локальной копии, без обращения к демону
+
+Протокол: кадр - заголовок struct '>BI' (тип сообщения, длина) и данные.
+Запросы клиента - строки utf-8, ответы демона - json или простой бинарный
+формат (encode_value), которые разбираются только в данные:
+None, bool, int, float, str, bytes, list, tuple, dict и дата/время,
+поэтому чужой процесс на месте сокета не может выполнить код в клиенте.
+Сокет доступен только владельцу (0600)
+"""
+import datetime
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import typing as t
+from collections.abc import Mapping
+from warnings import warn
+
+from .config_provider import ConfigProvider
+from .diff import ConfigDiff
+from .source import TargetType
+from .source_resolver import SourceResolver
+
+HEADER = struct.Struct('>BI')
+
+"""Запросы клиента"""
+SNAPSHOT = 0x01
+GET = 0x02
+SUBSCRIBE = 0x03
+"""Ответы демона"""
+VALUE = 0x81
+NOT_FOUND = 0x82
+CHANGED = 0x83
+ERROR = 0x84
+
+"""Запросы больше этого размера демон не читает"""
+MAX_REQUEST_SIZE = 64 * 1024
+
+"""Размер sun_path: путь к сокету вместе с завершающим нулем"""
+MAX_SOCKET_PATH = 108 if sys.platform.startswith('linux') else 104
+
+_LENGTH = struct.Struct('>I')
+_INT = struct.Struct('>q')
+_FLOAT = struct.Struct('>d')
+_INT_MIN, _INT_MAX = -(1 << 63), (1 << 63) - 1
+_TEMPORAL = {b'A': datetime.datetime, b'a': datetime.date, b'h': datetime.time}
+
+
+class DaemonError(ConnectionError):
+    """Демон недоступен или вернул ошибку"""
+
+
+def encode_value(value: t.Any) -> bytes:
+    """
+    Значение конфига для передачи клиенту. Обычно это json (b'J' + текст),
+    если json не передает значение точно (кортежи, ключи не строки, даты, bytes),
+    то бинарный формат (b'B' + данные): байт типа и данные, у строк,
+    списков и словарей перед данными длина. TypeError для других типов
+    """
+    try:
+        text = json.dumps(value, separators=(',', ':'), allow_nan=False, default=_json_default)
+    except (TypeError, ValueError):
+        text = None
+    # Кортеж и список, ключ 1 и '1' различаются при сравнении
+    if text is not None and json.loads(text) == value:
+        return b'J' + text.encode('ascii')
+    chunks: t.List[bytes] = [b'B']
+    _encode(value, chunks.append)
+    return b''.join(chunks)
+
+
+def _json_default(value: t.Any) -> t.Any:
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(type(value).__name__)
+
+
+def _encode(value: t.Any, write: t.Callable[[bytes], t.Any]):
+    kind = type(value)
+    if kind is str:
+        data = value.encode('utf-8', 'surrogatepass')
+        write(b's' + _LENGTH.pack(len(data)) + data)
+    elif value is None:
+        write(b'N')
+    elif kind is bool:
+        write(b'T' if value else b'F')
+    elif kind is int:
+        if _INT_MIN <= value <= _INT_MAX:
+            write(b'i' + _INT.pack(value))
+        else:
+            data = str(value).encode()
+            write(b'I' + _LENGTH.pack(len(data)) + data)
+    elif kind is float:
+        write(b'f' + _FLOAT.pack(value))
+    elif isinstance(value, (dict, Mapping)):
+        write(b'd' + _LENGTH.pack(len(value)))
+        for key, item in value.items():
+            _encode(key, write)
+            _encode(item, write)
+    elif kind is list or kind is tuple:
+        write((b'l' if kind is list else b'u') + _LENGTH.pack(len(value)))
+        for item in value:
+            _encode(item, write)
+    elif kind is bytes:
+        write(b'b' + _LENGTH.pack(len(value)) + value)
+    elif kind in (datetime.datetime, datetime.date, datetime.time):
+        tag = next(tag for tag, temporal in _TEMPORAL.items() if temporal is kind)
+        data = value.isoformat().encode()
+        write(tag + _LENGTH.pack(len(data)) + data)
+    else:
+        raise TypeError(f'Значение типа {kind.__name__} нельзя передать клиенту демона: {value!r}')
+
+
+def decode_value(data: bytes) -> t.Any:
+    """Обратная операция к encode_value, DaemonError если данные повреждены"""
+    try:
+        if data[:1] == b'J':
+            return json.loads(data[1:])
+        if data[:1] != b'B':
+            raise ValueError('неизвестный формат')
+        value, offset = _decode(memoryview(data), 1)
+    except (IndexError, ValueError, TypeError, struct.error, RecursionError) as e:
+        raise DaemonError(f'Поврежденный ответ демона: {e!r}') from None
+    if offset != len(data):
+        raise DaemonError('Поврежденный ответ демона: лишние данные')
+    return value
+
+
+def _decode(data: memoryview, offset: int) -> t.Tuple[t.Any, int]:
+    tag = bytes(data[offset:offset + 1])
+    offset += 1
+    if tag == b's':
+        size, = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        return str(data[offset:offset + size], 'utf-8', 'surrogatepass'), _checked(data, offset + size)
+    if tag == b'i':
+        return _INT.unpack_from(data, offset)[0], offset + 8
+    if tag == b'd':
+        size, = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        result = {}
+        for _ in range(size):
+            key, offset = _decode(data, offset)
+            result[key], offset = _decode(data, offset)
+        return result, offset
+    if tag == b'l' or tag == b'u':
+        size, = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        items = []
+        for _ in range(size):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return (items if tag == b'l' else tuple(items)), offset
+    if tag == b'N':
+        return None, offset
+    if tag == b'T' or tag == b'F':
+        return tag == b'T', offset
+    if tag == b'f':
+        return _FLOAT.unpack_from(data, offset)[0], offset + 8
+    if tag == b'I' or tag == b'b' or tag in _TEMPORAL:
+        size, = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        raw = bytes(data[offset:offset + size])
+        offset = _checked(data, offset + size)
+        if tag == b'I':
+            return int(raw), offset
+        if tag == b'b':
+            return raw, offset
+        return _TEMPORAL[tag].fromisoformat(raw.decode()), offset
+    raise ValueError(f'неизвестный тип {tag!r}')
+
+
+def _checked(data: memoryview, end: int) -> int:
+    if end > len(data):
+        raise ValueError('данные обрываются')
+    return end
+
+
+def send_frame(sock: socket.socket, kind: int, payload: bytes = b''):
+    sock.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket, max_size: t.Optional[int] = None) -> t.Optional[t.Tuple[int, bytes]]:
+    """(тип, данные) или None, если соединение закрыто"""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    kind, size = HEADER.unpack(header)
+    if max_size is not None and size > max_size:
+        raise DaemonError(f'Слишком большое сообщение: {size} байт')
+    payload = _recv_exact(sock, size) if size else b''
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def _recv_exact(sock: socket.socket, size: int) -> t.Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Обслуживает одно соединение клиента"""
+
+    def handle(self):
+        try:
+            self._serve()
+        except OSError:
+            # Клиент отключился
+            pass
+
+    def _serve(self):
+        daemon: ConfigDaemon = self.server.daemon
+        while True:
+            try:
+                frame = recv_frame(self.request, MAX_REQUEST_SIZE)
+            except socket.timeout:
+                # Таймаут есть только у соединений подписчиков, они ничего не присылают
+                continue
+            except DaemonError as e:
+                self._send(ERROR, str(e).encode())
+                return
+            if frame is None:
+                return
+            kind, payload = frame
+            if kind == SUBSCRIBE:
+                # Дальше по этому соединению идут только уведомления
+                daemon.add_subscriber(self.request)
+                continue
+            try:
+                self._reply(daemon, kind, payload)
+            except (TypeError, UnicodeDecodeError) as e:
+                # Значение, которое нельзя закодировать, или не utf-8 ключ
+                self._send(ERROR, str(e).encode())
+
+    def _reply(self, daemon: 'ConfigDaemon', kind: int, payload: bytes):
+        if kind == SNAPSHOT:
+            self._send(VALUE, daemon.encoded_snapshot())
+        elif kind == GET:
+            found, value = daemon.lookup(payload.decode('utf-8'))
+            if found:
+                self._send(VALUE, encode_value(value))
+            else:
+                self._send(NOT_FOUND)
+        else:
+            self._send(ERROR, f'Неизвестный тип сообщения {kind}'.encode())
+
+    def setup(self):
+        self.server.daemon.add_connection(self.request)
+
+    def finish(self):
+        self.server.daemon.remove_connection(self.request)
+
+    def _send(self, kind: int, payload: bytes = b''):
+        with self.server.daemon.write_lock(self.request):
+            send_frame(self.request, kind, payload)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ConfigDaemon:
+    """
+    Разбирает конфиг один раз (SourceResolver, как Config()) и раздает
+    его по unix сокету: весь снимок или отдельные ключи.
+    После изменений (reload, config.set) подписанным клиентам
+    отправляется уведомление с номером версии и измененными путями.
+    Уведомления ставятся в очередь и отправляются отдельным потоком,
+    поэтому медленный подписчик не задерживает запись в конфиг
+    """
+
+    def __init__(self, socket_path: str, targets: t.List[TargetType],
+                 resolver: t.Optional[SourceResolver] = None, interpolate: bool = False):
+        """
+        :param targets: источники в порядке применения, как аргументы Config()
+        (файлы по умолчанию не добавляются, см. Config._get_targets)
+        :param resolver: по умолчанию файлы ищутся от текущей директории
+        """
+        self.socket_path = str(socket_path)
+        self.targets = list(targets)
+        self.resolver = resolver or SourceResolver(os.path.join(os.getcwd(), '__bestconfig__'))
+        self.config = ConfigProvider(self.resolver.resolve_all(self.targets), interpolate=interpolate)
+        self.version = 1
+        self._subscribers: t.List[socket.socket] = []
+        # Все открытые соединения клиентов, закрываются при остановке демона
+        self._connections: t.Set[socket.socket] = set()
+        self._write_locks: t.Dict[socket.socket, threading.Lock] = {}
+        self._lock = threading.Lock()
+        # (получатели, уведомление), None останавливает поток отправки
+        self._outbox: 'queue.Queue[t.Optional[t.Tuple[t.List[socket.socket], bytes]]]' = queue.Queue()
+        self._sender: t.Optional[threading.Thread] = None
+        self._server: t.Optional[_UnixServer] = None
+        self._inode: t.Optional[int] = None
+        # (версия, закодированный снимок)
+        self._encoded: t.Optional[t.Tuple[int, bytes]] = None
+        self.config.subscribe('', self._on_change)
+
+    def snapshot(self) -> t.Tuple[int, dict]:
+        """(версия, весь конфиг), секреты остаются ссылками"""
+        with self.config._lock:
+            version, config = self.version, self.config.copy()
+        return version, config.to_dict()
+
+    def encoded_snapshot(self) -> bytes:
+        """snapshot() для передачи клиентам, кодируется один раз на версию"""
+        with self.config._lock:
+            version = self.version
+            cached = self._encoded
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            config = self.config.copy()
+        payload = encode_value([version, config.to_dict()])
+        self._encoded = (version, payload)
+        return payload
+
+    def lookup(self, item: str) -> t.Tuple[bool, t.Any]:
+        """(найден ли ключ, значение без преобразования типа)"""
+        try:
+            value = self.config.get(item, raise_absent=True, cast=None)
+        except KeyError:
+            return False, None
+        if isinstance(value, ConfigProvider):
+            value = value.to_dict()
+        return True, value
+
+    def reload(self):
+        """Перечитывает источники, клиенты получат уведомление, только если что-то изменилось"""
+        data = self.resolver.resolve_all(self.targets)
+        current = self.config.to_dict()
+        with self.config.transaction() as tx:
+            for key in current:
+                if key not in data:
+                    del tx[key]
+            tx.update({
+                key: value for key, value in data.items()
+                if key not in current or current[key] != value
+            })
+
+    """Сколько секунд ждать медленного подписчика, прежде чем отключить его"""
+    subscriber_timeout = 5.0
+
+    def add_subscriber(self, sock: socket.socket):
+        sock.settimeout(self.subscriber_timeout)
+        with self._lock:
+            self._subscribers.append(sock)
+            # Через ту же очередь, чтобы текущая версия пришла раньше следующих уведомлений
+            self._outbox.put(([sock], encode_value([self.version, []])))
+
+    def add_connection(self, sock: socket.socket):
+        with self._lock:
+            self._connections.add(sock)
+
+    def remove_connection(self, sock: socket.socket):
+        with self._lock:
+            self._connections.discard(sock)
+        self.remove_subscriber(sock)
+
+    def remove_subscriber(self, sock: socket.socket):
+        with self._lock:
+            if sock in self._subscribers:
+                self._subscribers.remove(sock)
+            self._write_locks.pop(sock, None)
+
+    def write_lock(self, sock: socket.socket) -> threading.Lock:
+        """Ответы и уведомления в одно соединение не перемешиваются"""
+        with self._lock:
+            return self._write_locks.setdefault(sock, threading.Lock())
+
+    def _on_change(self, diff: ConfigDiff):
+        # Вызывается под блокировкой записи конфига, поэтому версия и снимок согласованы.
+        # Здесь уведомление только ставится в очередь, отправляет его _send_notifications
+        with self._lock:
+            self.version += 1
+            if self._subscribers:
+                self._outbox.put((list(self._subscribers), encode_value([self.version, diff.paths()])))
+
+    def _send_notifications(self, outbox: queue.Queue):
+        """Поток отправки уведомлений подписчикам, работает вне блокировок конфига"""
+        while True:
+            item = outbox.get()
+            if item is None:
+                return
+            subscribers, message = item
+            for sock in subscribers:
+                with self._lock:
+                    if sock not in self._subscribers:
+                        continue
+                try:
+                    with self.write_lock(sock):
+                        send_frame(sock, CHANGED, message)
+                except OSError:
+                    self.remove_subscriber(sock)
+
+    def _bind(self) -> _UnixServer:
+        if len(os.fsencode(self.socket_path)) >= MAX_SOCKET_PATH:
+            raise DaemonError(f'Путь к сокету {self.socket_path} длиннее {MAX_SOCKET_PATH - 1} байт')
+        self._remove_stale_socket()
+        parent = os.path.dirname(self.socket_path)
+        directory = tempfile.mkdtemp(prefix='.bc', dir=parent or os.curdir)
+        # Относительный путь для относительного socket_path, так он короче
+        tmp_path = os.path.join(parent, os.path.basename(directory), 's')
+        try:
+            if len(os.fsencode(tmp_path)) < MAX_SOCKET_PATH:
+                server = self._bind_via_link(tmp_path)
+            else:
+                server = self._bind_with_umask()
+        finally:
+            os.rmdir(directory)
+        self._inode = os.stat(self.socket_path).st_ino
+        server.daemon = self
+        self._server = server
+        self._outbox = outbox = queue.Queue()
+        self._sender = threading.Thread(target=self._send_notifications, args=(outbox,),
+                                        name='bestconfig-daemon-sender', daemon=True)
+        self._sender.start()
+        return server
+
+    def _bind_via_link(self, tmp_path: str) -> _UnixServer:
+        """Сокет создается в новой директории 0700 и только потом появляется
+        по нужному пути, поэтому к нему нельзя подключиться, пока права не 0600"""
+        server = None
+        try:
+            server = _UnixServer(tmp_path, _RequestHandler)
+            os.chmod(tmp_path, 0o600)
+            # В отличие от rename, link не заменит файл, появившийся по этому пути
+            os.link(tmp_path, self.socket_path)
+        except BaseException as e:
+            if server is not None:
+                server.server_close()
+            if isinstance(e, FileExistsError):
+                raise DaemonError(f'{self.socket_path} уже существует') from e
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return server
+
+    def _bind_with_umask(self) -> _UnixServer:
+        """Путь через временную директорию не помещается в sun_path:
+        сокет создается сразу по нужному пути с правами 0600 через umask.
+        umask общий для процесса, поэтому меняется только на время bind"""
+        previous = os.umask(0o177)
+        try:
+            return _UnixServer(self.socket_path, _RequestHandler)
+        except OSError as e:
+            if os.path.lexists(self.socket_path):
+                raise DaemonError(f'{self.socket_path} уже существует') from e
+            raise
+        finally:
+            os.umask(previous)
+
+    def _remove_stale_socket(self):
+        """Удаляет сокет от предыдущего запуска, если его никто не слушает"""
+        try:
+            mode = os.lstat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise DaemonError(f'{self.socket_path} существует и не является сокетом')
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except ConnectionRefusedError:
+            os.remove(self.socket_path)
+            return
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            raise DaemonError(f'Не удалось проверить сокет {self.socket_path}: {e}') from e
+        finally:
+            probe.close()
+        raise DaemonError(f'Сокет {self.socket_path} уже обслуживает другой процесс')
+
+    def serve_forever(self):
+        server = self._bind()
+        try:
+            server.serve_forever()
+        finally:
+            self._close()
+
+    def start(self) -> threading.Thread:
+        """Запускает сервер в фоновом потоке, сокет готов к подключению после возврата"""
+        server = self._bind()
+        thread = threading.Thread(target=server.serve_forever, name='bestconfig-daemon', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._close()
+
+    def _close(self):
+        server, self._server = self._server, None
+        if server is not None:
+            server.server_close()
+        with self._lock:
+            connections, self._connections = self._connections, set()
+            self._subscribers = []
+            self._write_locks.clear()
+            self._outbox.put(None)
+        # Остановленный демон не должен отвечать старым конфигом
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        sender, self._sender = self._sender, None
+        if sender is not None:
+            sender.join(self.subscriber_timeout)
+        # Удаляется только свой сокет
+        try:
+            if os.stat(self.socket_path).st_ino == self._inode:
+                os.remove(self.socket_path)
+        except OSError:
+            pass
+
+
+class DaemonClient:
+    """Соединение с ConfigDaemon, запросы из разных потоков выполняются по очереди"""
+
+    def __init__(self, socket_path: str, timeout: t.Optional[float] = 5.0):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self._sock: t.Optional[socket.socket] = self._connect()
+        self._lock = threading.Lock()
+        self._subscriptions: t.List[socket.socket] = []
+        self._closed = threading.Event()
+
+    """Пауза перед повторным подключением подписки, удваивается до reconnect_max_delay"""
+    reconnect_delay = 0.1
+    reconnect_max_delay = 5.0
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise DaemonError(f'Демон конфигов {self.socket_path} недоступен: {e}') from e
+        return sock
+
+    def _request(self, kind: int, payload: bytes = b'') -> t.Tuple[int, bytes]:
+        """Запросы только читают, поэтому после разрыва старого соединения
+        (например, демон перезапущен) запрос один раз повторяется по новому"""
+        with self._lock:
+            for retry in (True, False):
+                reused = self._sock is not None
+                if self._sock is None:
+                    self._sock = self._connect()
+                try:
+                    send_frame(self._sock, kind, payload)
+                    frame = recv_frame(self._sock)
+                except socket.timeout as e:
+                    # Ответ может прийти позже и достался бы следующему
+                    # запросу, поэтому соединение закрывается и открывается заново
+                    self._disconnect()
+                    raise DaemonError(f'Демон конфигов {self.socket_path} не ответил: {e}') from e
+                except OSError as e:
+                    self._disconnect()
+                    if retry and reused:
+                        continue
+                    raise DaemonError(f'Ошибка обмена с демоном конфигов {self.socket_path}: {e}') from e
+                if frame is None:
+                    self._disconnect()
+                    if retry and reused:
+                        continue
+                    raise DaemonError(f'Демон конфигов {self.socket_path} закрыл соединение')
+                break
+        if frame[0] == ERROR:
+            raise DaemonError(frame[1].decode('utf-8', 'replace'))
+        return frame
+
+    def _disconnect(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+
+    def snapshot(self) -> t.Tuple[int, dict]:
+        """(версия, весь конфиг)"""
+        version, data = decode_value(self._request(SNAPSHOT)[1])
+        return version, data
+
+    def get(self, item: str, default_value=None):
+        """Значение одного ключа (путь через точку) без преобразования типа"""
+        kind, payload = self._request(GET, item.encode('utf-8'))
+        if kind == NOT_FOUND:
+            return default_value
+        return decode_value(payload)
+
+    def subscribe(self, callback: t.Callable[[int, t.Optional[t.List[str]]], t.Any]) -> threading.Thread:
+        """
+        callback(версия, измененные пути) вызывается в фоновом потоке после каждого изменения,
+        первый вызов сразу после подписки - с текущей версией и пустым списком путей.
+        При разрыве соединения (например, перезапуск демона) подписка восстанавливается
+        с растущими паузами, первый вызов после этого - с путями None:
+        изменения могли быть пропущены, а версии нового демона начинаются заново
+        """
+        sock = self._subscribe_socket()
+
+        def listen():
+            nonlocal sock
+            reconnected = False
+            while not self._closed.is_set():
+                for version, paths in self._notifications(sock):
+                    callback(version, None if reconnected else paths)
+                    reconnected = False
+                sock = self._resubscribe(sock)
+                if sock is None:
+                    return
+                reconnected = True
+
+        thread = threading.Thread(target=listen, name='bestconfig-daemon-listener', daemon=True)
+        thread.start()
+        return thread
+
+    def _subscribe_socket(self) -> socket.socket:
+        sock = self._connect()
+        try:
+            sock.settimeout(None)
+            send_frame(sock, SUBSCRIBE)
+        except OSError as e:
+            sock.close()
+            raise DaemonError(f'Не удалось подписаться на демон конфигов {self.socket_path}: {e}') from e
+        with self._lock:
+            self._subscriptions.append(sock)
+        return sock
+
+    def _notifications(self, sock: socket.socket) -> t.Iterator[t.Tuple[int, t.List[str]]]:
+        """Уведомления из соединения подписки, пока оно не разорвано"""
+        while True:
+            try:
+                frame = recv_frame(sock)
+            except OSError:
+                return
+            if frame is None:
+                return
+            if frame[0] == CHANGED:
+                try:
+                    version, paths = decode_value(frame[1])
+                except (DaemonError, ValueError, TypeError):
+                    return
+                yield version, list(paths)
+
+    def _resubscribe(self, sock: socket.socket) -> t.Optional[socket.socket]:
+        """Новое соединение подписки вместо разорванного, None после close()"""
+        with self._lock:
+            if sock in self._subscriptions:
+                self._subscriptions.remove(sock)
+        sock.close()
+        delay = self.reconnect_delay
+        while not self._closed.wait(delay):
+            try:
+                sock = self._subscribe_socket()
+            except DaemonError:
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+            # close() мог закрыть подписки, пока шло подключение
+            if self._closed.is_set():
+                sock.close()
+                return None
+            return sock
+        return None
+
+    def close(self):
+        """Закрывает соединение и подписки, потоки подписок завершаются"""
+        self._closed.set()
+        # Без блокировки, чтобы прервать запрос, ожидающий ответа в другом потоке
+        sock, self._sock = self._sock, None
+        for sock in [sock, *list(self._subscriptions)]:
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        self._subscriptions.clear()
+
+
+class DaemonConfigProvider(ConfigProvider):
+    """
+    Конфиг, полученный от ConfigDaemon. Все чтения идут из локальной копии,
+    при уведомлении об изменениях копия обновляется новым снимком демона,
+    поэтому срабатывают subscribe и memoize этого провайдера.
+    Если демон остановлен, остается последний полученный конфиг,
+    а после перезапуска демона копия обновляется его снимком
+    """
+
+    _client: t.Optional[DaemonClient] = None
+    _listener: t.Optional[threading.Thread] = None
+    """Версия конфига демона, которой соответствует локальная копия"""
+    _version = 0
+
+    def __init__(self, socket_path: str, timeout: t.Optional[float] = 5.0, **kwargs):
+        """:param kwargs: как у ConfigProvider, например interpolate"""
+        client = DaemonClient(socket_path, timeout)
+        version, data = client.snapshot()
+        super().__init__(data, **kwargs)
+        self._client = client
+        self._version = version
+        self._listener = client.subscribe(self._on_daemon_change)
+
+    def refresh(self, force: bool = False):
+        """Запрашивает у демона текущий снимок и применяет изменения.
+        force - применить, даже если версия не новее (перезапущенный демон)"""
+        version, data = self._client.snapshot()
+        with self._lock:
+            if version <= self._version and not force:
+                return
+            snapshot = self._snapshot
+            # Неизмененные ветки остаются прежними объектами
+            updates = {
+                key: value for key, value in data.items()
+                if key not in snapshot or snapshot[key] != value
+            }
+            removed = [key for key in snapshot if key not in data]
+            if updates or removed:
+                self._update_snapshot(updates, removed)
+            self._version = version
+
+    def _on_daemon_change(self, version: int, paths: t.Optional[t.List[str]]):
+        # paths None - подписка восстановлена после разрыва
+        if paths is not None and version <= self._version:
+            return
+        try:
+            self.refresh(force=paths is None)
+        except (DaemonError, OSError) as e:
+            warn(f'Не удалось обновить конфиг от демона: {e!r}', UserWarning)
+
+    def close(self):
+        """Отключается от демона, локальная копия конфига остается доступной"""
+        if self._client is not None:
+            self._client.close()
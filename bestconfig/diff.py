@@ -0,0 +1,76 @@
+import typing as t
+from collections.abc import Mapping
+
+
+class ConfigDiff:
+    """
+    Структурная разница между двумя конфигами.
+    Пути записываются через точку, как в config.get('logger.mode')
+
+    added: {путь: новое значение}
+    removed: {путь: старое значение}
+    changed: {путь: (старое значение, новое значение)}
+    """
+
+    def __init__(self, added: t.Optional[dict] = None, removed: t.Optional[dict] = None,
+                 changed: t.Optional[dict] = None):
+        self.added = added or {}
+        self.removed = removed or {}
+        self.changed = changed or {}
+
+    @classmethod
+    def compute(cls, old: t.Mapping, new: t.Mapping) -> 'ConfigDiff':
+        diff = cls()
+        diff._compare(old, new, '')
+        return diff
+
+    def _compare(self, old: t.Mapping, new: t.Mapping, prefix: str):
+        for key, old_value in old.items():
+            path = f'{prefix}{key}'
+            if key not in new:
+                self.removed[path] = old_value
+                continue
+            new_value = new[key]
+            # Неизмененные ветки снимков - одни и те же объекты, их не обходим
+            if old_value is new_value:
+                continue
+            if isinstance(old_value, Mapping) and isinstance(new_value, Mapping):
+                self._compare(old_value, new_value, path + '.')
+            elif old_value != new_value:
+                self.changed[path] = (old_value, new_value)
+
+        for key, new_value in new.items():
+            if key not in old:
+                self.added[f'{prefix}{key}'] = new_value
+
+    def paths(self) -> t.List[str]:
+        """Все затронутые пути"""
+        return [*self.added, *self.removed, *self.changed]
+
+    def filter(self, prefix: str) -> 'ConfigDiff':
+        """
+        Изменения внутри prefix, а также изменения его родителей:
+        при замене 'db' целиком подписчик 'db.host' тоже получит событие
+        """
+        if not prefix:
+            return self
+
+        def matches(path: str) -> bool:
+            return path == prefix or path.startswith(prefix + '.') or prefix.startswith(path + '.')
+
+        return ConfigDiff(
+            {path: value for path, value in self.added.items() if matches(path)},
+            {path: value for path, value in self.removed.items() if matches(path)},
+            {path: value for path, value in self.changed.items() if matches(path)},
+        )
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __eq__(self, other):
+        if not isinstance(other, ConfigDiff):
+            return NotImplemented
+        return (self.added, self.removed, self.changed) == (other.added, other.removed, other.changed)
+
+    def __repr__(self):
+        return f'ConfigDiff(added={self.added!r}, removed={self.removed!r}, changed={self.changed!r})'
@@ -1,16 +1,21 @@
-import configparser
+import builtins
+import fnmatch
 import json
+import os
 import re
+import typing as t
 import warnings
 from abc import ABCMeta, abstractmethod
-from types import ModuleType
 from warnings import warn
 
-import yaml
+from .compressed import open_file, is_compressed
 
 # Название библиотеки, используется для проверок на корректность парсинга .py файлов
 LIB_NAME = 'bestconfig'
 
+# Группа entry points, через которую сторонние пакеты добавляют свои парсеры
+PARSERS_ENTRY_POINT_GROUP = 'bestconfig.parsers'
+
 
 class AbstractFileParser(metaclass=ABCMeta):
     """
@@ -23,6 +28,12 @@ class AbstractFileParser(metaclass=ABCMeta):
     """
     extension = ''
 
+    """
+    Чтение файла может выполнить код из него (.py, теги python в yaml),
+    такой парсер не используется для конфигов, загруженных по сети
+    """
+    executes_code = False
+
     @classmethod
     @abstractmethod
     def read(cls, filepath: str) -> dict:
@@ -34,22 +45,165 @@ class AbstractFileParser(metaclass=ABCMeta):
         """
         pass
 
+    @classmethod
+    def read_table(cls, filepath: str, table: str) -> dict:
+        """
+        Возвращает только вложенную таблицу (секцию) файла,
+        путь к ней задается через точку, например tool.myapp
+        Пустой словарь, если такой таблицы нет
+        """
+        return get_table(cls.read(filepath), table)
+
+    @classmethod
+    def write(cls, data: dict, file: t.TextIO, sort_keys: bool = True):
+        """
+        Записывает data в открытый текстовый файл по частям,
+        не собирая весь текст в памяти
+        :param sort_keys: ключи в алфавитном порядке, чтобы вывод не зависел от порядка источников
+        """
+        raise NotImplementedError(f'Запись в формат {cls.extension} не поддерживается')
+
+
+def get_table(data: dict, table: str) -> dict:
+    """Спускается по data по ключам table, разделенным точками"""
+    for key in table.split('.'):
+        if not isinstance(data, dict) or key not in data:
+            return {}
+        data = data[key]
+    return data if isinstance(data, dict) else {}
+
+
+def sorted_items(data: dict, sort_keys: bool) -> t.Iterable[tuple]:
+    if not sort_keys:
+        return data.items()
+    # В yaml ключи бывают не только строками
+    return sorted(data.items(), key=lambda item: str(item[0]))
+
+
+def sorted_nested(value: t.Any) -> t.Any:
+    """Словари на любой вложенности с ключами в порядке sorted_items"""
+    if isinstance(value, dict):
+        return {key: sorted_nested(item) for key, item in sorted_items(value, True)}
+    if isinstance(value, (list, tuple)):
+        return [sorted_nested(item) for item in value]
+    return value
+
+
+def flatten_dict(data: dict, separator: str = '.', prefix: str = '') -> dict:
+    """
+    {'db': {'host': 'localhost'}} -> {'db.host': 'localhost'}
+    С разделителем '.' config.get('db.host') работает одинаково
+    для исходного и плоского словаря
+    """
+    flat = {}
+    for key, value in data.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict) and value:
+            flat.update(flatten_dict(value, separator, path + separator))
+        else:
+            flat[path] = value
+    return flat
+
+
+"""Ключи, значения которых скрываются при выгрузке конфига, см. redact_dict"""
+default_redact_patterns = ('*password*', '*passwd*', '*secret*', '*token*', '*api_key*', '*private_key*')
+REDACTED = '***'
+
+
+def redact_dict(data: dict, patterns: t.Iterable[str] = default_redact_patterns, prefix: str = '') -> dict:
+    """
+    Копия data, в которой значения ключей, подходящих под glob шаблоны patterns,
+    заменены на '***'. Шаблон проверяется и для имени ключа, и для полного пути
+    через точку, без учета регистра: '*password*', 'db.user'
+    """
+    patterns = [pattern.lower() for pattern in patterns]
+    redacted = {}
+    for key, value in data.items():
+        path = f'{prefix}{key}'
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns for name in (str(key).lower(), path.lower())):
+            redacted[key] = REDACTED
+        elif isinstance(value, dict):
+            redacted[key] = redact_dict(value, patterns, path + '.')
+        else:
+            redacted[key] = value
+    return redacted
+
 
 class YamlParser(AbstractFileParser):
-    """Парсит файлы с расширением .yaml"""
+    """Парсит файлы с расширением .yaml
+    Тег !include path подключает другой файл, см. includes.IncludeResolver
+    Локальные файлы читаются полным yaml.Loader, поэтому теги !!python работают"""
     extension = 'yaml'
+    executes_code = True
+
+    """Загрузчик PyYAML, к которому добавляется тег !include"""
+    base_loader = 'Loader'
+
+    _loader = None
 
     @classmethod
     def read(cls, filepath: str) -> dict:
-        with open(filepath, 'r') as file:
+        # PyYAML импортируется только при первом чтении .yaml файла,
+        # чтобы не замедлять import bestconfig
+        import yaml
+
+        with open_file(filepath, 'r') as file:
             try:
-                data_dict = yaml.load(file, Loader=yaml.Loader)
+                data_dict = yaml.load(file, Loader=cls._get_loader())
                 if not isinstance(data_dict, dict):
                     warnings.warn(f"Error parsing file: {filepath}", SyntaxWarning)
                 return data_dict or {}
             except yaml.YAMLError:
                 raise SyntaxError
 
+    @classmethod
+    def _get_loader(cls):
+        """base_loader, понимающий тег !include"""
+        if cls._loader is None:
+            import yaml
+            from .includes import Include
+
+            class IncludeLoader(getattr(yaml, cls.base_loader)):
+                pass
+
+            IncludeLoader.add_constructor('!include', lambda loader, node: Include(loader.construct_scalar(node)))
+            cls._loader = IncludeLoader
+        return cls._loader
+
+    _dumper = None
+
+    @classmethod
+    def write(cls, data: dict, file: t.TextIO, sort_keys: bool = True):
+        import yaml
+
+        # Emitter пишет в файл по мере обхода данных
+        yaml.dump(data, file, Dumper=cls._get_dumper(), sort_keys=sort_keys,
+                  allow_unicode=True, default_flow_style=False)
+
+    @classmethod
+    def _get_dumper(cls):
+        """yaml.SafeDumper, записывающий ленивые секции ini как обычные словари"""
+        if cls._dumper is None:
+            import yaml
+
+            class ConfigDumper(yaml.SafeDumper):
+                pass
+
+            ConfigDumper.add_representer(LazyIniSection, yaml.SafeDumper.represent_dict)
+            cls._dumper = ConfigDumper
+        return cls._dumper
+
+
+class SafeYamlParser(YamlParser):
+    """
+    Yaml без тегов !!python, которые создают произвольные объекты.
+    Используется для конфигов, загруженных по сети, см. adapters.UrlAdapter
+    """
+    executes_code = False
+    base_loader = 'SafeLoader'
+
+    _loader = None
+
 
 class JsonParser(AbstractFileParser):
     """Парсит файлы с расширением .json"""
@@ -57,12 +211,22 @@ class JsonParser(AbstractFileParser):
 
     @classmethod
     def read(cls, filepath: str) -> dict:
-        with open(filepath, 'r') as file:
+        with open_file(filepath, 'r') as file:
             try:
                 return json.load(file)
             except json.JSONDecodeError:
                 raise SyntaxError
 
+    @classmethod
+    def write(cls, data: dict, file: t.TextIO, sort_keys: bool = True):
+        # sort_keys самого json падает на ключах разных типов (404 и 'name' из yaml)
+        if sort_keys:
+            data = sorted_nested(data)
+        encoder = json.JSONEncoder(indent=2, sort_keys=False, ensure_ascii=False)
+        for chunk in encoder.iterencode(data):
+            file.write(chunk)
+        file.write('\n')
+
 
 class IniParser(AbstractFileParser):
     """Основана на configparser (https://docs.python.org/3/library/configparser.html)
@@ -80,21 +244,186 @@ class IniParser(AbstractFileParser):
     # main.py
     config = Config()
     config.get('topsecret.server.com').Port
+
+    Файлы больше lazy_threshold байт не разбираются целиком: за один проход
+    запоминаются смещения секций, а каждая секция разбирается при первом
+    обращении к ней (см. LazyIniSection), вместе с [DEFAULT], поэтому
+    наследование значений и подстановки %(name)s работают как обычно.
+    Ошибки внутри секции в этом случае появятся только при обращении к ней.
+    C-код, читающий dict напрямую (json.dumps), не разбирает ленивые секции,
+    config.to_dict() возвращает их разобранными
     """
     extension = 'ini'
 
+    """Файлы меньшего размера разбираются сразу целиком"""
+    lazy_threshold = 256 * 1024
+
     @classmethod
     def read(cls, filepath: str) -> dict:
+        # Смещения секций есть только у несжатого файла
+        if not is_compressed(filepath) and os.path.getsize(filepath) >= cls.lazy_threshold:
+            index = IniIndex.build(str(filepath))
+            if index is not None:
+                return {name: LazyIniSection(index, name) for name in index.sections}
+        return cls.parse(open_text(filepath))
+
+    @staticmethod
+    def parse(text: str, sections: t.Optional[t.Iterable[str]] = None) -> dict:
+        """Разбирает текст ini файла, sections - какие секции вернуть, по умолчанию все"""
+        import configparser
+
         parser = configparser.ConfigParser()
         # Read file with case sensitive keys
         parser.optionxform = str
-        parser.read(filepath)
-        sections = parser.sections()
+        parser.read_string(text)
         return {
             section_name: dict(parser[section_name])
-            for section_name in sections
+            for section_name in (parser.sections() if sections is None else sections)
         }
 
+    @classmethod
+    def write(cls, data: dict, file: t.TextIO, sort_keys: bool = True):
+        """
+        Ключи верхнего уровня - секции, вложенные словари внутри секций
+        записываются плоско: [section] a.b = 1.
+        Значения вне секций в ini записать нельзя, они попали бы в DEFAULT
+        """
+        for section, options in sorted_items(data, sort_keys):
+            if not isinstance(options, dict):
+                raise ValueError(f'Значение {section} вне секции нельзя записать в ini файл')
+            file.write(f'[{section}]\n')
+            for key, value in sorted_items(flatten_dict(options), sort_keys):
+                file.write(f'{key} = {cls._format_value(value)}\n')
+            file.write('\n')
+
+    @staticmethod
+    def _format_value(value: t.Any) -> str:
+        text = value if isinstance(value, str) else repr(value) if isinstance(value, (list, dict, tuple)) else str(value)
+        # % используется configparser для подстановок
+        text = text.replace('%', '%%')
+        # Продолжение многострочного значения пишется с отступом
+        return text.replace('\n', '\n\t')
+
+
+def open_text(filepath: str) -> str:
+    with open_file(filepath, 'r') as file:
+        return file.read()
+
+
+class IniIndex:
+    """
+    Смещения секций ini файла: имя -> (начало, конец) в байтах.
+    Строится одним проходом по файлу без разбора значений
+    """
+
+    # Заголовок секции в начале строки, как в configparser.SECTCRE
+    _header_template = re.compile(rb'\[(?P<header>.+)\]')
+    default_section = 'DEFAULT'
+
+    def __init__(self, filepath: str, signature: tuple, sections: t.Dict[str, t.Tuple[int, int]],
+                 default: t.Optional[t.Tuple[int, int]]):
+        self.filepath = filepath
+        self.sections = sections
+        self._signature = signature
+        self._default = default
+        self._default_text: t.Optional[str] = None
+
+    @classmethod
+    def build(cls, filepath: str) -> t.Optional['IniIndex']:
+        """
+        None, если файл нельзя разбирать по частям
+        (секция встречается дважды или значения до первой секции),
+        тогда его нужно разобрать целиком, чтобы получить обычную ошибку configparser
+        """
+        stat = os.stat(filepath)
+        spans: t.Dict[str, t.Tuple[int, int]] = {}
+        current, start = None, 0
+        offset = 0
+        with open(filepath, 'rb') as file:
+            for line in file:
+                if line[:1] == b'[':
+                    match = cls._header_template.match(line.rstrip())
+                    if match:
+                        if current is not None:
+                            spans[current] = (start, offset)
+                        current = match.group('header').decode('utf-8')
+                        if current in spans:
+                            return None
+                        start = offset
+                elif current is None and line.strip() and line.lstrip()[:1] not in (b'#', b';'):
+                    return None
+                offset += len(line)
+        if current is not None:
+            spans[current] = (start, offset)
+
+        default = spans.pop(cls.default_section, None)
+        return cls(filepath, (stat.st_mtime_ns, stat.st_size), spans, default)
+
+    def read_section(self, name: str) -> dict:
+        """Разбирает одну секцию вместе с [DEFAULT]"""
+        stat = os.stat(self.filepath)
+        if (stat.st_mtime_ns, stat.st_size) != self._signature:
+            # Файл изменился после построения индекса, смещения устарели
+            return IniParser.parse(open_text(self.filepath)).get(name, {})
+
+        if self._default_text is None:
+            self._default_text = self._read_span(self._default) if self._default else ''
+        return IniParser.parse(self._default_text + self._read_span(self.sections[name]), [name])[name]
+
+    def _read_span(self, span: t.Tuple[int, int]) -> str:
+        start, end = span
+        with open(self.filepath, 'rb') as file:
+            file.seek(start)
+            # Перевод строки нужен, если секция была в конце файла без него
+            return file.read(end - start).decode('utf-8') + '\n'
+
+
+class LazyIniSection(dict):
+    """
+    Секция ini файла, которая разбирается при первом обращении к ее содержимому.
+    Остается обычным dict: isinstance(section, dict) истинно,
+    после загрузки все методы работают со встроенным хранилищем
+    """
+    __slots__ = ('_index', '_name', '_loaded')
+
+    def __init__(self, index: IniIndex, name: str):
+        super().__init__()
+        self._index = index
+        self._name = name
+        self._loaded = False
+
+    def _load(self):
+        dict.update(self, self._index.read_section(self._name))
+        self._loaded = True
+
+    def __reduce__(self):
+        # Копия (в том числе pickle) - уже обычный словарь
+        return dict, (dict(self.items()),)
+
+    def __repr__(self):
+        if not self._loaded:
+            return f'<LazyIniSection {self._name!r} of {self._index.filepath}>'
+        return dict.__repr__(self)
+
+
+def _load_before(name: str):
+    method = getattr(dict, name)
+
+    def wrapper(self, *args, **kwargs):
+        if not self._loaded:
+            self._load()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('__getitem__', '__contains__', '__iter__', '__reversed__', '__len__', '__eq__', '__ne__',
+              '__or__', 'keys', 'values', 'items', 'get', 'copy', '__setitem__', '__delitem__',
+              'update', 'pop', 'popitem', 'setdefault', 'clear'):
+    setattr(LazyIniSection, _name, _load_before(_name))
+del _name
+
 
 class EnvParser(AbstractFileParser):
     """Читает .env файлы и подобные ему.
@@ -111,50 +440,333 @@ class EnvParser(AbstractFileParser):
         """
         template = re.compile(r'''\s*^([^\s#=]+)\s*=\s*(?:[\s"']*)(.*?)(?:[\s"']*)$''')
         result = {}
-        with open(filepath, 'r') as ins:
+        with open_file(filepath, 'r') as ins:
             for line in ins:
                 match = template.match(line)
                 if match is not None:
                     result[match.group(1)] = match.group(2)
         return result
 
+    @classmethod
+    def write(cls, data: dict, file: t.TextIO, sort_keys: bool = True):
+        """Вложенные словари записываются ключами через точку: db.host=localhost,
+        списки и словари в виде python выражений, которые разбирает UniversalConverter"""
+        for key, value in sorted_items(flatten_dict(data), sort_keys):
+            if isinstance(value, str):
+                text = value
+            elif isinstance(value, (list, dict, tuple)):
+                text = repr(value)
+            else:
+                text = str(value)
+            if '\n' in text:
+                raise ValueError(f'Многострочное значение {key} нельзя записать в env файл')
+            file.write(f'{key}={text}\n')
+
+
+class TomlParser(AbstractFileParser):
+    """
+    Парсит файлы с расширением .toml стандартным tomllib (python 3.11+),
+    на более старых версиях нужен пакет tomli.
+    Умеет читать одну таблицу из большого файла, например
+    Config('pyproject.toml#tool.myapp') вернет только [tool.myapp]
+    """
+    extension = 'toml'
+
+    # Заголовок таблицы [a.b] или массива таблиц [[a.b]]
+    _header_template = re.compile(r'^\s*\[\[?\s*([\w\-."\' ]+?)\s*\]\]?\s*(?:#.*)?$')
+
+    @classmethod
+    def read(cls, filepath: str) -> dict:
+        with open_file(filepath, 'rb') as file:
+            return cls._loads(file.read().decode('utf-8'))
+
+    @classmethod
+    def read_table(cls, filepath: str, table: str) -> dict:
+        """
+        Вместо разбора всего файла вырезает строки нужной таблицы
+        и ее подтаблиц, и разбирает только их.
+        Если таблицу не удалось надежно вырезать, разбирается весь файл
+        """
+        with open_file(filepath, 'rb') as file:
+            content = file.read().decode('utf-8')
+
+        fragment = cls._extract_table(content, table)
+        if fragment is not None:
+            try:
+                return get_table(cls._loads(fragment), table)
+            except SyntaxError:
+                pass
+        return get_table(cls._loads(content), table)
+
+    @classmethod
+    def _loads(cls, content: str) -> dict:
+        toml = cls._toml_module()
+        try:
+            return toml.loads(content)
+        except toml.TOMLDecodeError:
+            raise SyntaxError
+
+    @staticmethod
+    def _toml_module():
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        return tomllib
+
+    @classmethod
+    def _extract_table(cls, content: str, table: str) -> t.Optional[str]:
+        """
+        Возвращает текст, содержащий только заголовки и тела table и ее подтаблиц.
+        None, если таблица определена так, что строки не вырезать
+        (через родительскую таблицу, dotted keys или inline таблицы)
+        """
+        table = table.strip()
+        parents = set()
+        parts = table.split('.')
+        for i in range(1, len(parts)):
+            parents.add('.'.join(parts[:i]))
+
+        # Ключи корневой таблицы вида tool.myapp.key = 1 или tool = {...}
+        root_key_template = re.compile(r'^\s*["\']?%s["\']?\s*[.=]' % re.escape(parts[0]))
+
+        selected = []
+        in_root = True
+        inside = False
+        found = False
+        multiline_quote = None
+        for line in content.splitlines(keepends=True):
+            if multiline_quote is None:
+                match = cls._header_template.match(line) if '[' in line else None
+                if match:
+                    name = '.'.join(part.strip() for part in match.group(1).split('.'))
+                    if name in parents:
+                        return None
+                    in_root = False
+                    inside = name == table or name.startswith(table + '.')
+                    found = found or inside
+                elif in_root and root_key_template.match(line):
+                    return None
+            if inside:
+                selected.append(line)
+            if multiline_quote is not None or '"""' in line or "'''" in line:
+                multiline_quote = cls._multiline_state(line, multiline_quote)
+
+        return ''.join(selected) if found else None
+
+    @staticmethod
+    def _multiline_state(line: str, quote: t.Optional[str]) -> t.Optional[str]:
+        """Отслеживает, находится ли конец строки внутри многострочной строки"""
+        position = 0
+        while True:
+            if quote is None:
+                candidates = [(line.find(q, position), q) for q in ('"""', "'''")]
+                candidates = [(index, q) for index, q in candidates if index != -1]
+                if not candidates:
+                    return None
+                index, quote = min(candidates)
+                position = index + 3
+            else:
+                index = line.find(quote, position)
+                if index == -1:
+                    return quote
+                quote = None
+                position = index + 3
+
 
 class PyParser(AbstractFileParser):
     """
     ЭКСПЕРЕМЕНТАЛЬНАЯ ФИЧА
     Файл выполняется и переменные
     из него возвращаются в виде словаря ключ: значение
-    Внимание: файл не должен иметь зависимостей, выполняется код
-    функцией exec. Если в нем есть import, поведение не определено
+    Это обычный python код, поэтому читать можно только файлы,
+    которым доверяете как самой программе. Ограничения ниже
+    защищают от случайных ошибок в конфиге, а не от злонамеренного кода:
+    доступны только builtins из safe_builtins
+    и импорт модулей из allowed_imports, например
+    PyParser.allowed_imports |= {'os'}
+    Скомпилированный код кешируется по mtime файла, как в __pycache__,
+    поэтому повторное чтение не компилирует файл заново
     """
 
-    extension = 'env'
+    extension = 'py'
+    executes_code = True
+
+    """Модули, которые можно импортировать в .py конфиге"""
+    allowed_imports = frozenset({
+        'json', 'math', 'datetime', 'decimal', 'fractions', 're', 'string',
+        'enum', 'collections', 'itertools', 'functools', 'operator',
+    })
+
+    """Встроенные функции, доступные при выполнении .py конфига"""
+    safe_builtins = frozenset({
+        'abs', 'all', 'any', 'bool', 'bytes', 'chr', 'dict', 'divmod', 'enumerate',
+        'filter', 'float', 'format', 'frozenset', 'hex', 'int', 'isinstance', 'len',
+        'list', 'map', 'max', 'min', 'oct', 'ord', 'pow', 'range', 'repr', 'reversed',
+        'round', 'set', 'slice', 'sorted', 'str', 'sum', 'tuple', 'zip',
+        'Exception', 'ValueError', 'TypeError', 'KeyError', 'IndexError',
+    })
+
+    """Типы значений, которые попадают в конфиг, остальные (модули, функции) отбрасываются"""
+    value_types = (str, int, float, bool, dict, list, tuple, type(None))
+
+    # filepath -> (st_mtime_ns, st_size, code)
+    _code_cache: t.Dict[str, t.Tuple[int, int, t.Any]] = {}
 
     @classmethod
     def read(cls, filepath: str) -> dict:
-        with open(filepath, 'r') as file:
-            data = file.read()
+        code = cls._compile(str(filepath))
+        namespace = {
+            '__builtins__': cls._make_builtins(),
+            '__name__': '__bestconfig__',
+            '__file__': str(filepath),
+        }
+        try:
+            # Выполнение кода из файла
+            exec(code, namespace)
+        except AssertionError:
+            raise
+        except Exception as e:
+            raise SyntaxError('Ошибка выполнения файла %s: %r' % (filepath, e)) from e
+
+        return {
+            key: value
+            for key, value in namespace.items()
+            if not key.startswith('__') and isinstance(value, cls.value_types)
+        }
+
+    @classmethod
+    def _compile(cls, filepath: str):
+        """Возвращает code object файла, компилирует только при изменении файла"""
+        stat = os.stat(filepath)
+        cached = cls._code_cache.get(filepath)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        with open_file(filepath, 'rb') as file:
+            source = file.read()
+        code = compile(source, filepath, 'exec', dont_inherit=True)
+        cls._code_cache[filepath] = (stat.st_mtime_ns, stat.st_size, code)
+        return code
 
-        if LIB_NAME in data:
+    @classmethod
+    def _make_builtins(cls) -> dict:
+        safe = {name: getattr(builtins, name) for name in cls.safe_builtins}
+        safe['__import__'] = cls._import
+        return safe
+
+    @classmethod
+    def _import(cls, name, globals=None, locals=None, fromlist=(), level=0):
+        """Замена __import__, пропускающая только allowed_imports"""
+        root = name.split('.')[0]
+        if root == LIB_NAME:
             raise AssertionError(
                 'Нельзя индексировать .py файла, в котором уже есть Config(), используйте config.update_from_locals()'
             )
+        if level != 0 or (name not in cls.allowed_imports and root not in cls.allowed_imports):
+            raise ImportError(f'Импорт {name} запрещен в .py конфиге, см. PyParser.allowed_imports')
+        return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+class ParsersRegistry:
+    """
+    Реестр парсеров: расширение файла -> класс парсера.
+    Встроенные парсеры регистрируются при импорте модуля,
+    сторонние можно добавить через register_parser
+    или через entry points группы bestconfig.parsers:
+
+    # setup.py стороннего пакета
+    entry_points={
+        'bestconfig.parsers': ['toml = my_package.parsers:TomlParser']
+    }
+
+    Entry points загружаются только при обращении к расширению,
+    которого нет среди уже зарегистрированных
+    """
+
+    def __init__(self, entry_point_group: str = PARSERS_ENTRY_POINT_GROUP):
+        self._parsers: t.Dict[str, t.Type[AbstractFileParser]] = {}
+        self._entry_point_group = entry_point_group
+        self._entry_points_loaded = False
 
-        __locals = {}
-        data += '\n__locals__ = locals()'
+    def register(self, parser: t.Type[AbstractFileParser], *extensions: str) -> t.Type[AbstractFileParser]:
+        """Регистрирует парсер для переданных расширений,
+        если они не переданы, используется parser.extension.
+        Ранее зарегистрированный парсер для расширения перезаписывается"""
+        for extension in extensions or (parser.extension,):
+            self._parsers[extension.strip('.')] = parser
+        return parser
+
+    def unregister(self, *extensions: str):
+        """Убирает парсеры расширений, KeyError если расширение не зарегистрировано"""
+        for extension in extensions:
+            del self._parsers[extension.strip('.')]
+
+    def get(self, extension: str) -> t.Optional[t.Type[AbstractFileParser]]:
+        """Возвращает парсер для расширения или None"""
+        parser = self._parsers.get(extension)
+        if parser is None and not self._entry_points_loaded:
+            self._load_entry_points()
+            parser = self._parsers.get(extension)
+        return parser
+
+    def extensions(self) -> t.List[str]:
+        """Все известные расширения, включая сторонние"""
+        if not self._entry_points_loaded:
+            self._load_entry_points()
+        return list(self._parsers)
+
+    def __contains__(self, extension: str) -> bool:
+        return self.get(extension) is not None
+
+    def _load_entry_points(self):
+        """Подгружает парсеры, объявленные сторонними пакетами.
+        Встроенные и явно зарегистрированные парсеры имеют приоритет"""
+        self._entry_points_loaded = True
         try:
-            # Выполнение кода из файла
-            exec(data, __locals, __locals)
-        except:
-            raise SyntaxError(
-                'Ошибка выполнения файла %s, скорее всего в нем есть import-ы, которые приводят к ошибки' % filepath)
+            from importlib.metadata import entry_points
+        except ImportError:
+            return
 
-        # Оставляем только локальные переменные
-        keys = __locals.keys() - {'__builtins__', '__locals__'}
+        try:
+            found = entry_points(group=self._entry_point_group)
+        except TypeError:
+            # python < 3.10
+            found = entry_points().get(self._entry_point_group, [])
 
-        # Возвращаем все локальные переменные, кроме модулей
-        return {
-            key: __locals[key]
-            for key in keys
-            if not isinstance(__locals[key], ModuleType)
-        }
+        for entry_point in found:
+            if entry_point.name in self._parsers:
+                continue
+            try:
+                parser = entry_point.load()
+            except Exception as e:
+                warn(f'Не удалось загрузить парсер {entry_point.value}: {e}', ImportWarning)
+                continue
+            self.register(parser, entry_point.name)
+
+
+"""Глобальный реестр парсеров, им пользуется FileAdapter"""
+parsers = ParsersRegistry()
+
+
+def register_parser(*extensions: str):
+    """
+    Декоратор для регистрации собственного парсера
+    @register_parser('hcl')
+    class HclParser(AbstractFileParser):
+        ...
+    """
+
+    def decorator(parser: t.Type[AbstractFileParser]) -> t.Type[AbstractFileParser]:
+        return parsers.register(parser, *extensions)
+
+    return decorator
+
+
+parsers.register(JsonParser, 'json')
+parsers.register(YamlParser, 'yaml', 'yml')
+# .cfg это тот же .ini
+parsers.register(IniParser, 'ini', 'cfg')
+parsers.register(EnvParser, 'env')
+parsers.register(TomlParser, 'toml')
+parsers.register(PyParser, 'py')
@@ -0,0 +1,110 @@
+import hashlib
+import typing as t
+from collections.abc import Mapping
+
+_MODULUS = 1 << 128
+
+
+def _hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _is_container(value: t.Any) -> bool:
+    # Проверка isinstance(value, Mapping) для строк и чисел заметно медленнее
+    if isinstance(value, (dict, list, tuple)):
+        return True
+    return not isinstance(value, (str, int, float)) and isinstance(value, Mapping)
+
+
+def _encode(value: t.Any) -> bytes:
+    """Значение с типом: 1, True и '1' различаются"""
+    return f'{type(value).__name__}:{value!r}'.encode('utf-8', 'surrogatepass')
+
+
+class Fingerprint:
+    """
+    Хеш содержимого конфига, не зависящий от порядка ключей в словарях.
+    Хеш словаря - сумма хешей пар (ключ, хеш значения), поэтому
+    при пересчете нового снимка по предыдущему (compute(value, previous))
+    пары, значения которых остались теми же объектами, не пересчитываются:
+    снимки разделяют неизмененные ветки, и после set/insert хешируются
+    только измененные ключи и путь до них.
+    Скалярные значения хешируются по repr вместе с типом, ссылки
+    на секреты - как есть, без обращения к хранилищу
+    """
+    __slots__ = ('digest', 'children')
+
+    def __init__(self, digest: bytes, children: t.Optional[t.Dict[t.Any, tuple]] = None):
+        self.digest = digest
+        # ключ (индекс списка) -> (значение, хеш пары, Fingerprint вложенного словаря
+        # или списка, для остальных значений в словаре None, в списке - хеш значения)
+        self.children = children
+
+    @property
+    def hexdigest(self) -> str:
+        return self.digest.hex()
+
+    @classmethod
+    def compute(cls, value: t.Any, previous: t.Optional['Fingerprint'] = None) -> 'Fingerprint':
+        if isinstance(value, Mapping):
+            return cls._compute_mapping(value, previous)
+        if isinstance(value, (list, tuple)):
+            return cls._compute_sequence(value, previous)
+        return cls(cls._digest(value))
+
+    @staticmethod
+    def _digest(value: t.Any) -> bytes:
+        return _hash(b'V' + _encode(value))
+
+    @classmethod
+    def _node(cls, value: t.Any, previous: t.Any) -> t.Union['Fingerprint', bytes]:
+        if _is_container(value):
+            return cls.compute(value, previous if isinstance(previous, Fingerprint) else None)
+        return cls._digest(value)
+
+    @classmethod
+    def _compute_mapping(cls, value: t.Mapping, previous: t.Optional['Fingerprint']) -> 'Fingerprint':
+        old = previous.children if previous is not None and previous.children is not None else {}
+        children = {}
+        total = 0
+        for key, item in value.items():
+            entry = old.get(key)
+            if entry is None or entry[0] is not item:
+                if _is_container(item):
+                    node = cls.compute(item, entry[2] if entry is not None else None)
+                    pair = _hash(_encode(key) + b'\0' + node.digest)
+                else:
+                    # Скалярное значение хешируется вместе с ключом за один вызов
+                    node = None
+                    pair = _hash(_encode(key) + b'\1' + _encode(item))
+                entry = (item, int.from_bytes(pair, 'big'), node)
+            children[key] = entry
+            total += entry[1]
+        return cls(_hash(b'M' + (total % _MODULUS).to_bytes(16, 'big')), children)
+
+    @classmethod
+    def _compute_sequence(cls, value: t.Sequence, previous: t.Optional['Fingerprint']) -> 'Fingerprint':
+        if not any(_is_container(item) for item in value):
+            # Список простых значений хешируется целиком
+            return cls(_hash(b'S' + b'\0'.join(_encode(item) for item in value)))
+
+        old = previous.children if previous is not None and previous.children is not None else {}
+        children = {}
+        digest = hashlib.blake2b(b'L', digest_size=16)
+        for index, item in enumerate(value):
+            entry = old.get(index)
+            if entry is None or entry[0] is not item:
+                entry = (item, 0, cls._node(item, entry[2] if entry is not None else None))
+            children[index] = entry
+            node = entry[2]
+            digest.update(node.digest if isinstance(node, Fingerprint) else node)
+        return cls(digest.digest(), children)
+
+    def child(self, key: t.Any) -> 'Fingerprint':
+        """Хеш вложенного значения, KeyError если его нет"""
+        if self.children is None or key not in self.children:
+            raise KeyError(key)
+        value, _, node = self.children[key]
+        if node is None:
+            return Fingerprint(self._digest(value))
+        return node if isinstance(node, Fingerprint) else Fingerprint(node)
@@ -0,0 +1,204 @@
+import os
+import threading
+import typing as t
+
+from .compressed import split_compression
+from .file_parsers import parsers, get_table
+
+
+class IncludeError(ValueError):
+    """Включаемый файл не найден или файлы включают друг друга по кругу"""
+
+
+class Include:
+    """
+    Ссылка на другой файл конфига.
+    В yaml записывается тегом: db: !include db.yaml
+    в остальных форматах строкой: "db": "!include db.json"
+    После пути можно указать таблицу: !include pyproject.toml#tool.myapp
+    """
+    __slots__ = ('target',)
+
+    prefix = '!include '
+
+    def __init__(self, target: str):
+        self.target = target.strip()
+
+    @classmethod
+    def from_value(cls, value: t.Any) -> t.Optional['Include']:
+        if isinstance(value, Include):
+            return value
+        if isinstance(value, str) and value.startswith(cls.prefix):
+            return cls(value[len(cls.prefix):])
+        return None
+
+    def __repr__(self):
+        return f'Include({self.target!r})'
+
+
+def find_include(value: t.Any) -> t.Optional[Include]:
+    """Первое включение внутри value или None"""
+    include = Include.from_value(value)
+    if include is not None:
+        return include
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, list):
+        return None
+    for item in value:
+        include = find_include(item)
+        if include is not None:
+            return include
+    return None
+
+
+def merge_dicts(base: dict, override: dict) -> dict:
+    """Новый словарь: override поверх base, вложенные словари сливаются рекурсивно"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_dicts(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class IncludeResolver:
+    """
+    Собирает конфиг из фрагментов:
+    - значение !include path заменяется содержимым файла path
+    - extends: path (или список путей) на верхнем уровне файла - файл
+      строится поверх указанных, вложенные словари сливаются.
+      Значение считается путем, только если у всех путей известный формат
+      (base.yaml, shared/db.json.gz, pyproject.toml#tool.app), иначе
+      extends остается обычным ключом: {"extends": "base-class"}
+
+    Пути считаются от директории включающего файла.
+    Разобранные фрагменты кешируются по (mtime, size) файла, поэтому при
+    повторной загрузке конфига не разбираются заново, а в пределах одной
+    загрузки каждый фрагмент собирается один раз.
+    Копируются только ветки, в которых есть подстановки, остальные ветки
+    (и файл без включений целиком) возвращаются как есть, без копирования.
+    graph содержит для каждого собранного файла список включенных им файлов
+    """
+
+    """Форматы, в которых ищутся включения. В ini и env их нет:
+    обход заставил бы разобрать все секции ленивого ini"""
+    formats = frozenset({'yaml', 'yml', 'json', 'toml', 'py'})
+
+    """Ключ верхнего уровня с базовыми файлами, None - не искать базовые файлы"""
+    extends_key: t.Optional[str] = 'extends'
+
+    def __init__(self):
+        # путь -> (st_mtime_ns, st_size, данные)
+        self._cache: t.Dict[str, t.Tuple[int, int, t.Any]] = {}
+        self.graph: t.Dict[str, t.List[str]] = {}
+        self._lock = threading.Lock()
+
+    def compose(self, data: dict, filepath: str) -> dict:
+        """Подставляет включения в data, считанные из filepath"""
+        filepath = os.path.abspath(str(filepath))
+        if self._get_bases(data) is None and find_include(data) is None:
+            with self._lock:
+                self.graph[filepath] = []
+            return data
+        return self._compose(data, filepath, [filepath], {})
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.graph.clear()
+
+    def _compose(self, data: t.Any, filepath: str, stack: t.List[str], memo: dict) -> t.Any:
+        included = []
+        # Кешированные данные не изменяются: измененные ветки копируются
+        result = self._substitute(data, filepath, stack, memo, included)
+
+        bases = self._get_bases(result)
+        if bases is not None:
+            result = {key: value for key, value in result.items() if key != self.extends_key}
+            merged = {}
+            for base in bases:
+                base_data = self._load(base, filepath, stack, memo, included)
+                if not isinstance(base_data, dict):
+                    raise IncludeError(f'{base} из {filepath} не является словарем')
+                merged = merge_dicts(merged, base_data)
+            result = merge_dicts(merged, result)
+
+        with self._lock:
+            self.graph[filepath] = included
+        return result
+
+    def _get_bases(self, data: t.Any) -> t.Optional[t.List[str]]:
+        """Пути базовых файлов из extends или None, если это не пути к конфигам"""
+        if self.extends_key is None or not isinstance(data, dict):
+            return None
+        bases = data.get(self.extends_key)
+        if isinstance(bases, str):
+            bases = [bases]
+        if not isinstance(bases, list) or not bases:
+            return None
+        for base in bases:
+            if not isinstance(base, str) or self._file_type(base.partition('#')[0]) not in parsers:
+                return None
+        return bases
+
+    @staticmethod
+    def _file_type(path: str) -> str:
+        return os.path.splitext(split_compression(path)[0])[1].strip('.')
+
+    def _substitute(self, value: t.Any, filepath: str, stack: t.List[str], memo: dict,
+                    included: t.List[str]) -> t.Any:
+        include = Include.from_value(value)
+        if include is not None:
+            return self._load(include.target, filepath, stack, memo, included)
+        if isinstance(value, dict):
+            items = value.items()
+        elif isinstance(value, list):
+            items = enumerate(value)
+        else:
+            return value
+
+        result = None
+        for key, item in items:
+            substituted = self._substitute(item, filepath, stack, memo, included)
+            if substituted is not item:
+                if result is None:
+                    result = value.copy()
+                result[key] = substituted
+        return value if result is None else result
+
+    def _load(self, target: str, filepath: str, stack: t.List[str], memo: dict,
+              included: t.List[str]) -> t.Any:
+        name, _, table = target.partition('#')
+        path = os.path.abspath(os.path.join(os.path.dirname(filepath), os.path.expanduser(name)))
+        included.append(path)
+        if path in stack:
+            raise IncludeError('Циклическое включение: %s' % ' -> '.join(stack + [path]))
+
+        if path not in memo:
+            memo[path] = self._compose(self._read(path, filepath), path, stack + [path], memo)
+        data = memo[path]
+        return get_table(data, table) if table else data
+
+    def _read(self, path: str, filepath: str) -> t.Any:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise IncludeError(f'Файл {path}, включенный в {filepath}, не найден') from e
+
+        cached = self._cache.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        filetype = self._file_type(path)
+        parser = parsers.get(filetype) if filetype else None
+        if parser is None:
+            raise IncludeError(f'Неизвестный формат включаемого файла {path}')
+        data = parser.read(path)
+        with self._lock:
+            self._cache[path] = (stat.st_mtime_ns, stat.st_size, data)
+        return data
+
+
+include_resolver = IncludeResolver()
@@ -0,0 +1,330 @@
+import os
+import re
+import typing as t
+
+"""Путь до значения внутри конфига: ключи словарей и индексы списков"""
+PathType = t.Tuple[t.Union[str, int], ...]
+
+
+class InterpolationError(ValueError):
+    """Ссылка не найдена или ссылки образуют цикл"""
+
+
+class Reference:
+    """Ссылка ${name} или ${name:-default} внутри шаблона"""
+    __slots__ = ('name', 'default')
+
+    def __init__(self, name: str, default: t.Optional[str]):
+        self.name = name
+        self.default = default
+
+    def __repr__(self):
+        return f'Reference({self.name!r}, {self.default!r})'
+
+
+class Template:
+    """
+    Строка, разобранная на литералы и ссылки.
+    ${db.host} - значение другого ключа конфига (или переменной окружения),
+    ${PORT:-8080} - значение по умолчанию, $$ - сам символ $
+    """
+    __slots__ = ('source', 'parts', 'references')
+
+    _pattern = re.compile(r'\$\$|\$\{([^}:]+)(?::-([^}]*))?\}')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts: t.List[t.Union[str, Reference]] = []
+        position = 0
+        for match in self._pattern.finditer(source):
+            self._add_literal(source[position:match.start()])
+            if match.group(0) == '$$':
+                self._add_literal('$')
+            else:
+                self.parts.append(Reference(match.group(1).strip(), match.group(2)))
+            position = match.end()
+        self._add_literal(source[position:])
+        self.references = [part for part in self.parts if isinstance(part, Reference)]
+
+    def _add_literal(self, literal: str):
+        if not literal:
+            return
+        if self.parts and isinstance(self.parts[-1], str):
+            self.parts[-1] += literal
+        else:
+            self.parts.append(literal)
+
+    def render(self, lookup: t.Callable[[Reference], t.Any]) -> t.Any:
+        """Шаблон из одной ссылки сохраняет тип значения: '${port}' -> 5432"""
+        if len(self.parts) == 1 and isinstance(self.parts[0], Reference):
+            return lookup(self.parts[0])
+        return ''.join(
+            part if isinstance(part, str) else str(lookup(part))
+            for part in self.parts
+        )
+
+    @classmethod
+    def compile(cls, value: str) -> t.Optional['Template']:
+        """Шаблон, None если подстановок в строке нет.
+        Одинаковые строки разбираются один раз"""
+        if '$' not in value:
+            return None
+        template = _templates_cache.get(value)
+        if template is None:
+            template = cls(value)
+            if len(_templates_cache) < _templates_cache_size:
+                _templates_cache[value] = template
+        return template if template.parts != [value] else None
+
+
+_templates_cache: t.Dict[str, Template] = {}
+_templates_cache_size = 10000
+
+
+class Interpolator:
+    """
+    Подставляет значения ссылок во все строки конфига.
+
+    При первой загрузке все шаблоны компилируются, строится граф зависимостей
+    (шаблон -> пути, на которые он ссылается) и шаблоны вычисляются
+    в топологическом порядке, циклы приводят к InterpolationError.
+    Для графа строятся обратные индексы по префиксам путей, поэтому
+    зависимые шаблоны находятся без перебора всех шаблонов конфига.
+    Результаты кешируются, при изменении ключей через update
+    пересчитываются только шаблоны, которые от них зависят,
+    а индексы обновляются только для шаблонов измененных ключей.
+    Не потокобезопасен, ConfigProvider вызывает его под своей блокировкой
+    """
+
+    def __init__(self, environ: t.Optional[t.Mapping[str, str]] = None):
+        self._environ = os.environ if environ is None else environ
+        self._raw: dict = {}
+        self._resolved: dict = {}
+        self._templates: t.Dict[PathType, Template] = {}
+        self._values: t.Dict[PathType, t.Any] = {}
+        # Число шаблонов под каждым префиксом пути, чтобы не копировать ветки без шаблонов
+        self._prefixes: t.Dict[PathType, int] = {}
+        # Индексы ниже построены по путям со строковыми ключами, как пути в ссылках:
+        # шаблоны по пути и по префиксу пути
+        self._at: t.Dict[PathType, t.Set[PathType]] = {}
+        self._under: t.Dict[PathType, t.Set[PathType]] = {}
+        # Зависимости шаблона и обратные индексы: кто ссылается ровно на путь
+        # и кто ссылается на путь внутри префикса
+        self._dependencies: t.Dict[PathType, t.List[PathType]] = {}
+        self._dependents_at: t.Dict[PathType, t.Set[PathType]] = {}
+        self._dependents_under: t.Dict[PathType, t.Set[PathType]] = {}
+        # Имя ссылки -> шаблоны с ней, путь имени с точкой зависит от ключей верхнего уровня
+        self._by_name: t.Dict[str, t.Set[PathType]] = {}
+
+    def resolve(self, raw: dict) -> dict:
+        """Полное вычисление, возвращает словарь с подставленными значениями"""
+        for index in (self._templates, self._values, self._prefixes, self._at, self._under,
+                      self._dependencies, self._dependents_at, self._dependents_under, self._by_name):
+            index.clear()
+        return self.update(raw, set(raw) | set(self._raw))
+
+    def update(self, raw: dict, changed: t.Iterable[str]) -> dict:
+        """
+        Пересчитывает конфиг после изменения ключей верхнего уровня changed
+        :param raw: новый словарь без подстановок
+        """
+        changed = set(changed)
+        self._raw = raw
+
+        for key in changed:
+            for path in [path for path in self._under.get((str(key),), ()) if path[0] == key]:
+                self._remove(path)
+        for key in changed:
+            if key in raw:
+                self._collect((key,), raw[key])
+        # Ключ с точкой меняет путь ссылок ${a.b}: ключ 'a.b' или путь a -> b
+        relinked = set()
+        for key in changed:
+            if isinstance(key, str) and '.' in key:
+                relinked.update(self._by_name.get(key, ()))
+        for path in relinked:
+            self._unlink(path)
+            self._link(path)
+
+        affected = self._affected(changed, relinked)
+        for path in self._order(affected):
+            self._values[path] = self._templates[path].render(self._lookup)
+
+        resolved = {key: value for key, value in self._resolved.items() if key in raw}
+        for key in set(changed) | {path[0] for path in affected}:
+            if key in raw:
+                resolved[key] = self._materialize((key,), raw[key])
+        self._resolved = {key: resolved[key] for key in raw}
+        return self._resolved
+
+    def _collect(self, path: PathType, value: t.Any):
+        if isinstance(value, str):
+            template = Template.compile(value)
+            if template is not None:
+                self._add(path, template)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                self._collect(path + (key,), item)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                self._collect(path + (index,), item)
+
+    def _add(self, path: PathType, template: Template):
+        """Добавляет шаблон и его зависимости в индексы"""
+        self._templates[path] = template
+        key = _str_path(path)
+        _index_add(self._at, key, path)
+        for i in range(1, len(path) + 1):
+            self._prefixes[path[:i]] = self._prefixes.get(path[:i], 0) + 1
+            _index_add(self._under, key[:i], path)
+        for reference in template.references:
+            _index_add(self._by_name, reference.name, path)
+        self._link(path)
+
+    def _remove(self, path: PathType):
+        """Убирает шаблон из всех индексов"""
+        self._unlink(path)
+        for reference in self._templates.pop(path).references:
+            _index_discard(self._by_name, reference.name, path)
+        self._values.pop(path, None)
+        key = _str_path(path)
+        _index_discard(self._at, key, path)
+        for i in range(1, len(path) + 1):
+            count = self._prefixes[path[:i]] - 1
+            if count:
+                self._prefixes[path[:i]] = count
+            else:
+                del self._prefixes[path[:i]]
+            _index_discard(self._under, key[:i], path)
+
+    def _link(self, path: PathType):
+        """Зависимости шаблона и обратные ссылки на него"""
+        dependencies = [self._reference_path(ref.name) for ref in self._templates[path].references]
+        self._dependencies[path] = dependencies
+        for dependency in dependencies:
+            _index_add(self._dependents_at, dependency, path)
+            for i in range(1, len(dependency) + 1):
+                _index_add(self._dependents_under, dependency[:i], path)
+
+    def _unlink(self, path: PathType):
+        for dependency in self._dependencies.pop(path, ()):
+            _index_discard(self._dependents_at, dependency, path)
+            for i in range(1, len(dependency) + 1):
+                _index_discard(self._dependents_under, dependency[:i], path)
+
+    def _reference_path(self, name: str) -> PathType:
+        """Как и config.get: сначала ключ целиком, затем путь через точку"""
+        if name in self._raw:
+            return name,
+        return tuple(name.split('.'))
+
+    def _dependents(self, target: PathType) -> t.Set[PathType]:
+        """Шаблоны, ссылающиеся на значение внутри или над путем target.
+        В ссылках индексы списков записаны строками: ${hosts.0}"""
+        key = _str_path(target)
+        dependents = set(self._dependents_under.get(key, ()))
+        for i in range(1, len(key)):
+            dependents.update(self._dependents_at.get(key[:i], ()))
+        return dependents
+
+    def _affected(self, changed: t.Set[str], relinked: t.Set[PathType]) -> t.Set[PathType]:
+        """Шаблоны, которые нужно пересчитать: новые, сменившие путь ссылки
+        и все, кто зависит от измененных"""
+        affected = set(relinked)
+        for key in changed:
+            affected.update(path for path in self._under.get((str(key),), ()) if path[0] == key)
+            affected.update(self._dependents_under.get((key,), ()))
+
+        queue = list(affected)
+        while queue:
+            for path in self._dependents(queue.pop()):
+                if path not in affected:
+                    affected.add(path)
+                    queue.append(path)
+        return affected
+
+    def _order(self, paths: t.Set[PathType]) -> t.List[PathType]:
+        """Топологическая сортировка, бросает InterpolationError при цикле"""
+        order = []
+        # 1 - в обработке, 2 - готов
+        state: t.Dict[PathType, int] = {}
+
+        def visit(path: PathType, stack: t.List[PathType]):
+            if state.get(path) == 2:
+                return
+            if state.get(path) == 1:
+                cycle = stack[stack.index(path):] + [path]
+                raise InterpolationError('Циклическая ссылка: %s' % ' -> '.join(
+                    '.'.join(map(str, item)) for item in cycle
+                ))
+            state[path] = 1
+            stack.append(path)
+            for dependency in self._dependencies.get(path, ()):
+                for target in self._templates_at(dependency):
+                    if target in paths or target not in self._values:
+                        visit(target, stack)
+            stack.pop()
+            state[path] = 2
+            order.append(path)
+
+        for path in sorted(paths, key=_str_path):
+            visit(path, [])
+        return order
+
+    def _templates_at(self, dependency: PathType) -> t.List[PathType]:
+        """Шаблоны внутри или над значением по пути dependency"""
+        templates = list(self._under.get(dependency, ()))
+        for i in range(1, len(dependency)):
+            templates += self._at.get(dependency[:i], ())
+        return templates
+
+    def _lookup(self, reference: Reference) -> t.Any:
+        path = []
+        value = self._raw
+        for key in self._reference_path(reference.name):
+            if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+                key = int(key)
+            elif not isinstance(value, dict) or key not in value:
+                break
+            path.append(key)
+            value = value[key]
+        else:
+            return self._materialize(tuple(path), value)
+
+        if reference.name in self._environ:
+            return self._environ[reference.name]
+        if reference.default is not None:
+            return reference.default
+        raise InterpolationError(f'Не найдено значение для ${{{reference.name}}}')
+
+    def _materialize(self, path: PathType, value: t.Any) -> t.Any:
+        """Значение с подставленными шаблонами, ветки без шаблонов не копируются"""
+        if path in self._templates:
+            return self._values[path]
+        if path not in self._prefixes:
+            return value
+        if isinstance(value, dict):
+            return {key: self._materialize(path + (key,), item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._materialize(path + (index,), item) for index, item in enumerate(value)]
+        return value
+
+
+def _str_path(path: PathType) -> PathType:
+    return tuple(map(str, path))
+
+
+def _index_add(index: dict, key, path: PathType):
+    paths = index.get(key)
+    if paths is None:
+        index[key] = {path}
+    else:
+        paths.add(path)
+
+
+def _index_discard(index: dict, key, path: PathType):
+    paths = index.get(key)
+    if paths is not None:
+        paths.discard(path)
+        if not paths:
+            del index[key]
@@ -0,0 +1,148 @@
+import functools
+import threading
+import typing as t
+from collections import OrderedDict, namedtuple
+from contextvars import ContextVar
+
+from .diff import ConfigDiff
+from .normalization import normalize_key
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'invalidations', 'maxsize', 'currsize'])
+
+"""(провайдер, множество прочитанных путей) выполняющейся сейчас запоминаемой функции"""
+tracked_reads: ContextVar[t.Optional[t.Tuple[t.Any, t.Set[str]]]] = ContextVar('bestconfig_tracked_reads',
+                                                                                 default=None)
+
+_missing = object()
+
+
+def track_read(provider, item: str):
+    """Вызывается провайдером при чтении ключа, '' - чтение всего конфига"""
+    reads = tracked_reads.get()
+    if reads is not None and reads[0] is provider:
+        reads[1].add(item)
+
+
+class Memoized:
+    """
+    Функция, результаты которой кешируются до изменения прочитанных ею ключей.
+    Во время выполнения запоминается, какие ключи функция прочитала из провайдера
+    (через get, config.key, config['key'], in), и при изменении любого из них
+    (set, insert, update и прочие) кешированные результаты сбрасываются.
+    Обращение config.db.host зависит от всей ветки db, config.get('db.host') - только от db.host.
+    Зависимости вложенных запоминаемых функций добавляются к вызвавшей.
+    Результаты, посчитанные внутри override, не кешируются
+    """
+
+    def __init__(self, provider, function: t.Callable, maxsize: t.Optional[int] = 128):
+        functools.update_wrapper(self, function)
+        self._provider = provider
+        self._function = function
+        self.maxsize = maxsize
+        # ключ аргументов -> (результат, прочитанные пути), в порядке использования
+        self._cache: 'OrderedDict[t.Hashable, t.Tuple[t.Any, t.FrozenSet[str]]]' = OrderedDict()
+        # путь -> ключи аргументов, результаты которых от него зависят
+        self._dependents: t.Dict[str, t.Set[t.Hashable]] = {}
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.invalidations = 0
+        provider.subscribe('', self._invalidate)
+
+    def __call__(self, *args, **kwargs):
+        provider = self._provider
+        if provider._override_count and provider._override_var.get():
+            return self._function(*args, **kwargs)
+
+        key = self._make_key(args, kwargs)
+        outer = tracked_reads.get()
+        with self._lock:
+            entry = self._cache.get(key, _missing)
+            if entry is not _missing:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if entry is not _missing:
+            if outer is not None and outer[0] is provider:
+                outer[1].update(entry[1])
+            return entry[0]
+
+        reads: t.Set[str] = set()
+        snapshot = provider._snapshot
+        token = tracked_reads.set((provider, reads))
+        with provider._lock:
+            provider._tracking_count += 1
+        try:
+            result = self._function(*args, **kwargs)
+        finally:
+            tracked_reads.reset(token)
+            with provider._lock:
+                provider._tracking_count -= 1
+
+        if outer is not None and outer[0] is provider:
+            outer[1].update(reads)
+        with self._lock:
+            self.misses += 1
+            # Конфиг изменился во время вычисления, результат мог застать старые значения
+            if provider._snapshot is snapshot:
+                self._store(key, result, frozenset(reads))
+        return result
+
+    @staticmethod
+    def _make_key(args: tuple, kwargs: dict) -> t.Hashable:
+        if not kwargs:
+            return args
+        return args, tuple(sorted(kwargs.items()))
+
+    def _store(self, key: t.Hashable, result: t.Any, reads: t.FrozenSet[str]):
+        if key in self._cache:
+            self._forget(key)
+        self._cache[key] = (result, reads)
+        for path in reads:
+            self._dependents.setdefault(path, set()).add(key)
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._forget(next(iter(self._cache)))
+
+    def _forget(self, key: t.Hashable):
+        _, reads = self._cache.pop(key)
+        for path in reads:
+            dependents = self._dependents.get(path)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[path]
+
+    def _invalidate(self, diff: ConfigDiff):
+        """Подписка на изменения провайдера: сбрасывает результаты, зависящие от измененных путей"""
+        with self._lock:
+            if not self._cache:
+                return
+            stale = set()
+            paths = diff.paths()
+            if self._provider._normalize_keys:
+                # Отсутствовавшие ключи запомнены в нормализованном виде
+                paths += [normalize_key(path) for path in paths]
+            for path in paths:
+                # Зависимости от самого пути и от его родителей, вплоть до всего конфига ('')
+                prefix = path
+                while True:
+                    stale.update(self._dependents.get(prefix, ()))
+                    if not prefix:
+                        break
+                    prefix = prefix.rpartition('.')[0]
+                # Зависимости внутри пути, например словарь db заменен строкой
+                nested = path + '.'
+                for dependency, keys in self._dependents.items():
+                    if dependency.startswith(nested):
+                        stale.update(keys)
+            for key in stale:
+                if key in self._cache:
+                    self._forget(key)
+                    self.invalidations += 1
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.invalidations, self.maxsize, len(self._cache))
+
+    def cache_clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._dependents.clear()
+            self.hits = self.misses = self.invalidations = 0
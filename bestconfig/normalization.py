@@ -0,0 +1,132 @@
+import re
+import typing as t
+from collections.abc import Mapping
+from functools import lru_cache
+from warnings import warn
+
+from .file_parsers import LazyIniSection
+
+"""Путь до значения: ключи словарей от верхнего уровня"""
+KeyPath = t.Tuple[str, ...]
+
+_camel_boundary = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_nesting = re.compile(r'\.|__')
+
+
+@lru_cache(maxsize=4096)
+def normalize_key(key: str) -> str:
+    """
+    Нормализованный путь ключа:
+    DB_HOST, db-host, dbHost -> db_host
+    DB__HOST (вложенность в переменных окружения), db.host -> db.host
+    """
+    parts = [part for part in _nesting.split(key) if part]
+    return '.'.join(
+        _camel_boundary.sub('_', part).replace('-', '_').casefold()
+        for part in parts
+    )
+
+
+class KeyIndex:
+    """
+    Нормализованный путь -> настоящие ключи, по которым лежит значение.
+    Строится один раз после слияния источников, поиск - одна проверка в словаре.
+    Если разные ключи совпадают после нормализации, используется последний из них,
+    а все совпадения записываются в collisions.
+    Неразобранные секции ленивого ini не загружаются при построении,
+    индекс секции строится при первом поиске внутри нее
+    """
+
+    def __init__(self, data: t.Mapping):
+        self.paths: t.Dict[str, KeyPath] = {}
+        self.collisions: t.Dict[str, t.List[KeyPath]] = {}
+        # нормализованный путь секции -> (ее ключи, индекс или None до первого поиска)
+        self._sections: t.Dict[str, list] = {}
+        self._add(data, '', ())
+
+    def _add(self, data: t.Mapping, prefix: str, keys: KeyPath):
+        for key, value in data.items():
+            if not isinstance(key, str):
+                continue
+            path = prefix + normalize_key(key)
+            path_keys = keys + (key,)
+            previous = self.paths.get(path)
+            if previous is not None:
+                self.collisions.setdefault(path, [previous]).append(path_keys)
+            self.paths[path] = path_keys
+            if isinstance(value, LazyIniSection) and not value._loaded:
+                self._sections[path] = [path_keys, None]
+            elif isinstance(value, Mapping):
+                self._add(value, path + '.', path_keys)
+
+    def resolve(self, item: str, data: t.Mapping) -> t.Optional[KeyPath]:
+        """Ключи для item в data, по которым строился индекс, или None"""
+        path = normalize_key(item)
+        keys = self.paths.get(path)
+        if keys is not None or not self._sections:
+            return keys
+
+        prefix = path
+        while '.' in prefix:
+            prefix = prefix.rsplit('.', 1)[0]
+            section = self._sections.get(prefix)
+            if section is not None:
+                section_keys, index = section
+                value = data
+                for key in section_keys:
+                    value = value[key]
+                if index is None:
+                    index = section[1] = KeyIndex(value)
+                keys = index.resolve(path[len(prefix) + 1:], value)
+                return None if keys is None else section_keys + keys
+        return None
+
+    def subindex(self, keys: KeyPath, data: t.Mapping) -> t.Optional['PrefixedKeyIndex']:
+        """
+        Индекс для вложенного словаря по ключам keys без построения нового,
+        None, если путь до него неоднозначен после нормализации
+        """
+        if not keys:
+            return PrefixedKeyIndex(self, data, '', ())
+        if not all(isinstance(key, str) for key in keys):
+            return None
+        prefix = '.'.join(normalize_key(key) for key in keys)
+        if self.paths.get(prefix) != keys:
+            return None
+        return PrefixedKeyIndex(self, data, prefix + '.', keys)
+
+    def report(self):
+        """Предупреждение о ключах, совпавших после нормализации"""
+        if not self.collisions:
+            return
+        described = '; '.join(
+            '%s: %s' % (path, ', '.join('.'.join(keys) for keys in variants))
+            for path, variants in self.collisions.items()
+        )
+        warn(f'Ключи совпадают после нормализации, используется последний: {described}', UserWarning)
+
+
+class PrefixedKeyIndex:
+    """
+    Индекс вложенного конфига (config.section): поиск идет в индексе
+    всего конфига с нормализованным путем секции в начале,
+    то есть это та же одна проверка в словаре
+    """
+    __slots__ = ('index', 'data', 'prefix', 'keys')
+
+    def __init__(self, index: KeyIndex, data: t.Mapping, prefix: str, keys: KeyPath):
+        self.index = index
+        # Данные, по которым строился index, нужны для ленивых секций ini
+        self.data = data
+        self.prefix = prefix
+        self.keys = keys
+
+    def resolve(self, item: str, data: t.Mapping) -> t.Optional[KeyPath]:
+        """Ключи для item внутри секции, data - сама секция"""
+        keys = self.index.resolve(self.prefix + item, self.data)
+        if keys is None or keys[:len(self.keys)] != self.keys:
+            return None
+        return keys[len(self.keys):]
+
+    def subindex(self, keys: KeyPath, data: t.Mapping) -> t.Optional['PrefixedKeyIndex']:
+        return self.index.subindex(self.keys + keys, self.data)
@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+import time
+import typing as t
+from pathlib import Path
+from warnings import warn
+
+"""Расширения, по которым определяется формат ответа, если в url его нет"""
+CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/yaml': 'yaml',
+    'application/x-yaml': 'yaml',
+    'text/yaml': 'yaml',
+    'text/x-yaml': 'yaml',
+    'application/toml': 'toml',
+    'text/x-toml': 'toml',
+    'text/plain': 'env',
+}
+
+
+def default_cache_dir() -> Path:
+    """BESTCONFIG_CACHE_DIR или $XDG_CACHE_HOME/bestconfig"""
+    if os.environ.get('BESTCONFIG_CACHE_DIR'):
+        return Path(os.environ['BESTCONFIG_CACHE_DIR'])
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(cache_home) / 'bestconfig'
+
+
+class ConnectionPool:
+    """
+    Хранит открытые keep-alive соединения по (scheme, host, port),
+    чтобы повторные запросы к одному серверу не открывали новое соединение
+    """
+
+    def __init__(self, max_idle: int = 4):
+        self._max_idle = max_idle
+        self._idle: t.Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme: str, host: str, port: t.Optional[int], timeout: float):
+        """Возвращает (соединение, было ли оно переиспользовано)"""
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                connection = idle.pop()
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+
+        import http.client
+
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=timeout), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def release(self, scheme: str, host: str, port: t.Optional[int], connection):
+        """Возвращает соединение в пул, лишние закрываются"""
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class HttpFetcher:
+    """
+    Загружает конфиги по http(s) и хранит ответы в кеше на диске.
+
+    1. Пока ответ свежий (Cache-Control: max-age), сервер не запрашивается
+    2. Устаревший ответ перепроверяется условным запросом (If-None-Match/If-Modified-Since),
+       при 304 используется сохраненное тело
+    3. В течение stale_while_revalidate секунд после устаревания сохраненный ответ
+       отдается сразу, а перепроверка идет в фоне
+    4. Если сервер недоступен и есть сохраненный ответ, используется он (с предупреждением)
+    """
+
+    def __init__(self, cache_dir: t.Union[str, Path, None] = None, timeout: float = 5.0,
+                 stale_while_revalidate: float = 0, stale_if_error: bool = True,
+                 pool: t.Optional[ConnectionPool] = None):
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+        self._timeout = timeout
+        self._stale_while_revalidate = stale_while_revalidate
+        self._stale_if_error = stale_if_error
+        self._pool = pool or ConnectionPool()
+        self._revalidating = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir or default_cache_dir()
+
+    def fetch(self, url: str) -> t.Tuple[Path, t.Optional[str]]:
+        """
+        Возвращает путь к файлу с телом ответа и формат (расширение) конфига
+        Бросает ConnectionError, если сервер недоступен и в кеше ничего нет
+        """
+        body_path, meta_path = self._cache_paths(url)
+        meta = self._read_meta(meta_path) if body_path.exists() else None
+
+        if meta is not None:
+            age = time.time() - meta['fetched_at']
+            if age < meta.get('max_age', 0):
+                return body_path, meta.get('filetype')
+            if age < meta.get('max_age', 0) + self._stale_while_revalidate:
+                self._revalidate_in_background(url, meta)
+                return body_path, meta.get('filetype')
+
+        try:
+            meta = self._download(url, meta)
+        except (OSError, ConnectionError) as e:
+            if meta is None or not self._stale_if_error:
+                raise ConnectionError(f'Не удалось загрузить {url}: {e}') from e
+            warn(f'Не удалось загрузить {url}, используется сохраненная версия: {e}', UserWarning)
+        return body_path, meta.get('filetype')
+
+    def _download(self, url: str, meta: t.Optional[dict]) -> dict:
+        """Выполняет (условный) запрос и обновляет кеш, возвращает новые метаданные"""
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(url)
+        headers = {'Accept': '*/*'}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        status, response_headers, body = self._request(parts.scheme, parts.hostname, parts.port, path, headers)
+
+        body_path, meta_path = self._cache_paths(url)
+        if status == 304 and meta is not None:
+            new_meta = dict(meta)
+        elif status == 200:
+            new_meta = {
+                'url': url,
+                'etag': response_headers.get('etag'),
+                'last_modified': response_headers.get('last-modified'),
+                'filetype': self._get_file_type(parts.path, response_headers.get('content-type')),
+            }
+            self._atomic_write(body_path, body)
+        else:
+            raise ConnectionError(f'HTTP {status}')
+
+        new_meta['fetched_at'] = time.time()
+        new_meta['max_age'] = self._max_age(response_headers.get('cache-control'))
+        self._atomic_write(meta_path, json.dumps(new_meta).encode())
+        return new_meta
+
+    def _request(self, scheme: str, host: str, port: t.Optional[int], path: str, headers: dict):
+        """GET через соединение из пула, одна повторная попытка,
+        если сервер закрыл переиспользованное соединение"""
+        import http.client
+
+        for attempt in range(2):
+            connection, reused = self._pool.acquire(scheme, host, port, self._timeout)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except http.client.HTTPException as e:
+                connection.close()
+                raise ConnectionError(str(e)) from e
+            except Exception:
+                connection.close()
+                raise
+
+            response_headers = {key.lower(): value for key, value in response.getheaders()}
+            if response.will_close:
+                connection.close()
+            else:
+                self._pool.release(scheme, host, port, connection)
+            return response.status, response_headers, body
+
+    def _revalidate_in_background(self, url: str, meta: dict):
+        with self._lock:
+            if url in self._revalidating:
+                return
+            self._revalidating.add(url)
+
+        def revalidate():
+            try:
+                self._download(url, meta)
+            except (OSError, ConnectionError):
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(url)
+
+        threading.Thread(target=revalidate, daemon=True).start()
+
+    def _cache_paths(self, url: str) -> t.Tuple[Path, Path]:
+        import hashlib
+
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f'{name}.body', self.cache_dir / f'{name}.json'
+
+    @staticmethod
+    def _read_meta(meta_path: Path) -> t.Optional[dict]:
+        try:
+            with open(meta_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes):
+        """Читатели из других процессов никогда не видят наполовину записанный файл"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _max_age(cache_control: t.Optional[str]) -> float:
+        for directive in (cache_control or '').split(','):
+            name, _, value = directive.strip().partition('=')
+            if name.lower() == 'no-cache':
+                return 0
+            if name.lower() == 'max-age':
+                try:
+                    return float(value)
+                except ValueError:
+                    return 0
+        return 0
+
+    @staticmethod
+    def _get_file_type(path: str, content_type: t.Optional[str]) -> t.Optional[str]:
+        _, ext = os.path.splitext(path)
+        if ext:
+            return ext.strip('.')
+        content_type = (content_type or '').split(';')[0].strip().lower()
+        return CONTENT_TYPES.get(content_type)
+
+
+"""Используется UrlAdapter по умолчанию"""
+default_fetcher = HttpFetcher()
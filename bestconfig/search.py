@@ -0,0 +1,86 @@
+import os
+import typing as t
+from pathlib import Path
+
+
+class SearchStrategy:
+    """
+    Описывает, в каких директориях FilesScanner ищет файлы конфигурации.
+
+    По умолчанию поиск идет от файла, вызвавшего Config(), вверх
+    не более depth_limit директорий и не выше os.getcwd().
+
+    :param depth_limit: сколько директорий проверять, начиная с директории вызова
+    :param root_markers: подниматься только до директории, в которой есть
+    один из этих файлов (например .git или pyproject.toml), включительно.
+    True - использовать default_root_markers
+    :param stop_at_cwd: не подниматься выше os.getcwd()
+    :param search_paths: дополнительные директории, например /etc/myapp.
+    Файлы из них имеют меньший приоритет, чем файлы проекта,
+    а между собой, как и цели в Config(), более поздние перезаписывают более ранние
+
+    Имена файлов в Config() могут быть glob шаблонами: Config('config.*.yaml'),
+    найденные по шаблону файлы одной директории применяются в алфавитном порядке
+    """
+
+    default_root_markers = ('.git', '.hg', 'pyproject.toml', 'setup.py', 'setup.cfg')
+
+    def __init__(self, depth_limit: int = 4, root_markers: t.Union[t.Iterable[str], bool, None] = None,
+                 stop_at_cwd: bool = True, search_paths: t.Iterable[t.Union[str, Path]] = ()):
+        if root_markers is True:
+            root_markers = self.default_root_markers
+        self.depth_limit = depth_limit
+        self.root_markers = tuple(root_markers or ())
+        self.stop_at_cwd = stop_at_cwd
+        self.search_paths = tuple(
+            Path(os.path.abspath(os.path.expanduser(str(path)))) for path in search_paths
+        )
+
+    @classmethod
+    def for_app(cls, app_name: str, **kwargs) -> 'SearchStrategy':
+        """
+        Стратегия с системными директориями приложения в порядке возрастания приоритета:
+        /etc/<app_name>, $XDG_CONFIG_DIRS/<app_name>, $XDG_CONFIG_HOME/<app_name>
+        """
+        config_dirs = os.environ.get('XDG_CONFIG_DIRS') or '/etc/xdg'
+        config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+        search_paths = [os.path.join('/etc', app_name)]
+        # В XDG_CONFIG_DIRS первая директория самая важная
+        search_paths += [os.path.join(path, app_name) for path in reversed(config_dirs.split(os.pathsep)) if path]
+        search_paths.append(os.path.join(config_home, app_name))
+        kwargs.setdefault('search_paths', search_paths)
+        return cls(**kwargs)
+
+    def key(self) -> tuple:
+        """Ключ для кеша результатов поиска"""
+        return self.depth_limit, self.root_markers, self.stop_at_cwd, self.search_paths
+
+    def project_dirs(self, caller_dir: Path, cwd: Path,
+                     listing: t.Callable[[Path], t.Optional[dict]]) -> t.List[Path]:
+        """
+        Директории проекта от директории вызова вверх
+        :param listing: возвращает содержимое директории {имя: является ли файлом}
+        """
+        dirs = []
+        curr_dirname = caller_dir
+        for i in range(self.depth_limit):
+            dirs.append(curr_dirname)
+            if self.stop_at_cwd and curr_dirname == cwd:
+                break
+            if self.root_markers:
+                entries = listing(curr_dirname) or {}
+                if any(marker in entries for marker in self.root_markers):
+                    break
+            if curr_dirname.parent == curr_dirname:
+                break
+            curr_dirname = curr_dirname.parent
+        return dirs
+
+    def __eq__(self, other):
+        return isinstance(other, SearchStrategy) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return 'SearchStrategy(depth_limit=%r, root_markers=%r, stop_at_cwd=%r, search_paths=%r)' % self.key()
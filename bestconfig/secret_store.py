@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+import typing as t
+from abc import ABCMeta, abstractmethod
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from warnings import warn
+
+
+class SecretError(LookupError):
+    """Секрет не удалось получить"""
+
+
+class AbstractSecretResolver(metaclass=ABCMeta):
+    """
+    Получает значение секрета по ссылке вида <scheme>://<path>,
+    в resolve передается только path
+    """
+
+    @abstractmethod
+    def resolve(self, path: str) -> str:
+        pass
+
+
+class FileSecretResolver(AbstractSecretResolver):
+    """
+    Секреты из файлов, например примонтированный Kubernetes secret:
+    secret://db/password -> <base_dir>/db/password
+    По умолчанию base_dir берется из BESTCONFIG_SECRETS_DIR или /run/secrets
+    """
+
+    def __init__(self, base_dir: t.Union[str, Path, None] = None):
+        self._base_dir = base_dir
+
+    @property
+    def base_dir(self) -> Path:
+        if self._base_dir is not None:
+            return Path(self._base_dir)
+        return Path(os.environ.get('BESTCONFIG_SECRETS_DIR') or '/run/secrets')
+
+    def resolve(self, path: str) -> str:
+        base_dir = self.base_dir.resolve()
+        filepath = (base_dir / path).resolve()
+        if base_dir not in filepath.parents:
+            raise SecretError(f'Секрет {path} вне директории {base_dir}')
+        try:
+            with open(filepath, 'r', encoding='utf-8') as file:
+                # Файлы секретов часто заканчиваются переводом строки
+                return file.read().rstrip('\r\n')
+        except OSError as e:
+            raise SecretError(f'Секрет {path} не найден в {base_dir}') from e
+
+
+class SecretStore:
+    """
+    Разрешает ссылки на секреты (secret://db/password) с помощью
+    зарегистрированных для схем резолверов.
+
+    prefetch получает пачку ссылок параллельно, результаты хранятся
+    в памяти ttl секунд. Устаревшее значение отдается сразу,
+    а новое запрашивается в фоне. Если фоновое обновление не удалось,
+    остается старое значение и выдается предупреждение
+    """
+
+    def __init__(self, ttl: float = 300, max_workers: int = 8,
+                 resolvers: t.Optional[t.Dict[str, AbstractSecretResolver]] = None):
+        self.ttl = ttl
+        self._max_workers = max_workers
+        self._resolvers: t.Dict[str, AbstractSecretResolver] = {'secret': FileSecretResolver()}
+        self._resolvers.update(resolvers or {})
+        # ссылка -> (значение, время устаревания)
+        self._cache: t.Dict[str, t.Tuple[str, float]] = {}
+        self._refreshing: t.Set[str] = set()
+        self._executor: t.Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        # В другой процесс передаются только настройки, кеш и потоки создаются заново
+        if self is default_secret_store:
+            return 'default_secret_store'
+        return self.__class__, (self.ttl, self._max_workers, self._resolvers)
+
+    def register(self, scheme: str, resolver: AbstractSecretResolver):
+        self._resolvers[scheme] = resolver
+
+    def is_reference(self, value: t.Any) -> bool:
+        if not isinstance(value, str) or '://' not in value:
+            return False
+        return value.partition('://')[0] in self._resolvers
+
+    def collect(self, data: t.Any) -> t.List[str]:
+        """Все ссылки на секреты во вложенных словарях и списках"""
+        if isinstance(data, Mapping):
+            data = data.values()
+        elif not isinstance(data, (list, tuple)):
+            return [data] if self.is_reference(data) else []
+        references = []
+        for item in data:
+            references += self.collect(item)
+        return references
+
+    def prefetch(self, references: t.Iterable[str]):
+        """Параллельно получает все еще не закешированные секреты,
+        бросает SecretError, если какой-то из них недоступен"""
+        now = self.clock()
+        missing = [
+            reference for reference in dict.fromkeys(references)
+            if reference not in self._cache or self._cache[reference][1] <= now
+        ]
+        if not missing:
+            return
+        if len(missing) == 1:
+            self._store(missing[0], self._resolve(missing[0]))
+            return
+        for reference, value in zip(missing, self._get_executor().map(self._resolve, missing)):
+            self._store(reference, value)
+
+    def get(self, reference: str) -> str:
+        cached = self._cache.get(reference)
+        if cached is None:
+            value = self._resolve(reference)
+            self._store(reference, value)
+            return value
+
+        value, expires_at = cached
+        if expires_at <= self.clock():
+            self._refresh_in_background(reference)
+        return value
+
+    def reveal(self, data: t.Any) -> t.Any:
+        """Копия данных, в которой ссылки заменены значениями секретов"""
+        if isinstance(data, Mapping):
+            return {key: self.reveal(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.reveal(value) for value in data]
+        if self.is_reference(data):
+            return self.get(data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    """Часы для ttl, подменяются в тестах"""
+    clock = staticmethod(time.monotonic)
+
+    def _resolve(self, reference: str) -> str:
+        scheme, _, path = reference.partition('://')
+        return self._resolvers[scheme].resolve(path)
+
+    def _store(self, reference: str, value: str):
+        with self._lock:
+            self._cache[reference] = (value, self.clock() + self.ttl)
+
+    def _refresh_in_background(self, reference: str):
+        with self._lock:
+            if reference in self._refreshing:
+                return
+            self._refreshing.add(reference)
+        self._get_executor().submit(self._refresh, reference)
+
+    def _refresh(self, reference: str):
+        try:
+            self._store(reference, self._resolve(reference))
+        except Exception as e:
+            warn(f'Не удалось обновить секрет {reference}, используется старое значение: {e}', UserWarning)
+        finally:
+            with self._lock:
+                self._refreshing.discard(reference)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix='bestconfig-secrets')
+            return self._executor
+
+
+"""Используется при Config(secrets=True)"""
+default_secret_store = SecretStore()
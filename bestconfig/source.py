@@ -8,6 +8,7 @@ class SourceType(Enum):
     ENV = auto()
     DICT = auto()
     FILE = auto()
+    URL = auto()
 
 
 """
@@ -15,6 +16,7 @@ class SourceType(Enum):
 словаря конфигурации, это может быть 
 1. Название файла (полный пусть, часть пути, относительный путь)
 2. Непосредственно словарь
+3. Адрес http(s)://..., по которому отдается файл конфига
 """
 TargetType = t.Union[str, dict, Path]
 
@@ -26,7 +28,10 @@ class Source:
     Соглашение о данных
     filename: str. Путь до файла, относительный или абсолютный
     filepath: Path. Абсолютный путь до файла
+    table: str. Необязательно, путь через точку к таблице внутри файла,
+    задается как 'pyproject.toml#tool.myapp'
     data: dict. Словарь конфигов
+    url: str. Адрес удаленного конфига
     """
     env = '__ENV__'
 
@@ -45,5 +50,8 @@ class Source:
     def get(self, item: str):
         return self._data[item]
 
+    def has(self, item: str) -> bool:
+        return item in self._data
+
     def __repr__(self):
         return f'Source({self.source_type})'
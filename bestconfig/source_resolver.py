@@ -1,10 +1,16 @@
+import fnmatch
+import glob
 import os
-import traceback
+import sys
+import threading
+import time
 import typing as t
 from pathlib import Path
 
-from .adapters import EnvAdapter, FileAdapter, DictAdapter
+from .adapters import EnvAdapter, FileAdapter, DictAdapter, UrlAdapter
 
+from .normalization import KeyIndex
+from .search import SearchStrategy
 from .source import Source, TargetType, SourceType
 
 
@@ -17,21 +23,32 @@ class SourceResolver:
     И превращает их в готовые словари
     """
 
-    def __init__(self, caller_path: str):
+    def __init__(self, caller_path: str, strategy: t.Optional[SearchStrategy] = None):
         self._caller_path = caller_path
+        # Один сканер на все цели, чтобы каждая директория проверялась один раз
+        self._scanner = FilesScanner(caller_path=caller_path, strategy=strategy)
+
+    @property
+    def scanner(self) -> 'FilesScanner':
+        return self._scanner
+
+    def sources(self, target: TargetType) -> t.List[Source]:
+        """Источники, в которые превращается цель, например найденные файлы"""
+        return SourceFilter.transform(target, scanner=self._scanner)
 
     def resolve(self, target: TargetType) -> dict:
-        sources = SourceFilter.transform(target, caller_path=self._caller_path)
+        sources = self.sources(target)
         aggregator = ConfigAggregator(sources)
         config_dict = aggregator.to_dict()
         return config_dict
 
     def resolve_all(self, targets: t.List[TargetType]) -> dict:
-        data = {}
-        for target in targets:
-            data.update(self.resolve(target))
+        return self.aggregate(targets).to_dict()
 
-        return data
+    def aggregate(self, targets: t.List[TargetType], normalize_keys: bool = False) -> 'ConfigAggregator':
+        """Слияние источников всех целей, см. ConfigAggregator"""
+        sources = [source for target in targets for source in self.sources(target)]
+        return ConfigAggregator(sources, normalize_keys=normalize_keys)
 
 
 class SourceFilter:
@@ -47,19 +64,31 @@ class SourceFilter:
         elif isinstance(target, dict):
             source = Source(SourceType.DICT)
             source.set('data', target)
-        elif isinstance(target, str):
-            source = Source(SourceType.FILE)
-            source.set('filename', target)
+        elif isinstance(target, str) and target.startswith(('http://', 'https://')):
+            source = Source(SourceType.URL)
+            url, _, table = target.partition('#')
+            source.set('url', url)
+            if table:
+                source.set('table', table)
         elif isinstance(target, Path):
             source = Source(SourceType.FILE)
             source.set('filename', str(target))
+        elif isinstance(target, str):
+            source = Source(SourceType.FILE)
+            # 'pyproject.toml#tool.myapp' -> файл и таблица внутри него,
+            # если файла с таким полным именем нет, см. transform
+            filename, _, table = target.partition('#')
+            source.set('filename', filename)
+            if table:
+                source.set('table', table)
+                source.set('fullname', target)
         else:
             raise ValueError('Unknown source type %s' % type(target))
 
         return source
 
     @classmethod
-    def transform(cls, target: TargetType, caller_path: str) -> t.List[Source]:
+    def transform(cls, target: TargetType, scanner: 'FilesScanner') -> t.List[Source]:
         """Основной метод класса
         Преобразует TargetType -> Source
         То есть названия, алиасы и прочее превращаются в структурированные
@@ -67,14 +96,22 @@ class SourceFilter:
         файлов
         """
         clear_sources = []
-        scanner = FilesScanner(caller_path=caller_path)
         source = cls._source_from_target(target)
 
         if SourceType.FILE == source.source_type:
-            found_files = scanner.find_all_files(source.get('filename'))
+            found_files = []
+            if source.has('table'):
+                # '#' может быть частью имени файла
+                found_files = scanner.find_all_files(source.get('fullname'))
+                if found_files:
+                    source = cls._source_from_target(Path(source.get('fullname')))
+            if not found_files:
+                found_files = scanner.find_all_files(source.get('filename'))
             for filename in found_files:
                 new_source = Source(SourceType.FILE)
                 new_source.set('filepath', filename)
+                if source.has('table'):
+                    new_source.set('table', source.get('table'))
                 clear_sources.append(new_source)
         else:
             clear_sources.append(source)
@@ -82,63 +119,197 @@ class SourceFilter:
         return clear_sources
 
 
+class DiscoveryCache:
+    """
+    Общий для процесса кеш результатов поиска файлов.
+    Ключ: (директория вызова, os.getcwd(), имя файла, глубина поиска),
+    значение: найденные пути и mtime директорий, в которых шел поиск.
+    Появление или удаление файла меняет mtime его директории,
+    поэтому для проверки актуальности достаточно stat директорий
+    """
+
+    def __init__(self):
+        self._entries: t.Dict[tuple, t.Tuple[t.List[Path], t.Tuple[tuple, ...]]] = {}
+        # Содержимое директорий: путь -> (mtime, {имя: является ли файлом})
+        self._listings: t.Dict[str, t.Tuple[int, t.Dict[str, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, stat_memo: dict) -> t.Optional[t.List[Path]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        paths, signature = entry
+        for dir_path, mtime in signature:
+            if self.dir_mtime(dir_path, stat_memo) != mtime:
+                return None
+        return list(paths)
+
+    def set(self, key: tuple, paths: t.List[Path], signature: t.Tuple[tuple, ...]):
+        """signature нужно снять до поиска файлов, иначе можно
+        запомнить старый результат с новыми mtime"""
+        if any(self._is_racy(mtime) for _, mtime in signature):
+            return
+        with self._lock:
+            self._entries[key] = (list(paths), signature)
+
+    def listing(self, dir_path: str, stat_memo: dict) -> t.Optional[t.Dict[str, bool]]:
+        """
+        Содержимое директории {имя: является ли файлом} за один os.scandir,
+        None, если директории нет. Перечитывается только при изменении mtime
+        """
+        mtime = self.dir_mtime(dir_path, stat_memo)
+        if mtime is None:
+            return None
+        cached = self._listings.get(dir_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with os.scandir(dir_path) as entries:
+                listing = {entry.name: entry.is_file() for entry in entries}
+        except OSError:
+            return None
+        if not self._is_racy(mtime):
+            with self._lock:
+                self._listings[dir_path] = (mtime, listing)
+        return listing
+
+    def signature(self, dirs: t.Iterable[str], stat_memo: dict) -> t.Tuple[tuple, ...]:
+        return tuple((dir_path, self.dir_mtime(dir_path, stat_memo)) for dir_path in dict.fromkeys(dirs))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._listings.clear()
+
+    @classmethod
+    def _is_racy(cls, mtime: t.Optional[int]) -> bool:
+        """Директория, измененная только что, может измениться еще раз
+        в пределах точности mtime файловой системы, такие данные не кешируем"""
+        return mtime is not None and time.time_ns() - mtime < cls._racy_interval
+
+    @staticmethod
+    def dir_mtime(dir_path: str, stat_memo: dict) -> t.Optional[int]:
+        """mtime директории или None, если ее нет.
+        stat_memo не дает проверять одну директорию несколько раз за один Config()"""
+        if dir_path not in stat_memo:
+            try:
+                stat_memo[dir_path] = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                stat_memo[dir_path] = None
+        return stat_memo[dir_path]
+
+    _racy_interval = 2 * 10 ** 9
+
+
+discovery_cache = DiscoveryCache()
+
+
 class FilesScanner:
     """
     Задача класса находить файлы конфигурации
-    в директориях проекта
+    в директориях проекта, см. SearchStrategy.
+    Каждая директория читается одним os.scandir, все имена и шаблоны
+    проверяются по его результату. Результаты поиска кешируются
+    на весь процесс (discovery_cache), поэтому повторные Config()
+    почти не обращаются к файловой системе
     """
 
-    def __init__(self, caller_path: str):
+    def __init__(self, caller_path: str, strategy: t.Optional[SearchStrategy] = None):
         self._root_path = Path(os.getcwd())
         self._caller_path = caller_path
+        self._strategy = strategy or SearchStrategy()
+        # mtime директорий, проверенных этим сканером
+        self._stat_memo = {}
 
     @staticmethod
     def get_caller_path():
         """Возвращает файл, в котором была вызвана
         функция, которая вызвала эту"""
-        return traceback.extract_stack()[-3][0]
+        # В отличие от traceback.extract_stack не читает исходники через linecache
+        return sys._getframe(2).f_code.co_filename
 
     def find_all_files(self, filename: str) -> t.List[Path]:
         """
-        Принимает название или часть названия файла
+        Принимает название, часть пути или glob шаблон файла
         и возвращает список подходящих в порядке
         более глубокой вложенности
         """
-        paths = []
-        curr_dirname = os.path.dirname(self._caller_path)
-        curr_dirname = Path(curr_dirname)
-        for i in range(self._depth_limit):
-            path = self._get_path(curr_dirname, filename)
-            if path:
-                paths.append(path)
-            if curr_dirname == self._root_path:
-                break
-
-            curr_dirname = curr_dirname.parent
-
-        passed_file = Path(filename)
-        if passed_file.is_file() and passed_file not in paths:
-            paths.append(passed_file)
-
-        # Самый последний, наиболее глубокий в файловой структуре
-        return list(reversed(paths))
-
-    @classmethod
-    def _get_path(cls, dir_path: Path, filename: str) -> t.Optional[Path]:
-        """Проверяет в данной директории наличие файла
-        по паттерну filename, возвращает None при отсутствии
-        и Path() если существует"""
-        if not dir_path.exists():
-            return None
-
-        filepath = os.path.join(dir_path, filename)
+        caller_dirname = os.path.dirname(self._caller_path)
+        key = (caller_dirname, str(self._root_path), filename, self._strategy.key())
+        paths = discovery_cache.get(key, self._stat_memo)
+        if paths is not None:
+            return paths
+
+        watched_dirs = []
+        if not os.path.isabs(filename):
+            watched_dirs += map(str, self._project_dirs())
+
+        found = []
+        for dir_path in self.search_dirs(filename):
+            target_dirs, matches = self._match(dir_path, filename)
+            watched_dirs += target_dirs
+            found += matches
+
+        # Если файл найден несколько раз, остается позиция с большим приоритетом
+        paths = list(reversed(dict.fromkeys(reversed(found))))
+        discovery_cache.set(key, paths, discovery_cache.signature(watched_dirs, self._stat_memo))
+        return paths
+
+    def search_dirs(self, filename: str) -> t.List[Path]:
+        """
+        Директории, в которых ищется filename, от меньшего приоритета к большему:
+        явные пути, os.getcwd(), директории проекта от верхней к самой глубокой
+        """
+        if os.path.isabs(filename):
+            return [Path('/')]
+        return list(self._strategy.search_paths) + [self._root_path] + list(reversed(self._project_dirs()))
+
+    def _project_dirs(self) -> t.List[Path]:
+        caller_dirname = os.path.dirname(self._caller_path)
+        return self._strategy.project_dirs(Path(caller_dirname), self._root_path, self._listing)
+
+    def _match(self, dir_path: Path, filename: str) -> t.Tuple[t.List[str], t.List[Path]]:
+        """Файлы в dir_path, подходящие под filename,
+        возвращает также директории, изменение которых меняет результат"""
+        name_dir, name = os.path.split(filename)
         # Обрабатывает случаи вида /hello/../other
-        filepath = Path(os.path.abspath(filepath))
-        if not filepath.is_file():
-            return None
-        return filepath
+        target_dir = os.path.abspath(os.path.join(dir_path, name_dir))
+
+        if glob.has_magic(name_dir):
+            # Шаблон в имени директории, тут без обычного glob не обойтись
+            matches = sorted(glob.glob(os.path.join(target_dir, name)))
+            return self._glob_dirs(target_dir), [Path(path) for path in matches if os.path.isfile(path)]
+
+        entries = self._listing(Path(target_dir))
+        if not entries:
+            return [target_dir], []
+
+        if glob.has_magic(name):
+            matches = sorted(
+                entry for entry in fnmatch.filter(entries, name)
+                if entries[entry] and (not entry.startswith('.') or name.startswith('.'))
+            )
+        else:
+            matches = [name] if entries.get(name) else []
+        return [target_dir], [Path(target_dir, match) for match in matches]
 
-    _depth_limit = 4
+    @staticmethod
+    def _glob_dirs(pattern: str) -> t.List[str]:
+        """Директории, от которых зависит результат glob шаблона директории:
+        директория над первым компонентом с шаблоном и все подходящие
+        директории каждого следующего уровня.
+        Путь самого шаблона (conf/*) не существует, его mtime всегда None"""
+        parts = Path(pattern).parts
+        first = next(i for i, part in enumerate(parts) if glob.has_magic(part))
+        dirs = [str(Path(*parts[:first]))]
+        for level in range(first + 1, len(parts) + 1):
+            dirs += sorted(path for path in glob.glob(str(Path(*parts[:level]))) if os.path.isdir(path))
+        return dirs
+
+    def _listing(self, dir_path: Path) -> t.Optional[t.Dict[str, bool]]:
+        return discovery_cache.listing(str(dir_path), self._stat_memo)
 
 
 class ConfigSourceAdapter:
@@ -158,7 +329,8 @@ class ConfigSourceAdapter:
     _adapters_dict = {
         SourceType.ENV: EnvAdapter,
         SourceType.FILE: FileAdapter,
-        SourceType.DICT: DictAdapter
+        SourceType.DICT: DictAdapter,
+        SourceType.URL: UrlAdapter,
     }
 
 
@@ -166,13 +338,24 @@ class ConfigAggregator:
     """Превращает сырые словари из файлов и других источников
      в итоговый набор конфигов для пользования"""
 
-    def __init__(self, source: t.List[Source]):
+    def __init__(self, source: t.List[Source], normalize_keys: bool = False):
+        """
+        :param normalize_keys: после слияния построить key_index
+        для поиска без учета регистра и разделителей, см. KeyIndex
+        """
         self._sources = source
+        self._normalize_keys = normalize_keys
+        self.key_index: t.Optional[KeyIndex] = None
 
     def to_dict(self) -> dict:
         """Возвращает готовый итоговый словарь, содержащий
         все необходимые данные (переменные конфигурации)"""
-        return self._combine_sources()
+        data = self._combine_sources()
+        if self._normalize_keys:
+            self.key_index = KeyIndex(data)
+            # Совпадения сообщаются при загрузке, а не при первом обращении
+            self.key_index.report()
+        return data
 
     @classmethod
     def _extract_source(cls, source) -> dict:
@@ -0,0 +1,257 @@
+import sys
+import typing as t
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class CompactMapping(Mapping):
+    """
+    Неизменяемое хранилище для плоских конфигов с большим количеством ключей
+    (например переменные окружения или большой .env).
+
+    Ключи интернированы и лежат в отсортированном кортеже, поиск идет
+    бинарным поиском, значения хранятся в кортеже той же длины.
+    Занимает в несколько раз меньше памяти, чем dict, зато поиск
+    стоит O(log n), а не O(1). Копирование не нужно: объект неизменяем,
+    изменения через replace создают новый.
+    Порядок обхода - по возрастанию ключей, а не по порядку добавления
+    """
+    __slots__ = ('_keys', '_values', '_sort_keys')
+
+    def __init__(self, data: t.Union[t.Mapping, t.Iterable[tuple]] = ()):
+        items = data.items() if isinstance(data, Mapping) else data
+        merged = dict(items)
+        self._sort_keys = None
+        if all(isinstance(key, str) for key in merged):
+            keys = sorted(merged)
+        else:
+            # Ключи разных типов (str и int из yaml) нельзя сравнить напрямую,
+            # для них хранятся ключи сортировки
+            keys = sorted(merged, key=self._sort_key)
+            self._sort_keys = tuple(self._sort_key(key) for key in keys)
+        self._keys = tuple(sys.intern(key) if type(key) is str else key for key in keys)
+        self._values = tuple(merged[key] for key in keys)
+
+    @staticmethod
+    def _sort_key(key) -> tuple:
+        return type(key).__name__, key
+
+    def _index(self, key) -> int:
+        if self._sort_keys is None:
+            if not isinstance(key, str):
+                return -1
+            index = bisect_left(self._keys, key)
+        else:
+            try:
+                index = bisect_left(self._sort_keys, self._sort_key(key))
+            except TypeError:
+                return -1
+        if index < len(self._keys) and self._keys[index] == key:
+            return index
+        return -1
+
+    def __getitem__(self, key):
+        index = self._index(key)
+        if index < 0:
+            raise KeyError(key)
+        return self._values[index]
+
+    def __contains__(self, key) -> bool:
+        return self._index(key) >= 0
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __reversed__(self):
+        return reversed(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @classmethod
+    def _from_sorted(cls, keys: tuple, values: tuple) -> 'CompactMapping':
+        """Восстановление из уже отсортированных ключей, без повторной сортировки"""
+        mapping = cls.__new__(cls)
+        mapping._keys = tuple(sys.intern(key) if type(key) is str else key for key in keys)
+        mapping._values = values
+        if all(isinstance(key, str) for key in keys):
+            mapping._sort_keys = None
+        else:
+            mapping._sort_keys = tuple(cls._sort_key(key) for key in keys)
+        return mapping
+
+    def __reduce__(self):
+        return self.__class__._from_sorted, (self._keys, self._values)
+
+    def replace(self, updates: t.Optional[t.Mapping] = None, removed: t.Iterable = ()) -> 'CompactMapping':
+        """
+        Новое хранилище с измененными ключами.
+        Значения существующих ключей заменяются по индексу, новые ключи
+        сортируются отдельно и вливаются в уже отсортированный массив за O(n),
+        старые ключи не сортируются и не интернируются заново
+        """
+        removed = set(removed)
+        values = list(self._values)
+        dropped = set()
+        for key in removed:
+            index = self._index(key)
+            if index >= 0:
+                dropped.add(index)
+        added = {}
+        if updates:
+            for key, value in updates.items():
+                if key in removed:
+                    continue
+                index = self._index(key)
+                if index >= 0:
+                    values[index] = value
+                else:
+                    added[key] = value
+
+        if not added and not dropped:
+            return self._with(self._keys, tuple(values), self._sort_keys)
+
+        mixed = self._sort_keys is not None or not all(isinstance(key, str) for key in added)
+        if not mixed:
+            old_order = self._keys
+            order = None
+        else:
+            old_order = self._sort_keys or tuple(self._sort_key(key) for key in self._keys)
+            order = self._sort_key
+
+        keys, new_values, sort_keys = [], [], [] if mixed else None
+
+        def copy_range(start: int, stop: int):
+            if not dropped:
+                keys.extend(self._keys[start:stop])
+                new_values.extend(values[start:stop])
+                if mixed:
+                    sort_keys.extend(old_order[start:stop])
+                return
+            for index in range(start, stop):
+                if index not in dropped:
+                    keys.append(self._keys[index])
+                    new_values.append(values[index])
+                    if mixed:
+                        sort_keys.append(old_order[index])
+
+        start = 0
+        for key in sorted(added, key=order):
+            sort_key = order(key) if mixed else key
+            position = bisect_left(old_order, sort_key, start)
+            copy_range(start, position)
+            keys.append(sys.intern(key) if type(key) is str else key)
+            new_values.append(added[key])
+            if mixed:
+                sort_keys.append(sort_key)
+            start = position
+        copy_range(start, len(self._keys))
+
+        if mixed and all(isinstance(key, str) for key in keys):
+            sort_keys = None
+        return self._with(tuple(keys), tuple(new_values), None if sort_keys is None else tuple(sort_keys))
+
+    @classmethod
+    def _with(cls, keys: tuple, values: tuple, sort_keys: t.Optional[tuple]) -> 'CompactMapping':
+        """Хранилище из уже отсортированных и интернированных ключей"""
+        mapping = cls.__new__(cls)
+        mapping._keys = keys
+        mapping._values = values
+        mapping._sort_keys = sort_keys
+        return mapping
+
+    def __repr__(self):
+        return repr(dict(zip(self._keys, self._values)))
+
+
+class LayeredMapping(Mapping):
+    """
+    Неизменяемое наложение слоев конфига, верхний слой первый:
+    LayeredMapping((tenant, base)).
+    Значение ищется сверху вниз, вложенные словари сливаются на любой глубине,
+    как в includes.merge_dicts: если и в tenant и в base есть словарь db,
+    то db - тоже наложение, а не словарь верхнего слоя.
+    Слои не копируются, поэтому тысячи наложений на один большой base
+    занимают память пропорционально только своим верхним слоям.
+    Ветки, которых нет в верхних слоях, возвращаются как есть, без обертки.
+    Изменения через replace (config.set, del config[key]) заменяют ключ целиком,
+    нижние слои для него больше не учитываются
+    """
+    __slots__ = ('_layers', '_hidden', '_len')
+
+    def __init__(self, layers: t.Sequence[t.Mapping], hidden: t.AbstractSet = frozenset()):
+        """
+        :param layers: слои от верхнего к нижнему
+        :param hidden: ключи верхнего уровня, которые берутся только из верхнего слоя
+        """
+        self._layers = tuple(layers)
+        self._hidden = frozenset(hidden)
+        self._len = None
+
+    @property
+    def layers(self) -> t.Tuple[t.Mapping, ...]:
+        return self._layers
+
+    def _visible(self, key) -> t.Tuple[t.Mapping, ...]:
+        """Слои, в которых ищется key"""
+        return self._layers[:1] if key in self._hidden else self._layers
+
+    def __getitem__(self, key):
+        found = []
+        for layer in self._visible(key):
+            if key not in layer:
+                continue
+            value = layer[key]
+            if not isinstance(value, Mapping):
+                if found:
+                    # Словарь выше перекрывает значение другого типа
+                    break
+                return value
+            found.append(value)
+        if not found:
+            raise KeyError(key)
+        return found[0] if len(found) == 1 else self.__class__(found)
+
+    def __contains__(self, key) -> bool:
+        return any(key in layer for layer in self._visible(key))
+
+    def __iter__(self):
+        # Порядок как у dict.update: сначала ключи нижнего слоя, затем новые
+        seen = set()
+        last = len(self._layers) - 1
+        for position, layer in enumerate(reversed(self._layers)):
+            for key in layer:
+                if key in seen or (position != last and key in self._hidden):
+                    continue
+                seen.add(key)
+                yield key
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self)
+        return self._len
+
+    def replace(self, updates: t.Optional[t.Mapping] = None, removed: t.Iterable = ()) -> 'LayeredMapping':
+        """Новое наложение, изменения попадают только в верхний слой"""
+        top = dict(self._layers[0])
+        hidden = set(self._hidden)
+        if updates:
+            top.update(updates)
+            hidden.update(updates)
+        for key in removed:
+            top.pop(key, None)
+            hidden.add(key)
+        return self.__class__((top,) + self._layers[1:], hidden)
+
+    def to_dict(self) -> dict:
+        """Обычный словарь со слитыми слоями на всех уровнях"""
+        return {
+            key: value.to_dict() if isinstance(value, LayeredMapping) else value
+            for key, value in self.items()
+        }
+
+    def __reduce__(self):
+        return self.__class__, (self._layers, self._hidden)
+
+    def __repr__(self):
+        return repr(self.to_dict())
@@ -20,6 +20,13 @@ setup(
     install_requires=[
         'PyYAML>=4.0.0',
     ],
+    extras_require={
+        'toml': ['tomli>=1.1.0; python_version < "3.11"'],
+        'zstd': ['zstandard; python_version < "3.14"'],
+    },
+    entry_points={
+        'console_scripts': ['bestconfig = bestconfig.cli:main'],
+    },
     setup_requires=['pytest-runner'],
     tests_require=['pytest'],
     test_suite='tests',
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from bestconfig.cli import main
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / 'config.json').write_text(json.dumps({'db': {'host': 'localhost', 'password': 'qwerty'}}))
+    (tmp_path / '.env').write_text('DEBUG=true\nPORT=8080\n')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_show(project, capsys):
+    assert main(['--no-env', 'show', '--format', 'json']) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data == {'DEBUG': 'true', 'PORT': '8080', 'db': {'host': 'localhost', 'password': '***'}}
+
+    main(['--no-env', 'show', '--origin'])
+    lines = capsys.readouterr().out.splitlines()
+    assert f'db.host=localhost  # {project / "config.json"}' in lines
+    assert f'PORT=8080  # {project / ".env"}' in lines
+
+
+def test_paths_and_get(project, capsys):
+    main(['--no-env', 'paths'])
+    out = capsys.readouterr().out
+    assert f'found  {project / "config.json"}' in out
+    assert str(project) in out.split('searched directories')[1]
+
+    assert main(['--no-env', 'get', 'PORT']) == 0
+    assert capsys.readouterr().out == '8080\n'
+    assert main(['--no-env', 'get', 'db']) == 0
+    assert json.loads(capsys.readouterr().out)['host'] == 'localhost'
+    assert main(['--no-env', 'get', 'missing']) == 1
+
+
+def test_validate(project, capsys):
+    assert main(['--no-env', 'validate', '--require', 'db.host']) == 0
+    assert main(['--no-env', 'validate', '--require', 'db.port']) == 1
+
+    # Ключ со значением null существует
+    (project / 'config.json').write_text(json.dumps({'db': {'host': 'localhost', 'replica': None}}))
+    assert main(['--no-env', 'validate', '--require', 'db.replica']) == 0
+
+    (project / 'config.yaml').write_text('a: [1, 2\n')
+    assert main(['--no-env', 'validate']) == 1
+    assert 'ERROR' in capsys.readouterr().out
+
+
+def test_bench(project, capsys):
+    assert main(['--no-env', 'bench', '--repeat', '2']) == 0
+    out = capsys.readouterr().out
+    assert 'discovery (cold)' in out and 'lookup 3 keys' in out
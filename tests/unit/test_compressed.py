@@ -0,0 +1,72 @@
+import bz2
+import gzip
+import json
+import lzma
+from pathlib import Path
+
+import pytest
+
+from bestconfig import Config
+from bestconfig.adapters import FileAdapter
+from bestconfig.compressed import open_file, split_compression
+from bestconfig.file_parsers import IniParser, LazyIniSection
+
+
+def test_file_type():
+    assert FileAdapter._get_file_type(Path('routes.json.gz')) == 'json'
+    assert FileAdapter._get_file_type(Path('/etc/app/flags.yaml.zst')) == 'yaml'
+    assert FileAdapter._get_file_type(Path('.env.production.xz')) == 'env'
+    assert FileAdapter._get_file_type(Path('config.gz')) is None
+    assert split_compression('config.json') == ('config.json', None)
+
+
+@pytest.mark.parametrize('opener, ext', [(gzip.open, 'gz'), (bz2.open, 'bz2'), (lzma.open, 'xz')])
+def test_read_compressed(tmp_path, opener, ext):
+    data = {'routes': [{'path': '/', 'weight': i} for i in range(100)], 'db': {'host': 'localhost'}}
+    with opener(tmp_path / f'routes.json.{ext}', 'wt') as file:
+        json.dump(data, file)
+    with opener(tmp_path / f'flags.yaml.{ext}', 'wt') as file:
+        file.write('feature:\n  enabled: true\n')
+    with opener(tmp_path / f'app.env.{ext}', 'wt') as file:
+        file.write('TOKEN=abc\n')
+
+    config = Config(str(tmp_path / f'routes.json.{ext}'), str(tmp_path / f'flags.yaml.{ext}'),
+                    str(tmp_path / f'app.env.{ext}'), exclude_default=True)
+    assert config.get('routes')[99]['weight'] == 99
+    assert config.get('db.host') == 'localhost'
+    assert config.get('feature.enabled') is True
+    assert config.TOKEN == 'abc'
+
+
+def test_compressed_ini_is_eager(tmp_path, monkeypatch):
+    monkeypatch.setattr(IniParser, 'lazy_threshold', 0)
+    filepath = tmp_path / 'legacy.cfg.gz'
+    with gzip.open(filepath, 'wt') as file:
+        file.write('[DEFAULT]\nroot = /opt\n[section]\npath = %(root)s/app\n')
+
+    data = IniParser.read(str(filepath))
+    assert not isinstance(data['section'], LazyIniSection)
+    assert data['section']['path'] == '/opt/app'
+
+
+def test_write_compressed(tmp_path):
+    filepath = tmp_path / 'dump.yaml.gz'
+    FileAdapter.write(filepath, {'a': {'b': 1}})
+    with gzip.open(filepath, 'rt') as file:
+        assert file.read() == 'a:\n  b: 1\n'
+    assert Config(str(filepath), exclude_default=True).get('a.b') == 1
+
+
+def test_zstd_missing(tmp_path, monkeypatch):
+    import builtins
+
+    original_import = builtins.__import__
+
+    def no_zstd(name, *args, **kwargs):
+        if name in ('zstandard', 'compression'):
+            raise ImportError(name)
+        return original_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', no_zstd)
+    with pytest.raises(ImportError, match='zstandard'):
+        open_file(tmp_path / 'config.json.zst')
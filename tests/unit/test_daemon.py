@@ -0,0 +1,231 @@
+import datetime
+import json
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from bestconfig import daemon as daemon_module
+from bestconfig.daemon import (ConfigDaemon, DaemonClient, DaemonConfigProvider, DaemonError, CHANGED,
+                               ERROR, MAX_SOCKET_PATH, VALUE, decode_value, encode_value, recv_frame, send_frame)
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='нужны unix сокеты')
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'не дождались'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    (tmp_path / 'app.json').write_text(json.dumps({'db': {'host': 'localhost', 'port': 5432}, 'debug': False}))
+    daemon = ConfigDaemon(str(tmp_path / 'config.sock'), [str(tmp_path / 'app.json'), {'name': 'app'}])
+    daemon.start()
+    yield daemon
+    daemon.stop()
+
+
+def test_client_requests(daemon):
+    client = DaemonClient(daemon.socket_path)
+    version, data = client.snapshot()
+    assert version == 1
+    assert data == {'db': {'host': 'localhost', 'port': 5432}, 'debug': False, 'name': 'app'}
+    assert client.get('db.port') == 5432
+    assert client.get('db') == {'host': 'localhost', 'port': 5432}
+    assert client.get('missing', 'default') == 'default'
+    client.close()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(daemon.socket_path)
+        send_frame(sock, 0x7f)
+        assert recv_frame(sock)[0] == ERROR
+
+    with pytest.raises(DaemonError):
+        DaemonClient(daemon.socket_path + '.missing')
+
+
+def test_provider_follows_daemon(daemon, tmp_path):
+    config = DaemonConfigProvider(daemon.socket_path)
+    assert config.db.host == 'localhost'
+    assert config.get('db.port') == 5432
+
+    events = []
+    config.subscribe('db', events.append)
+
+    @config.memoize
+    def host():
+        return config.get('db.host')
+
+    assert host() == 'localhost'
+    daemon.config.set('debug', True)
+    wait_for(lambda: config.debug is True)
+    assert not events and host.cache_info().invalidations == 0
+
+    (tmp_path / 'app.json').write_text(json.dumps({'db': {'host': 'db.internal', 'port': 5432}}))
+    daemon.reload()
+    wait_for(lambda: config.get('db.host') == 'db.internal')
+    assert 'debug' not in config
+    assert events[0].changed == {'db.host': ('localhost', 'db.internal')}
+    assert host() == 'db.internal'
+
+    # После остановки демона остается последний конфиг
+    config.close()
+    daemon.stop()
+    assert config.db.host == 'db.internal'
+
+
+def test_slow_subscriber_does_not_block_writes(daemon, monkeypatch):
+    received = []
+    DaemonClient(daemon.socket_path).subscribe(lambda version, paths: received.append(version))
+    wait_for(lambda: received == [1])
+
+    # Подписчик не принимает уведомления, а запись в конфиг не ждет отправки
+    unblock = threading.Event()
+
+    def stuck_send(sock, kind, payload=b''):
+        if kind == CHANGED:
+            unblock.wait(5)
+        send_frame(sock, kind, payload)
+
+    monkeypatch.setattr(daemon_module, 'send_frame', stuck_send)
+    start = time.monotonic()
+    for value in range(3):
+        daemon.config.set('debug', f'value-{value}')
+    assert time.monotonic() - start < 1
+    assert received == [1]
+    unblock.set()
+    wait_for(lambda: received == [1, 2, 3, 4])
+
+
+def test_provider_survives_daemon_restart(daemon, monkeypatch):
+    monkeypatch.setattr(DaemonClient, 'reconnect_delay', 0.01)
+    config = DaemonConfigProvider(daemon.socket_path)
+    config.set('local', True)
+    daemon.config.set('debug', True)
+    wait_for(lambda: config.debug is True)
+
+    daemon.stop()
+    restarted = ConfigDaemon(daemon.socket_path, [{'db': {'host': 'db.internal'}, 'debug': False}])
+    restarted.start()
+    try:
+        # Версии нового демона начинаются заново, но снимок все равно применяется
+        wait_for(lambda: config.get('db.host') == 'db.internal')
+        assert config.debug is False and 'name' not in config
+        assert config.get('db.host') == DaemonClient(daemon.socket_path).get('db.host')
+    finally:
+        config.close()
+        restarted.stop()
+
+
+def test_encoding():
+    data = {'db': {'host': 'localhost', 'port': 5432}, 'ratio': 0.5, 'flags': [True, None]}
+    assert encode_value(data)[:1] == b'J'
+    assert decode_value(encode_value(data)) == data
+
+    typed = {404: 'nf', 'pair': (1, 'a'), 'big': 1 << 70, 'raw': b'\x00', 'nan': float('inf'),
+             'when': datetime.datetime(2024, 1, 2, 3, 4, tzinfo=datetime.timezone.utc),
+             'day': datetime.date(2024, 1, 2), 'nested': [{1: (2,)}], 'text': 'привет\ud800'}
+    encoded = encode_value(typed)
+    assert encoded[:1] == b'B'
+    decoded = decode_value(encoded)
+    assert decoded == typed
+    assert type(decoded['pair']) is tuple and type(decoded['when']) is datetime.datetime
+
+    with pytest.raises(TypeError):
+        encode_value({'callback': print})
+    for broken in (encoded[:-3], encoded + b'x', b'\x80\x03cos\nsystem\n', b'B?', b''):
+        with pytest.raises(DaemonError):
+            decode_value(broken)
+
+
+def test_socket_path_checks(tmp_path, daemon):
+    assert stat.S_IMODE(os.stat(daemon.socket_path).st_mode) == 0o600
+
+    # Сокет работающего демона не перехватывается
+    with pytest.raises(DaemonError):
+        ConfigDaemon(daemon.socket_path, [{'a': 1}]).start()
+    assert DaemonClient(daemon.socket_path).get('name') == 'app'
+
+    # Обычный файл не удаляется
+    regular = tmp_path / 'regular'
+    regular.write_text('data')
+    with pytest.raises(DaemonError):
+        ConfigDaemon(str(regular), [{'a': 1}]).start()
+    assert regular.read_text() == 'data'
+
+    # Сокет, который никто не слушает, остался от предыдущего запуска
+    stale = str(tmp_path / 'stale.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(stale)
+    other = ConfigDaemon(stale, [{'a': 1}])
+    other.start()
+    assert DaemonClient(stale).get('a') == 1
+    other.stop()
+    assert not os.path.exists(stale)
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith('.bc')] == []
+
+
+def test_long_socket_path(tmp_path):
+    directory = tmp_path / ('d' * max(1, MAX_SOCKET_PATH - len(str(tmp_path)) - 12))
+    directory.mkdir()
+    # Путь до временной директории не помещается в sun_path, а сам путь помещается
+    path = str(directory / 'c.sock')
+    assert len(path) < MAX_SOCKET_PATH <= len(str(directory / '.bcxxxxxxxx' / 's'))
+    daemon = ConfigDaemon(path, [{'a': 1}])
+    daemon.start()
+    try:
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert DaemonClient(path).get('a') == 1
+    finally:
+        daemon.stop()
+    assert os.listdir(directory) == []
+
+    with pytest.raises(DaemonError, match='длиннее'):
+        ConfigDaemon(str(directory / ('c' * 20)), [{'a': 1}]).start()
+
+
+def test_client_reconnects_after_timeout(tmp_path):
+    path = str(tmp_path / 'slow.sock')
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+
+    def serve(conn):
+        with conn:
+            while True:
+                frame = recv_frame(conn)
+                if frame is None:
+                    return
+                key = frame[1].decode()
+                if key == 'slow':
+                    time.sleep(0.3)
+                try:
+                    send_frame(conn, VALUE, encode_value(key))
+                except OSError:
+                    return
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    client = DaemonClient(path, timeout=0.1)
+    try:
+        with pytest.raises(DaemonError):
+            client.get('slow')
+        time.sleep(0.3)
+        # Запоздавший ответ на 'slow' не достается следующему запросу
+        assert client.get('fast') == 'fast'
+    finally:
+        client.close()
+        server.close()
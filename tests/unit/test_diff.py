@@ -0,0 +1,88 @@
+import pytest
+
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.diff import ConfigDiff
+
+
+def test_diff():
+    config = ConfigProvider({
+        'logger': {'mode': 'INFO', 'format': '%(message)s'},
+        'db': {'host': 'localhost', 'port': 5432},
+        'old': 1,
+        'items': [1, 2],
+    })
+    old = config.copy()
+    with config.transaction() as tx:
+        tx['logger'] = {'mode': 'DEBUG', 'format': '%(message)s', 'file': 'app.log'}
+        tx['items'] = [1, 2, 3]
+        tx['new'] = True
+        del tx['old']
+
+    diff = old.diff(config)
+    assert diff.changed == {'logger.mode': ('INFO', 'DEBUG'), 'items': ([1, 2], [1, 2, 3])}
+    assert diff.added == {'logger.file': 'app.log', 'new': True}
+    assert diff.removed == {'old': 1}
+    assert not config.diff(config.copy())
+    assert old.diff({'old': 1}).removed.keys() == {'logger', 'db', 'items'}
+
+
+def test_shared_subtrees_skipped():
+    compared = []
+
+    class Tracking(ConfigDiff):
+        def _compare(self, old, new, prefix):
+            compared.append(prefix)
+            super()._compare(old, new, prefix)
+
+    data = {f'section{i}': {'value': i} for i in range(100)}
+    config = ConfigProvider(data)
+    old = config.copy()
+    config.set('section5', {'value': -1})
+    diff = Tracking.compute(old._snapshot, config._snapshot)
+    assert diff.changed == {'section5.value': (5, -1)}
+    assert compared == ['', 'section5.']
+
+
+def test_subscribe():
+    config = ConfigProvider({'db': {'host': 'localhost', 'port': 5432}, 'debug': False})
+    db_events, all_events = [], []
+    config.subscribe('db.host', db_events.append)
+    config.subscribe('', all_events.append)
+
+    config.set('debug', True)
+    assert db_events == []
+    assert all_events[-1].changed == {'debug': (False, True)}
+
+    config.set('db', {'host': 'db.internal', 'port': 5432})
+    assert db_events[-1].changed == {'db.host': ('localhost', 'db.internal')}
+
+    del config['db']
+    assert db_events[-1].removed == {'db': {'host': 'db.internal', 'port': 5432}}
+
+    config.unsubscribe(all_events.append)
+    config.unsubscribe(db_events.append)
+    count = len(db_events) + len(all_events)
+    config.set('db', {'host': 'other'})
+    assert len(db_events) + len(all_events) == count
+
+
+def test_failing_subscriber():
+    config = ConfigProvider({'a': 1})
+    calls = []
+
+    def failing(diff):
+        raise RuntimeError('boom')
+
+    config.subscribe('', failing)
+    config.subscribe('a', calls.append)
+
+    @config.memoize
+    def read():
+        return config.a
+
+    assert read() == 1
+    with pytest.warns(UserWarning, match='boom'):
+        config.set('a', 2)
+    assert config.a == 2
+    assert len(calls) == 1
+    assert read() == 2
@@ -0,0 +1,186 @@
+import os
+from pathlib import Path
+import pytest
+
+from bestconfig import Config, SearchStrategy
+from bestconfig.source_resolver import FilesScanner, discovery_cache
+
+OLD_MTIME = 10 ** 9
+
+
+def make_old(*paths):
+    """Кеш не запоминает только что измененные директории"""
+    for path in paths:
+        os.utime(path, ns=(OLD_MTIME, OLD_MTIME))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    app = tmp_path / 'app'
+    app.mkdir()
+    (tmp_path / 'config.yaml').write_text('a: 1\n')
+    (app / 'config.yaml').write_text('a: 2\n')
+    make_old(tmp_path, app)
+    monkeypatch.chdir(tmp_path)
+    discovery_cache.clear()
+    return tmp_path
+
+
+def count_scans(monkeypatch):
+    calls = []
+    original = os.scandir
+
+    def scandir(path):
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(os, 'scandir', scandir)
+    return calls
+
+
+def test_discovery_cache(project, monkeypatch):
+    caller = str(project / 'app' / 'main.py')
+    expected = [project / 'config.yaml', project / 'app' / 'config.yaml']
+    assert FilesScanner(caller).find_all_files('config.yaml') == expected
+
+    calls = count_scans(monkeypatch)
+    assert FilesScanner(caller).find_all_files('config.yaml') == expected
+    assert FilesScanner(caller).find_all_files('config.yaml') == expected
+    assert calls == []
+
+    # Новый файл меняет mtime директории и сбрасывает кеш
+    (project / 'app' / 'config.json').write_text('{}')
+    os.utime(project / 'app', ns=(OLD_MTIME, OLD_MTIME + 1))
+    assert FilesScanner(caller).find_all_files('config.json') == [project / 'app' / 'config.json']
+    (project / 'app' / 'config.yaml').unlink()
+    os.utime(project / 'app', ns=(OLD_MTIME, OLD_MTIME + 2))
+    assert FilesScanner(caller).find_all_files('config.yaml') == [project / 'config.yaml']
+    assert calls
+
+
+def test_scanner_stats_each_dir_once(project, monkeypatch):
+    caller = str(project / 'app' / 'main.py')
+    scanner = FilesScanner(caller)
+    for name in ['config.yaml', 'config.json', 'settings.ini']:
+        scanner.find_all_files(name)
+
+    stats = []
+    original_stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda path, *args, **kwargs: stats.append(path) or original_stat(path, *args, **kwargs))
+    scanner = FilesScanner(caller)
+    for name in ['config.yaml', 'config.json', 'settings.ini']:
+        scanner.find_all_files(name)
+    assert sorted(set(map(str, stats))) == sorted(map(str, stats))
+    assert len(stats) == 2
+
+
+def test_caller_path():
+    def caller():
+        return FilesScanner.get_caller_path()
+
+    assert caller() == __file__
+
+
+def test_single_scan_per_directory(project, monkeypatch):
+    caller = str(project / 'app' / 'main.py')
+    calls = count_scans(monkeypatch)
+    scanner = FilesScanner(caller)
+    for name in ['config.yaml', 'config.json', 'settings.ini', 'config.*']:
+        scanner.find_all_files(name)
+    assert sorted(calls) == sorted({str(project), str(project / 'app')})
+
+
+def test_glob_patterns(project):
+    app = project / 'app'
+    for name in ['config.b.yaml', 'config.a.yaml', '.config.hidden.yaml']:
+        (app / name).write_text('x: 1\n')
+    scanner = FilesScanner(str(app / 'main.py'))
+    assert scanner.find_all_files('config.*.yaml') == [app / 'config.a.yaml', app / 'config.b.yaml']
+
+
+def test_glob_dir_patterns_cache(project):
+    caller = str(project / 'main.py')
+    (project / 'services' / 'api').mkdir(parents=True)
+    (project / 'services' / 'api' / 'app.yaml').write_text('a: 1\n')
+    make_old(project, project / 'services', project / 'services' / 'api')
+    assert FilesScanner(caller).find_all_files('services/*/app.yaml') == [project / 'services' / 'api' / 'app.yaml']
+
+    # Новая директория под шаблоном меняет mtime директории над шаблоном
+    (project / 'services' / 'web').mkdir()
+    (project / 'services' / 'web' / 'app.yaml').write_text('a: 2\n')
+    make_old(project / 'services' / 'web')
+    os.utime(project / 'services', ns=(OLD_MTIME, OLD_MTIME + 1))
+    assert FilesScanner(caller).find_all_files('services/*/app.yaml') == [
+        project / 'services' / 'api' / 'app.yaml', project / 'services' / 'web' / 'app.yaml']
+
+    # Файл в уже найденной директории тоже замечается
+    (project / 'services' / 'api' / 'app.yaml').unlink()
+    os.utime(project / 'services' / 'api', ns=(OLD_MTIME, OLD_MTIME + 1))
+    assert FilesScanner(caller).find_all_files('services/*/app.yaml') == [project / 'services' / 'web' / 'app.yaml']
+
+
+def test_root_markers(tmp_path, monkeypatch):
+    deep = tmp_path / 'repo' / 'src' / 'pkg'
+    deep.mkdir(parents=True)
+    (tmp_path / 'config.yaml').write_text('a: 1\n')
+    (tmp_path / 'repo' / 'config.yaml').write_text('a: 2\n')
+    (tmp_path / 'repo' / 'pyproject.toml').write_text('')
+    monkeypatch.chdir('/')
+
+    caller = str(deep / 'main.py')
+    # Процесс запущен из /, без маркеров поиск упирается только в глубину
+    assert FilesScanner(caller, SearchStrategy(stop_at_cwd=False)).find_all_files('config.yaml') == [
+        tmp_path / 'config.yaml', tmp_path / 'repo' / 'config.yaml'
+    ]
+    strategy = SearchStrategy(root_markers=True, stop_at_cwd=False)
+    assert FilesScanner(caller, strategy).find_all_files('config.yaml') == [tmp_path / 'repo' / 'config.yaml']
+    strategy = SearchStrategy(depth_limit=2, stop_at_cwd=False)
+    assert FilesScanner(caller, strategy).find_all_files('config.yaml') == []
+
+
+def test_search_paths(project):
+    etc = project / 'etc'
+    home = project / 'home'
+    for directory, value in [(etc, 'etc'), (home, 'home')]:
+        directory.mkdir()
+        (directory / 'config.yaml').write_text(f'source: {value}\nonly_{value}: 1\n')
+
+    strategy = SearchStrategy(search_paths=[etc, home])
+    config = Config('config.yaml', exclude_default=True, search=strategy)
+    assert config.only_etc == 1
+    assert config.only_home == 1
+    # Более поздний путь перезаписывает более ранний
+    assert config.source == 'home'
+    assert config.get('a') == 1
+
+    strategy = SearchStrategy.for_app('myapp')
+    assert strategy.search_paths[0] == Path('/etc/myapp')
+
+
+def test_profiles(project, monkeypatch):
+    (project / 'config.production.yaml').write_text('a: 10\nprofile: production\n')
+    (project / 'config.local.yaml').write_text('profile: local\n')
+    (project / '.env.production').write_text('PROFILE_ENV=production\n')
+    (project / 'extra.json').write_text('{"extra": 1}')
+    (project / 'extra.production.json').write_text('{"extra": 2}')
+
+    config = Config('extra.json', profile='production', exclude=['__ENV__'])
+    assert config.a == 10
+    assert config.profile == 'local'
+    assert config.PROFILE_ENV == 'production'
+    assert config.extra == 2
+
+    config = Config(exclude=['__ENV__'])
+    assert config.get('profile') is None
+
+    monkeypatch.setenv('BESTCONFIG_PROFILE', 'production')
+    config = Config(exclude=['__ENV__'])
+    assert config.a == 10
+
+
+def test_profiles_single_scan(project, monkeypatch):
+    Config(profile='production', exclude=['__ENV__'])
+    calls = count_scans(monkeypatch)
+    # Новые имена файлов проверяются по уже прочитанному содержимому директории
+    Config(profile='staging', exclude=['__ENV__'])
+    assert str(project) not in calls
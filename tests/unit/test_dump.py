@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.file_parsers import parsers, flatten_dict, redact_dict
+
+DATA = {
+    'service': {'name': 'api', 'port': 8080, 'debug': False, 'tags': ['a', 'b']},
+    'db': {'host': 'localhost', 'password': 'qwerty', 'options': {'timeout': 5, 'ratio': '50%'}},
+}
+
+
+@pytest.mark.parametrize('filetype', ['json', 'yaml'])
+def test_round_trip_typed(tmp_path, filetype):
+    config = ConfigProvider(DATA)
+    path = tmp_path / f'effective.{filetype}'
+    config.dump(path, redact=False)
+    assert parsers.get(filetype).read(str(path)) == DATA
+
+
+@pytest.mark.parametrize('filetype', ['env', 'ini'])
+def test_round_trip_text(tmp_path, filetype):
+    config = ConfigProvider(DATA)
+    path = tmp_path / f'effective.{filetype}'
+    config.dump(path, redact=False)
+    restored = ConfigProvider(parsers.get(filetype).read(str(path)))
+    # Значения читаются строками, UniversalConverter возвращает им типы
+    for key in ['service.name', 'service.port', 'service.debug', 'service.tags',
+                'db.password', 'db.options.timeout', 'db.options.ratio']:
+        if filetype == 'ini':
+            # Секции ini - ключи верхнего уровня, внутри секции ключи плоские
+            section, _, option = key.partition('.')
+            assert restored.get(section).get(option) == config.get(key), key
+        else:
+            assert restored.get(key) == config.get(key), key
+
+
+def test_dump_options():
+    config = ConfigProvider({'b': 1, 'a': {'api_key': 'k', 'nested': {'x': 1}}, 'TOKEN': 't'})
+    stream = io.StringIO()
+    config.dump(stream, 'env', sort_keys=True)
+    assert stream.getvalue() == 'TOKEN=***\na.api_key=***\na.nested.x=1\nb=1\n'
+
+    stream = io.StringIO()
+    config.dump(stream, 'json', flatten=True, redact=['b'])
+    assert stream.getvalue().startswith('{\n  "TOKEN": "t",\n  "a.api_key": "k"')
+
+    assert flatten_dict({'a': {'b': {}}, 'c': 1}) == {'a.b': {}, 'c': 1}
+    assert redact_dict({'db': {'user': 'u'}}, ['db.user']) == {'db': {'user': '***'}}
+
+    with pytest.raises(ValueError):
+        config.dump(io.StringIO(), 'ini')
+    with pytest.raises(ValueError):
+        config.dump(io.StringIO())
+
+
+def test_json_streaming():
+    class CountingStream(io.StringIO):
+        writes = 0
+
+        def write(self, chunk):
+            self.writes += 1
+            return super().write(chunk)
+
+    stream = CountingStream()
+    ConfigProvider({f'key{i}': i for i in range(100)}).dump(stream, 'json')
+    assert stream.writes > 100
+
+
+@pytest.mark.parametrize('filetype', ['json', 'yaml', 'env'])
+def test_dump_mixed_keys(filetype):
+    stream = io.StringIO()
+    ConfigProvider({404: 'nf', 'name': 'x', 'codes': {500: 'err', 'default': 'ok'}}).dump(stream, filetype)
+    assert 'nf' in stream.getvalue() and 'err' in stream.getvalue()
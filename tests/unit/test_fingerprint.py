@@ -0,0 +1,62 @@
+import subprocess
+import sys
+
+import pytest
+
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.fingerprint import Fingerprint
+
+
+@pytest.fixture
+def data():
+    return {'db': {'host': 'localhost', 'port': 5432, 'tags': ['a', {'b': 1}]}, 'debug': False, 'name': 'app'}
+
+
+def test_fingerprint_stable(data):
+    config = ConfigProvider(data)
+    reordered = ConfigProvider({'name': 'app', 'debug': False,
+                                'db': {'tags': ['a', {'b': 1}], 'port': 5432, 'host': 'localhost'}})
+    assert config.fingerprint() == reordered.fingerprint()
+    assert config.fingerprint('db') == reordered.db.fingerprint()
+    assert config.fingerprint('db.host') != config.fingerprint('name')
+    assert ConfigProvider({'a': 1}).fingerprint() != ConfigProvider({'a': '1'}).fingerprint()
+    assert ConfigProvider({'a': [1, 2]}).fingerprint() != ConfigProvider({'a': [2, 1]}).fingerprint()
+    with pytest.raises(KeyError):
+        config.fingerprint('db.missing')
+
+    # Элементы списков по индексу
+    assert config.fingerprint('db.tags.1') == ConfigProvider({'b': 1}).fingerprint()
+    assert config.fingerprint('db.tags.1.b') != config.fingerprint('db.tags.0')
+    with pytest.raises(KeyError):
+        config.fingerprint('db.tags.2')
+
+    # Не зависит от процесса (рандомизации hash())
+    code = ('from bestconfig.config_provider import ConfigProvider;'
+            'print(ConfigProvider(%r).fingerprint())' % data)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.decode().strip() == config.fingerprint()
+
+
+def test_fingerprint_incremental(data, monkeypatch):
+    config = ConfigProvider(data)
+    before = config.fingerprint()
+    db_before = config.fingerprint('db')
+
+    computed = []
+    original = Fingerprint.compute.__func__
+
+    def counting(cls, value, previous=None):
+        computed.append(value)
+        return original(cls, value, previous)
+
+    monkeypatch.setattr(Fingerprint, 'compute', classmethod(counting))
+    config.set('debug', True)
+    after = config.fingerprint()
+    # Ветка db не пересчитывается
+    assert computed == [config._snapshot]
+    assert after != before and config.fingerprint('db') == db_before
+    assert len(computed) == 1
+
+    config.set('debug', False)
+    assert config.fingerprint() == before
+    assert config.fingerprint() == ConfigProvider(data).fingerprint()
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from bestconfig import Config
+from bestconfig.file_parsers import YamlParser, parsers
+from bestconfig.includes import IncludeError, IncludeResolver
+
+
+@pytest.fixture
+def resolver():
+    return IncludeResolver()
+
+
+@pytest.fixture
+def fragments(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    (shared / 'db.yaml').write_text('host: localhost\nport: 5432\noptions:\n  timeout: 5\n  ssl: false\n')
+    (shared / 'base.yaml').write_text('logger:\n  mode: INFO\n  format: short\ndb: !include db.yaml\n')
+    (tmp_path / 'cache.json').write_text(json.dumps({'ttl': 60}))
+    (tmp_path / 'app.yaml').write_text(
+        'extends: shared/base.yaml\n'
+        'logger:\n  mode: DEBUG\n'
+        'cache: !include cache.json\n'
+        'replica: !include shared/db.yaml\n'
+    )
+    return tmp_path
+
+
+def compose(resolver, path):
+    return resolver.compose(YamlParser.read(str(path)), path)
+
+
+def test_include_and_extends(fragments, resolver):
+    data = compose(resolver, fragments / 'app.yaml')
+    assert data == {
+        'logger': {'mode': 'DEBUG', 'format': 'short'},
+        'db': {'host': 'localhost', 'port': 5432, 'options': {'timeout': 5, 'ssl': False}},
+        'cache': {'ttl': 60},
+        'replica': {'host': 'localhost', 'port': 5432, 'options': {'timeout': 5, 'ssl': False}},
+    }
+    assert resolver.graph[str(fragments / 'app.yaml')] == [
+        str(fragments / 'cache.json'), str(fragments / 'shared' / 'db.yaml'), str(fragments / 'shared' / 'base.yaml'),
+    ]
+    assert resolver.graph[str(fragments / 'shared' / 'base.yaml')] == [str(fragments / 'shared' / 'db.yaml')]
+
+
+def test_unchanged_branches_not_copied(fragments, resolver):
+    data = {'a': {'b': [1, {'c': 2}]}, 'd': 'text'}
+    assert resolver.compose(data, fragments / 'plain.json') is data
+    assert resolver.graph[str(fragments / 'plain.json')] == []
+
+    data = {'a': {'b': [1, {'c': 2}]}, 'cache': {'inner': '!include cache.json'}}
+    composed = resolver.compose(data, fragments / 'c.json')
+    assert composed == {'a': {'b': [1, {'c': 2}]}, 'cache': {'inner': {'ttl': 60}}}
+    assert composed is not data and composed['a'] is data['a']
+    assert data['cache'] == {'inner': '!include cache.json'}
+
+    # Исходные данные с extends не изменяются
+    app = YamlParser.read(str(fragments / 'app.yaml'))
+    assert 'extends' not in resolver.compose(app, fragments / 'app.yaml')
+    assert app['extends'] == 'shared/base.yaml'
+
+
+def test_fragments_parsed_once(fragments, resolver, monkeypatch):
+    reads = []
+    original = YamlParser.read.__func__
+
+    def counting_read(cls, filepath):
+        reads.append(filepath)
+        return original(cls, filepath)
+
+    monkeypatch.setattr(YamlParser, 'read', classmethod(counting_read))
+    compose(resolver, fragments / 'app.yaml')
+    # db.yaml включен дважды, но разобран один раз
+    assert sorted(reads) == sorted(map(str, [fragments / 'app.yaml', fragments / 'shared' / 'base.yaml',
+                                             fragments / 'shared' / 'db.yaml']))
+
+    reads.clear()
+    compose(resolver, fragments / 'app.yaml')
+    assert reads == [str(fragments / 'app.yaml')]
+
+    (fragments / 'shared' / 'db.yaml').write_text('host: db.internal\n')
+    assert compose(resolver, fragments / 'app.yaml')['db'] == {'host': 'db.internal'}
+
+
+def test_cycles_and_errors(tmp_path, resolver):
+    (tmp_path / 'a.json').write_text(json.dumps({'b': '!include b.json'}))
+    (tmp_path / 'b.json').write_text(json.dumps({'extends': 'a.json'}))
+    with pytest.raises(IncludeError, match='a.json -> .*b.json -> .*a.json'):
+        resolver.compose(parsers.get('json').read(str(tmp_path / 'a.json')), tmp_path / 'a.json')
+
+    with pytest.raises(IncludeError):
+        resolver.compose({'x': '!include missing.yaml'}, tmp_path / 'c.yaml')
+
+
+def test_config_with_includes(fragments, monkeypatch):
+    monkeypatch.chdir(fragments)
+    config = Config(str(fragments / 'app.yaml'), exclude_default=True)
+    assert config.get('db.options.timeout') == 5
+    assert config.logger.format == 'short'
+
+
+def test_extends_not_a_path(tmp_path, resolver, monkeypatch):
+    data = {'extends': 'base-class', 'models': {'extends': 'base.yaml'}, 'other': ['a.yaml', 1]}
+    assert resolver.compose(dict(data), tmp_path / 'c.json') == data
+    assert resolver.compose({'extends': ['base.Model', 'x.yaml']}, tmp_path / 'c.json') == {
+        'extends': ['base.Model', 'x.yaml']
+    }
+
+    (tmp_path / 'base.yaml').write_text('a: 1\n')
+    assert resolver.compose({'extends': 'base.yaml', 'b': 2}, tmp_path / 'c.json') == {'a': 1, 'b': 2}
+    monkeypatch.setattr(resolver, 'extends_key', None)
+    assert resolver.compose({'extends': 'base.yaml'}, tmp_path / 'c.json') == {'extends': 'base.yaml'}
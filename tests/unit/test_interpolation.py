@@ -0,0 +1,113 @@
+import pytest
+
+from bestconfig import Config
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.interpolation import Interpolator, InterpolationError, Template
+
+
+def test_template():
+    template = Template.compile('postgres://${db.host}:${PORT:-5432}/$$x')
+    assert [getattr(part, 'name', part) for part in template.parts] == \
+           ['postgres://', 'db.host', ':', 'PORT', '/$x']
+    assert Template.compile('plain') is None
+    # Одинаковые строки разбираются один раз
+    assert Template.compile('${a}') is Template.compile('${a}')
+
+
+def test_resolve(monkeypatch):
+    monkeypatch.setenv('BESTCONFIG_TEST_HOME', '/home/test')
+    config = ConfigProvider({
+        'db': {'host': 'localhost', 'port': 5432},
+        'url': '${db.host}:${db.port}',
+        'port': '${db.port}',
+        'chain': '${url}/app',
+        'hosts': ['${db.host}', 'other'],
+        'first_host': '${hosts.0}',
+        'home': '${BESTCONFIG_TEST_HOME}',
+        'timeout': '${UNKNOWN_TIMEOUT:-30}',
+        'price': '$$5',
+    }, interpolate=True)
+    assert config.url == 'localhost:5432'
+    # Единственная ссылка сохраняет тип
+    assert config.get_raw('port') == 5432
+    assert config.chain == 'localhost:5432/app'
+    assert config.get_raw('hosts') == ['localhost', 'other']
+    assert config.first_host == 'localhost'
+    assert config.home == '/home/test'
+    assert config.timeout == 30
+    assert config.price == '$5'
+
+
+def test_environ_and_errors():
+    interpolator = Interpolator(environ={'HOME_DIR': '/home/user'})
+    assert interpolator.resolve({'path': '${HOME_DIR}/app'}) == {'path': '/home/user/app'}
+
+    with pytest.raises(InterpolationError):
+        Interpolator(environ={}).resolve({'a': '${missing}'})
+    with pytest.raises(InterpolationError, match='a -> b -> a'):
+        Interpolator(environ={}).resolve({'a': '${b}', 'b': '${a}', 'c': 1})
+
+
+def test_recompute_only_dependents(monkeypatch):
+    config = ConfigProvider({
+        'host': 'localhost',
+        'url': 'http://${host}/',
+        'other': '${name}',
+        'name': 'app',
+        'nested': {'url': '${url}api'},
+    }, interpolate=True)
+
+    rendered = []
+    original = Template.render
+
+    def render(template, lookup):
+        rendered.append(template.source)
+        return original(template, lookup)
+
+    monkeypatch.setattr(Template, 'render', render)
+    config.set('host', 'example.com')
+    assert config.url == 'http://example.com/'
+    assert config.get('nested.url') == 'http://example.com/api'
+    assert config.other == 'app'
+    assert sorted(rendered) == ['${url}api', 'http://${host}/']
+
+    rendered.clear()
+    config.insert({'extra': '${name}-extra'})
+    assert config.extra == 'app-extra'
+    assert rendered == ['${name}-extra']
+
+    monkeypatch.setenv('name', 'from-env')
+    del config['name']
+    assert config.other == 'from-env'
+    config.set('name', 'renamed')
+    assert config.other == 'renamed'
+    assert config.extra == 'renamed-extra'
+
+
+def test_incremental_indexes():
+    interpolator = Interpolator(environ={})
+    raw = {'a': {'b': 'nested'}, 'ref': '${a.b}', 'hosts': ['${a.b}', '${ref}'], 'last': '${hosts.1}'}
+    assert interpolator.resolve(raw)['last'] == 'nested'
+
+    # Ключ с точкой перекрывает путь a -> b, ссылки на него пересчитываются
+    raw = dict(raw, **{'a.b': 'flat'})
+    resolved = interpolator.update(raw, {'a.b'})
+    assert resolved['ref'] == 'flat'
+    assert resolved['hosts'] == ['flat', 'flat']
+    assert resolved['last'] == 'flat'
+    raw = {key: value for key, value in raw.items() if key != 'a.b'}
+    assert interpolator.update(raw, {'a.b'})['last'] == 'nested'
+
+    # Удаленные шаблоны не остаются в индексах
+    raw = dict(raw, hosts=['plain', 'second'])
+    assert interpolator.update(raw, {'hosts'})['last'] == 'second'
+    raw = {key: value for key, value in raw.items() if key not in ('ref', 'last')}
+    interpolator.update(raw, {'ref', 'last'})
+    assert set(interpolator._templates) == set()
+    assert not interpolator._prefixes and not interpolator._under and not interpolator._dependents_under
+
+
+def test_config_interpolate():
+    config = Config({'a': 'x', 'b': '${a}y'}, exclude_default=True, interpolate=True)
+    assert config.b == 'xy'
+    assert Config({'b': '${a}'}, exclude_default=True).b == '${a}'
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from bestconfig.config_provider import ConfigProvider
+
+
+@pytest.fixture
+def config():
+    return ConfigProvider({'db': {'host': 'localhost', 'port': 5432}, 'debug': False, 'name': 'app'})
+
+
+def test_memoize_invalidates_read_keys(config):
+    calls = []
+
+    @config.memoize
+    def dsn():
+        calls.append(1)
+        return f"{config.get('db.host')}:{config.get('db.port')}"
+
+    assert dsn() == dsn() == 'localhost:5432'
+    assert len(calls) == 1
+
+    config.set('debug', True)
+    config.set('name', 'other')
+    assert dsn() == 'localhost:5432' and len(calls) == 1
+
+    config.set('db', {'host': 'db.internal', 'port': 5432})
+    assert dsn() == 'db.internal:5432' and len(calls) == 2
+    assert dsn.cache_info() == (2, 2, 1, 128, 1)
+    assert dsn.__name__ == 'dsn'
+
+
+def test_memoize_attribute_access_and_missing_keys(config):
+
+    @config.memoize(maxsize=2)
+    def option(name):
+        return config.db.get(name) if 'db' in config else None
+
+    assert option('host') == 'localhost'
+    assert option('user') is None
+    config.update({'db': {'host': 'other', 'user': 'admin'}})
+    assert option('user') == 'admin'
+
+    @config.memoize
+    def flag():
+        return config.get('feature')
+
+    assert flag() is None
+    config.insert({'feature': True})
+    assert flag() is True
+
+    option('host'), option('port'), option('user')
+    info = option.cache_info()
+    assert info.currsize == 2 and info.maxsize == 2
+
+
+def test_memoize_nested_and_override(config):
+
+    @config.memoize
+    def host():
+        return config.get('db.host')
+
+    @config.memoize
+    def url():
+        return f'postgres://{host()}'
+
+    assert url() == 'postgres://localhost'
+    host()
+    config.set('db', {'host': 'new'})
+    # Зависимость url от db.host пришла через host()
+    assert url() == 'postgres://new'
+
+    with config.override({'db.host': 'temporary'}):
+        assert url() == 'postgres://temporary'
+    assert url() == 'postgres://new'
+
+
+def test_memoize_not_cached_if_changed_during_call(config):
+    started, changed = threading.Event(), threading.Event()
+
+    @config.memoize
+    def slow():
+        value = config.get('name')
+        started.set()
+        changed.wait()
+        return value
+
+    thread = threading.Thread(target=slow)
+    thread.start()
+    started.wait()
+    config.set('name', 'changed')
+    changed.set()
+    thread.join()
+    assert slow.cache_info().currsize == 0
+    assert slow() == 'changed'
+
+
+def test_memoize_normalized_keys():
+    config = ConfigProvider({'db_host': 'localhost', 'name': 'app'}, normalize_keys=True)
+    calls = []
+
+    @config.memoize
+    def host():
+        calls.append(1)
+        return config.get('DB_HOST'), config.get('CACHE_TTL')
+
+    assert host() == host() == ('localhost', None)
+    config.set('name', 'other')
+    assert host() == ('localhost', None) and len(calls) == 1
+
+    # Зависимость записана по настоящему ключу db_host
+    config.set('db_host', 'db.internal')
+    assert host() == ('db.internal', None) and len(calls) == 2
+
+    # Отсутствовавший ключ появился в другом написании
+    config.set('cacheTtl', 60)
+    assert host() == ('db.internal', 60) and len(calls) == 3
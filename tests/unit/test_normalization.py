@@ -0,0 +1,96 @@
+import pickle
+
+import pytest
+
+from bestconfig import Config
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.file_parsers import IniParser
+from bestconfig.normalization import KeyIndex, normalize_key
+
+
+def test_normalize_key():
+    assert normalize_key('DB_HOST') == 'db_host'
+    assert normalize_key('db-host') == 'db_host'
+    assert normalize_key('dbHost') == 'db_host'
+    assert normalize_key('DB__HOST') == 'db.host'
+    assert normalize_key('Logger.Mode') == 'logger.mode'
+
+
+def test_normalized_lookup():
+    config = ConfigProvider({
+        'DB_HOST': 'localhost',
+        'Logger': {'logLevel': 'INFO', 'none-value': None},
+        'CACHE__REDIS__URL': 'redis://',
+    }, normalize_keys=True)
+
+    assert config.db_host == 'localhost'
+    assert config.get('db-host') == 'localhost'
+    assert config.logger.log_level == 'INFO'
+    assert config.get('LOGGER.LOG-LEVEL') == 'INFO'
+    assert config.get('cache.redis.url') == 'redis://'
+    assert 'logger.none_value' in config
+    assert config.get('missing_key') is None
+    # Исходные ключи не меняются
+    assert list(config) == ['DB_HOST', 'Logger', 'CACHE__REDIS__URL']
+
+    config.set('newKey', 1)
+    assert config.new_key == 1
+    assert pickle.loads(pickle.dumps(config)).get('db-host') == 'localhost'
+
+
+def test_nested_configs_share_index(monkeypatch):
+    with pytest.warns(UserWarning, match='dup'):
+        config = ConfigProvider({
+            'Section': {f'key_{i}': i for i in range(100)},
+            'Other': {'Nested': {'DeepKey': 1}},
+            'Dup': {'a': 1}, 'DUP': {'b': 2},
+        }, normalize_keys=True)
+    built = []
+    original = KeyIndex.__init__
+
+    def counting_init(self, data):
+        built.append(data)
+        original(self, data)
+
+    monkeypatch.setattr(KeyIndex, '__init__', counting_init)
+    assert config.Section.KEY_5 == 5
+    assert config.section.get('key-7') == 7
+    assert config.other.nested.deep_key == 1
+    assert config.Other.get('NESTED.deepKey') == 1
+    assert 'missing' not in config.Section
+    assert built == []
+
+    # Путь неоднозначен после нормализации, вложенный конфиг строит свой индекс
+    assert config.Dup.A == 1 and config.dup.B == 2
+    assert len(built) == 1
+
+
+def test_disabled_by_default():
+    config = ConfigProvider({'DB_HOST': 'localhost'})
+    assert config.get('db_host') is None
+    assert 'db_host' not in config
+
+
+def test_collisions_reported_at_load(tmp_path):
+    (tmp_path / 'app.yaml').write_text('db_host: yaml\n')
+    (tmp_path / 'app.env').write_text('DB_HOST=env\n')
+
+    with pytest.warns(UserWarning, match='db_host'):
+        config = Config(str(tmp_path / 'app.yaml'), str(tmp_path / 'app.env'),
+                        exclude_default=True, normalize_keys=True)
+    assert config.get('DB_HOST') == 'env'
+    assert config.get('db_host') == 'yaml'
+    assert config.get('Db-Host') == 'env'
+
+
+def test_lazy_ini_sections(tmp_path, monkeypatch):
+    monkeypatch.setattr(IniParser, 'lazy_threshold', 0)
+    filepath = tmp_path / 'legacy.ini'
+    filepath.write_text(''.join(f'[Section{i}]\nMaxValue = {i}\n' for i in range(10)))
+    data = IniParser.read(filepath)
+
+    index = KeyIndex(data)
+    assert not any(section._loaded for section in data.values())
+    assert index.resolve('section3.max_value', data) == ('Section3', 'MaxValue')
+    assert [section._loaded for section in data.values()].count(True) == 1
+    assert index.resolve('section3.other', data) is None
@@ -0,0 +1,74 @@
+import pickle
+
+import pytest
+
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.storage import LayeredMapping
+
+
+@pytest.fixture
+def base():
+    return ConfigProvider({
+        'db': {'host': 'localhost', 'port': 5432, 'options': {'ssl': False, 'timeout': 30}},
+        'workers': 4,
+        'features': ['a'],
+    })
+
+
+def test_overlay_deep_lookup(base):
+    tenant = base.overlay({'db': {'options': {'ssl': True}}, 'name': 'tenant'})
+
+    assert tenant.get('db.options.ssl') is True
+    assert tenant.db.options.timeout == 30
+    assert tenant['db']['port'] == 5432
+    assert tenant.workers == 4
+    assert tenant.name == 'tenant'
+    assert 'db.options.timeout' in tenant
+    assert list(tenant) == ['db', 'workers', 'features', 'name']
+    assert tenant.to_dict() == {
+        'db': {'host': 'localhost', 'port': 5432, 'options': {'ssl': True, 'timeout': 30}},
+        'workers': 4, 'features': ['a'], 'name': 'tenant',
+    }
+    assert base.get('db.options.ssl') is False
+    assert 'name' not in base
+
+
+def test_overlay_shares_base(base):
+    tenant = base.overlay({'workers': 8})
+    nested = tenant.overlay({'workers': 16})
+
+    snapshot = tenant._snapshot
+    assert isinstance(snapshot, LayeredMapping)
+    assert snapshot.layers[1] is base._snapshot
+    assert nested._snapshot.layers[1:] == snapshot.layers
+    # Ветки без изменений не копируются и не оборачиваются
+    assert tenant.get_raw('db')._snapshot is base._snapshot['db']
+    assert dict.__len__(tenant) == 0
+    assert nested.workers == 16 and tenant.workers == 8 and base.workers == 4
+
+
+def test_overlay_mutation(base):
+    tenant = base.overlay({'db': {'host': 'tenant-db'}})
+    events = []
+    tenant.subscribe('db', events.append)
+
+    tenant.set('db', {'host': 'other'})
+    assert tenant.get('db.port') is None
+    del tenant['workers']
+    assert 'workers' not in tenant
+    assert len(tenant) == 2
+    assert events and events[0].changed['db.host'] == ('tenant-db', 'other')
+
+    base.set('workers', 100)
+    assert base.overlay({}).workers == 100
+    assert base.db.host == 'localhost'
+
+    with tenant.override({'db.host': 'override'}):
+        assert tenant.db.host == 'override'
+
+
+def test_overlay_pickle(base):
+    tenant = base.overlay({'db': {'port': 6432}})
+    restored = pickle.loads(pickle.dumps(tenant))
+    assert restored.to_dict() == tenant.to_dict()
+    assert restored.db.host == 'localhost' and restored.db.port == 6432
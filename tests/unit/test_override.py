@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from bestconfig.config_provider import ConfigProvider
+
+
+@pytest.fixture
+def config():
+    return ConfigProvider({'db': {'host': 'localhost', 'timeout': 30}, 'debug': False})
+
+
+def test_override(config):
+    with config.override({'db.timeout': 1, 'debug': True, 'new.flag': 'on'}):
+        assert config.get('db.timeout') == 1
+        assert config.db.timeout == 1
+        assert config.db.host == 'localhost'
+        assert config['debug'] is True
+        assert config.get('new.flag') == 'on'
+
+        with config.override({'db': {'host': 'test'}}):
+            assert config.get('db.host') == 'test'
+            assert config.get('db.timeout') == 1
+            assert config.get('db.missing') is None
+        assert config.get('db.host') == 'localhost'
+
+    assert config.get('db.timeout') == 30
+    assert config.debug is False
+    assert 'new' not in config
+    # Исходный снимок не изменен
+    assert config.to_dict()['db'] == {'host': 'localhost', 'timeout': 30}
+    assert config._override_count == 0
+
+
+def test_override_with_normalized_keys():
+    config = ConfigProvider({'db_host': 'localhost', 'cache': {'ttl_seconds': 60}}, normalize_keys=True)
+    with config.override({'db_host': 'test', 'cache.ttl_seconds': 1}):
+        assert config.get('DB_HOST') == 'test'
+        assert config.get('dbHost') == 'test'
+        assert config.get('CACHE__TTL_SECONDS') == 1
+        assert config.cache.get('ttlSeconds') == 1
+        assert 'DB-HOST' in config
+    assert config.get('DB_HOST') == 'localhost'
+    assert config.get('CACHE__TTL_SECONDS') == 60
+
+
+def test_override_isolated_per_thread(config):
+    entered, checked = threading.Event(), threading.Event()
+    seen = []
+
+    def other_thread():
+        entered.wait()
+        seen.append(config.get('db.timeout'))
+        checked.set()
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    with config.override({'db.timeout': 1}):
+        entered.set()
+        checked.wait()
+        assert config.get('db.timeout') == 1
+    thread.join()
+    assert seen == [30]
+
+
+def test_override_isolated_per_task(config):
+
+    async def task(timeout):
+        with config.override({'db.timeout': timeout}):
+            await asyncio.sleep(0.01)
+            return config.get('db.timeout')
+
+    async def main():
+        return await asyncio.gather(task(1), task(2), task(3))
+
+    assert asyncio.run(main()) == [1, 2, 3]
+    assert config.get('db.timeout') == 30
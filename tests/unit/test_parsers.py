@@ -1,7 +1,12 @@
+import io
+import json
+import pickle
+
 import pytest
 import os
 from pathlib import Path
 from bestconfig import Config
+from bestconfig.config_provider import ConfigProvider
 
 from bestconfig.file_parsers import YamlParser, EnvParser, IniParser, PyParser
 
@@ -75,3 +80,188 @@ def test_parse_py(curr_dir):
     data = PyParser.read(filepath)
     assert 'lowercase_setting' in data
     assert data['PYTHON_KEY'] == 444
+
+
+@pytest.fixture
+def custom_extensions():
+    """Расширения, которые тест добавит в глобальный реестр, убираются после него"""
+    from bestconfig.file_parsers import parsers
+
+    extensions = []
+    yield extensions
+    for extension in extensions:
+        if parsers.get(extension) is not None:
+            parsers.unregister(extension)
+
+
+def test_parsers_registry(curr_dir, custom_extensions):
+    from bestconfig.adapters import FileAdapter
+    from bestconfig.file_parsers import AbstractFileParser, ParsersRegistry, register_parser, parsers
+
+    custom_extensions.extend(['custom_ext', 'legacy_ext'])
+
+    assert parsers.get('yml') is YamlParser
+    assert parsers.get('cfg') is IniParser
+    assert parsers.get('unknown_extension') is None
+
+    @register_parser('custom_ext')
+    class CustomParser(AbstractFileParser):
+        @classmethod
+        def read(cls, filepath: str) -> dict:
+            return {'custom': filepath}
+
+    assert 'custom_ext' in FileAdapter.parsers
+    assert FileAdapter._get_file_type(Path('config.custom_ext')) == 'custom_ext'
+
+    registry = ParsersRegistry()
+    registry.register(CustomParser, '.other')
+    assert registry.get('other') is CustomParser
+    assert registry.get('json') is None
+
+    # Старый интерфейс работает поверх реестра
+    with pytest.warns(DeprecationWarning):
+        specific_parsers = FileAdapter.specific_parsers
+    assert specific_parsers['json'] is parsers.get('json')
+    assert 'custom_ext' in specific_parsers
+    specific_parsers['legacy_ext'] = CustomParser
+    assert parsers.get('legacy_ext') is CustomParser
+    del specific_parsers['legacy_ext']
+    assert parsers.get('legacy_ext') is None
+
+
+def test_yaml_imported_lazily():
+    import subprocess
+    import sys
+
+    code = 'import sys, bestconfig; print("yaml" in sys.modules)'
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.strip() == b'False'
+
+
+def test_toml_parser(curr_dir):
+    from bestconfig.file_parsers import TomlParser
+
+    data = TomlParser.read(os.path.join(curr_dir, 'config.toml'))
+    assert data == {'toml_value': 5, 'toml_section': {'key': 'value'}}
+
+    config = Config()
+    assert config.toml_value == 5
+    assert config.get('toml_section.key') == 'value'
+
+
+def test_toml_table(curr_dir):
+    from bestconfig.file_parsers import TomlParser
+
+    filepath = os.path.join(curr_dir, 'pyproject_sample.toml')
+    fragment = TomlParser._extract_table(open(filepath).read(), 'tool.myapp')
+    assert 'fake' not in fragment
+    assert '[tool.other]' not in fragment
+
+    table = TomlParser.read_table(filepath, 'tool.myapp')
+    assert table == TomlParser.read(filepath)['tool']['myapp']
+    assert table['db']['host'] == 'localhost'
+    assert table['workers'] == [{'name': 'first'}]
+    assert TomlParser.read_table(filepath, 'tool.unknown') == {}
+
+    config = Config('pyproject_sample.toml#tool.myapp', exclude_default=True)
+    assert config.name == 'myapp'
+    assert config.get('db.host') == 'localhost'
+    assert 'project' not in config
+
+
+def test_hash_in_filename(tmp_path):
+    dirpath = tmp_path / 'a#b'
+    dirpath.mkdir()
+    (dirpath / 'x.json').write_text('{"key": 1}')
+    (tmp_path / 'c#d.json').write_text('{"other": 2}')
+
+    assert Config(dirpath / 'x.json', exclude_default=True).key == 1
+    assert Config(str(dirpath / 'x.json'), exclude_default=True).key == 1
+    assert Config(str(tmp_path / 'c#d.json'), exclude_default=True).other == 2
+
+
+def test_toml_table_fallback():
+    from bestconfig.file_parsers import TomlParser
+
+    assert TomlParser._extract_table('[tool]\nmyapp = {a = 1}\n', 'tool.myapp') is None
+    assert TomlParser._extract_table('tool.myapp.a = 1\n', 'tool.myapp') is None
+
+
+def test_parse_py_restrictions(tmp_path):
+    filepath = tmp_path / 'sandbox.py'
+    filepath.write_text('import os\nVALUE = 1\n')
+    with pytest.raises(SyntaxError):
+        PyParser.read(filepath)
+
+    filepath.write_text('open("/etc/passwd")\n')
+    with pytest.raises(SyntaxError):
+        PyParser.read(filepath)
+
+    filepath.write_text('from bestconfig import Config\n')
+    with pytest.raises(AssertionError):
+        PyParser.read(filepath)
+
+    filepath.write_text('import math\nVALUE = math.floor(2.5)\n_private = [1]\ndef func(): pass\n')
+    assert PyParser.read(filepath) == {'VALUE': 2, '_private': [1]}
+
+
+def test_parse_py_code_cache(tmp_path):
+    filepath = tmp_path / 'cached.py'
+    filepath.write_text('VALUE = 1\n')
+    assert PyParser.read(filepath)['VALUE'] == 1
+    code = PyParser._code_cache[str(filepath)][2]
+    assert PyParser.read(filepath)['VALUE'] == 1
+    assert PyParser._code_cache[str(filepath)][2] is code
+
+    filepath.write_text('VALUE = 22\n')
+    os.utime(filepath, ns=(0, 10 ** 9))
+    assert PyParser.read(filepath)['VALUE'] == 22
+    assert PyParser._code_cache[str(filepath)][2] is not code
+
+
+def test_lazy_ini(tmp_path, monkeypatch):
+    monkeypatch.setattr(IniParser, 'lazy_threshold', 0)
+    filepath = tmp_path / 'legacy.cfg'
+    filepath.write_text(
+        '; legacy system\n'
+        '[DEFAULT]\nhome = /opt/app\ntimeout = 5\n\n'
+        + ''.join(f'[section{i}]\nvalue = {i}\npath = %(home)s/{i}\n\n' for i in range(50))
+        + '[last]\nmultiline = first\n  second'
+    )
+    parsed = []
+    original = IniParser.parse
+
+    def counting_parse(text, sections=None):
+        parsed.append(sections)
+        return original(text, sections)
+
+    monkeypatch.setattr(IniParser, 'parse', staticmethod(counting_parse))
+    data = IniParser.read(filepath)
+    assert len(data) == 51 and 'DEFAULT' not in data
+    assert parsed == []
+
+    config = ConfigProvider(data)
+    assert config.get('section7.path') == '/opt/app/7'
+    assert config.get('section7.timeout') == 5
+    assert config.get_raw('last.multiline') == 'first\nsecond'
+    assert parsed == [['section7'], ['last']]
+    assert pickle.loads(pickle.dumps(data['section3'])) == {'value': '3', 'path': '/opt/app/3', 'home': '/opt/app',
+                                                            'timeout': '5'}
+
+    monkeypatch.setattr(IniParser, 'parse', staticmethod(original))
+    assert IniParser.read(filepath) == IniParser.parse(filepath.read_text())
+
+    stream = io.StringIO()
+    ConfigProvider(IniParser.read(filepath)).dump(stream, 'yaml', redact=False)
+    assert 'path: /opt/app/49' in stream.getvalue()
+
+    # to_dict отдает разобранные секции обычными словарями
+    data = ConfigProvider(IniParser.read(filepath)).to_dict()
+    assert type(data['section9']) is dict
+    assert json.loads(json.dumps(data))['section9'] == {'value': '9', 'path': '/opt/app/9', 'home': '/opt/app',
+                                                        'timeout': '5'}
+
+    # Секция дважды - обычная ошибка configparser
+    filepath.write_text('[a]\nx = 1\n[a]\ny = 2\n')
+    with pytest.raises(Exception, match='already exists'):
+        IniParser.read(filepath)
@@ -0,0 +1,63 @@
+import copy
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from bestconfig.config_provider import ConfigProvider, ConfigKeyError
+from bestconfig.secret_store import SecretStore, default_secret_store
+from bestconfig.source_resolver import FilesScanner
+
+
+def worker_lookup(config, key):
+    return config.get(key), type(config).__name__
+
+
+def test_attribute_protocol():
+    config = ConfigProvider({'a': {'b': 1}})
+    assert not hasattr(config, 'missing')
+    assert getattr(config, 'missing', 'default') == 'default'
+    with pytest.raises(KeyError):
+        config.missing
+    with pytest.raises(ConfigKeyError):
+        config.a.missing
+    with pytest.raises(AttributeError):
+        config.__getstate_unknown__
+
+
+def test_round_trip(monkeypatch):
+    scans = []
+    monkeypatch.setattr(FilesScanner, 'find_all_files', lambda *args: scans.append(args) or [])
+
+    for config in [
+        ConfigProvider({'a': {'b': 1}, 'c': [1, 2]}),
+        ConfigProvider({'KEY_1': '1', 'KEY_2': '2'}, compact=True),
+        ConfigProvider({'host': 'localhost', 'url': 'http://${host}/'}, interpolate=True),
+    ]:
+        restored = pickle.loads(pickle.dumps(config, pickle.HIGHEST_PROTOCOL))
+        assert type(restored) is ConfigProvider
+        assert restored == config
+        assert restored._compact == config._compact
+        assert copy.deepcopy(config) == config
+        if config._interpolator is None:
+            assert copy.copy(config)._snapshot is config._snapshot
+    assert scans == []
+
+    restored = pickle.loads(pickle.dumps(config))
+    restored.set('host', 'example.com')
+    assert restored.url == 'http://example.com/'
+
+    nested = pickle.loads(pickle.dumps(ConfigProvider({'a': {'b': 1}}).a))
+    assert nested.b == 1
+
+
+def test_secret_store_pickle():
+    assert pickle.loads(pickle.dumps(default_secret_store)) is default_secret_store
+    store = pickle.loads(pickle.dumps(SecretStore(ttl=5)))
+    assert store.ttl == 5 and store.is_reference('secret://x')
+
+
+def test_process_pool():
+    config = ConfigProvider({'db': {'host': 'localhost'}, 'KEY': 1}, compact=True)
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(worker_lookup, config, 'db.host').result() == ('localhost', 'ConfigProvider')
@@ -0,0 +1,51 @@
+from bestconfig import config_provider
+from bestconfig.config_provider import ConfigProvider, PresenceIndex
+from bestconfig.file_parsers import IniParser
+
+
+def test_contains_none_values():
+    config = ConfigProvider({'a': {'b': {'c': None}}, 'empty': None, 'text': 'abc'})
+    for _ in range(2):
+        assert 'a.b.c' in config
+        assert config.contains('empty')
+        assert 'a.b.x' not in config
+        assert 'text.a' not in config
+        assert 'missing' not in config
+    assert 'b.c' in config.a
+
+
+def test_contains_does_not_convert(monkeypatch):
+    config = ConfigProvider({'db': {'port': '5432'}})
+
+    def fail(*args, **kwargs):
+        raise AssertionError('converter called')
+
+    monkeypatch.setattr(config_provider.default_converter, 'cast', fail)
+    monkeypatch.setattr(ConfigProvider, '_child', fail)
+    assert 'db' in config and 'db.port' in config and 'db.port' in config
+    assert isinstance(config._presence[1], PresenceIndex)
+
+
+def test_presence_index_invalidated():
+    config = ConfigProvider({'a': 1})
+    assert 'a' in config and 'b.c' not in config
+    config.set('b', {'c': None})
+    assert 'b.c' in config and 'b.c' in config
+    del config['a']
+    assert 'a' not in config
+    with config.override({'x.y': 1}):
+        assert 'x.y' in config
+    assert 'x.y' not in config
+
+
+def test_presence_lazy_ini(tmp_path, monkeypatch):
+    monkeypatch.setattr(IniParser, 'lazy_threshold', 0)
+    filepath = tmp_path / 'legacy.ini'
+    filepath.write_text(''.join(f'[section{i}]\nvalue = {i}\n' for i in range(10)))
+    config = ConfigProvider(IniParser.read(filepath))
+
+    assert 'section3' in config and 'section3' in config
+    assert 'section11' not in config
+    assert not any(section._loaded for section in config.values())
+    assert 'section3.value' in config
+    assert 'section3.other' not in config
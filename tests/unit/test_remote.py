@@ -0,0 +1,140 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bestconfig import Config
+from bestconfig.adapters import UrlAdapter
+from bestconfig.remote import HttpFetcher
+
+
+class ConfigHandler(BaseHTTPRequestHandler):
+    """Заглушка конфиг сервера, отдает server.documents[path]"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.client_address[1], self.headers.get('If-None-Match')))
+        if self.path not in server.documents:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body, etag, content_type = server.documents[self.path]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        if server.cache_control:
+            self.send_header('Cache-Control', server.cache_control)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ConfigHandler)
+    server.requests = []
+    server.cache_control = None
+    server.documents = {
+        '/shared.yaml': (b'shared_key: 1\nnested:\n  value: abc\n', '"v1"', 'application/yaml'),
+        '/settings': (b'{"json_key": 2}', '"j1"', 'application/json'),
+    }
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    fetcher = HttpFetcher(cache_dir=tmp_path, timeout=2)
+    monkeypatch.setattr(UrlAdapter, 'fetcher', fetcher)
+    yield fetcher
+    fetcher._pool.clear()
+
+
+def url(server, path):
+    host, port = server.server_address
+    return f'http://{host}:{port}{path}'
+
+
+def test_url_source(server, fetcher):
+    config = Config(url(server, '/shared.yaml'), url(server, '/settings'), exclude_default=True)
+    assert config.shared_key == 1
+    assert config.get('nested.value') == 'abc'
+    assert config.json_key == 2
+
+    # Оба запроса прошли через одно keep-alive соединение
+    assert len({port for _, port, _ in server.requests}) == 1
+
+
+def test_conditional_requests(server, fetcher):
+    Config(url(server, '/shared.yaml'), exclude_default=True)
+    config = Config(url(server, '/shared.yaml'), exclude_default=True)
+    assert config.shared_key == 1
+    assert server.requests[-1][2] == '"v1"'
+
+    server.documents['/shared.yaml'] = (b'shared_key: 2\n', '"v2"', 'application/yaml')
+    config = Config(url(server, '/shared.yaml'), exclude_default=True)
+    assert config.shared_key == 2
+
+
+def test_stale_if_error(server, fetcher):
+    Config(url(server, '/shared.yaml'), exclude_default=True)
+    del server.documents['/shared.yaml']
+    with pytest.warns(UserWarning):
+        config = Config(url(server, '/shared.yaml'), exclude_default=True)
+    assert config.shared_key == 1
+
+    with pytest.raises(ConnectionError):
+        Config(url(server, '/unknown.yaml'), exclude_default=True)
+
+
+def test_fresh_response_not_requested(server, fetcher):
+    server.documents['/fresh.json'] = (b'{"a": 1}', '"f"', 'application/json')
+    server.cache_control = 'max-age=60'
+    fetcher.fetch(url(server, '/fresh.json'))
+    count = len(server.requests)
+
+    body_path, filetype = fetcher.fetch(url(server, '/fresh.json'))
+    assert filetype == 'json'
+    assert body_path.read_bytes() == b'{"a": 1}'
+    assert len(server.requests) == count
+
+    assert HttpFetcher._max_age('public, max-age=60') == 60
+    assert HttpFetcher._max_age('no-cache') == 0
+
+
+def test_remote_code_not_executed(server, fetcher):
+    server.documents['/unsafe.yaml'] = (b'pid: !!python/object/apply:os.getpid []\n', '"u"', 'application/yaml')
+    with pytest.raises(SyntaxError):
+        Config(url(server, '/unsafe.yaml'), exclude_default=True)
+
+    server.documents['/config.py'] = (b'VALUE = 1\n', '"p"', 'text/x-python')
+    with pytest.raises(ValueError):
+        Config(url(server, '/config.py'), exclude_default=True)
+
+
+def test_remote_include_rejected(server, fetcher):
+    from bestconfig.includes import IncludeError
+
+    server.documents['/include.yaml'] = (b'db: !include db.yaml\n', '"i"', 'application/yaml')
+    with pytest.raises(IncludeError, match='db.yaml'):
+        Config(url(server, '/include.yaml'), exclude_default=True)
+
+    server.documents['/include.json'] = (b'{"hosts": ["!include hosts.json"]}', '"k"', 'application/json')
+    with pytest.raises(IncludeError, match='hosts.json'):
+        Config(url(server, '/include.json'), exclude_default=True)
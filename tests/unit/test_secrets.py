@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from bestconfig import Config
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.secret_store import AbstractSecretResolver, FileSecretResolver, SecretError, SecretStore
+
+
+class SlowResolver(AbstractSecretResolver):
+    """Имитация удаленного хранилища секретов"""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = []
+        self.version = 1
+        self._lock = threading.Lock()
+
+    def resolve(self, path):
+        with self._lock:
+            self.calls.append(path)
+        time.sleep(self.delay)
+        return f'{path}-v{self.version}'
+
+
+@pytest.fixture
+def secrets_dir(tmp_path):
+    (tmp_path / 'db').mkdir()
+    (tmp_path / 'db' / 'password').write_text('qwerty\n')
+    return tmp_path
+
+
+def test_file_secrets(secrets_dir, monkeypatch):
+    monkeypatch.setenv('BESTCONFIG_SECRETS_DIR', str(secrets_dir))
+    config = Config({'db': {'password': 'secret://db/password', 'user': 'admin'}},
+                    exclude_default=True, secrets=SecretStore())
+    assert config.db.password == 'qwerty'
+    assert config.get('db.password') == 'qwerty'
+    # Секреты не попадают в выгрузку конфига
+    assert config.to_dict()['db']['password'] == 'secret://db/password'
+    assert config.to_dict(reveal_secrets=True)['db'] == {'password': 'qwerty', 'user': 'admin'}
+
+    with pytest.raises(SecretError):
+        ConfigProvider({'a': 'secret://missing'}, secrets=SecretStore())
+    with pytest.raises(SecretError):
+        FileSecretResolver(secrets_dir).resolve('../outside')
+
+
+def test_parallel_prefetch():
+    resolver = SlowResolver(delay=0.2)
+    store = SecretStore(resolvers={'vault': resolver})
+    start = time.monotonic()
+    config = ConfigProvider({f'key{i}': f'vault://key{i}' for i in range(5)}, secrets=store)
+    assert time.monotonic() - start < 0.6
+    assert sorted(resolver.calls) == [f'key{i}' for i in range(5)]
+
+    # Дальше значения берутся из кеша
+    assert config.key3 == 'key3-v1'
+    assert len(resolver.calls) == 5
+
+    config.set('extra', ['vault://extra', 'plain'])
+    assert config.get_raw('extra') == ['extra-v1', 'plain']
+    assert len(resolver.calls) == 6
+
+
+def test_ttl_background_refresh(monkeypatch):
+    now = [0]
+    resolver = SlowResolver(delay=0)
+    store = SecretStore(ttl=10, resolvers={'vault': resolver})
+    monkeypatch.setattr(store, 'clock', lambda: now[0])
+    assert store.get('vault://token') == 'token-v1'
+
+    resolver.version = 2
+    now[0] = 5
+    assert store.get('vault://token') == 'token-v1'
+
+    # Устаревшее значение отдается сразу, новое приходит в фоне
+    now[0] = 11
+    assert store.get('vault://token') == 'token-v1'
+    store._executor.shutdown(wait=True)
+    store._executor = None
+    assert store.get('vault://token') == 'token-v2'
+    assert len(resolver.calls) == 2
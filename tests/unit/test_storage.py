@@ -0,0 +1,64 @@
+import pickle
+
+from bestconfig import Config
+from bestconfig.config_provider import ConfigProvider
+from bestconfig.storage import CompactMapping
+
+
+def test_compact_mapping():
+    mapping = CompactMapping({'b': 2, 'a': 1, 3: 'int key'})
+    assert mapping['a'] == 1 and mapping[3] == 'int key'
+    assert 'c' not in mapping and 4 not in mapping and None not in mapping
+    assert len(mapping) == 3
+    assert mapping == {'a': 1, 'b': 2, 3: 'int key'}
+
+    updated = mapping.replace({'c': 3, 'a': 0}, removed=['b'])
+    assert dict(updated) == {'a': 0, 'c': 3, 3: 'int key'}
+    assert mapping['b'] == 2
+
+    # Одинаковые ключи разных хранилищ - один и тот же объект
+    other = CompactMapping({''.join(['lo', 'ng_key']): 1})
+    assert next(iter(other)) is next(iter(CompactMapping({'long_key': 2})))
+
+
+def test_compact_provider():
+    data = {f'KEY_{i}': str(i) for i in range(1000)}
+    data['logger'] = {'level': 'INFO'}
+    config = ConfigProvider(data, compact=True)
+    assert config.KEY_10 == 10
+    assert config.get('logger.level') == 'INFO'
+    assert 'KEY_999' in config and 'KEY_1000' not in config
+    assert len(config) == 1001
+    assert config.to_dict() == data
+    # Встроенное хранилище dict не заполняется
+    assert dict.__len__(config) == 0
+
+    copy = config.copy()
+    # Копия разделяет неизменяемое хранилище
+    assert copy._snapshot is config._snapshot
+    config['KEY_1'] = 'changed'
+    del config['KEY_2']
+    assert config.KEY_1 == 'changed' and 'KEY_2' not in config
+    assert copy.KEY_1 == 1 and copy.KEY_2 == 2
+
+    assert pickle.loads(pickle.dumps(config)) == config
+
+
+def test_compact_replace():
+    mapping = CompactMapping({'b': 1, 'd': 2, 'f': 3})
+    changed = mapping.replace({'d': 20, 'a': 0, 'e': 4, 'g': 5}, removed=['f', 'unknown'])
+    assert list(changed.items()) == [('a', 0), ('b', 1), ('d', 20), ('e', 4), ('g', 5)]
+    # Неизмененные ключи не копируются заново
+    assert changed._keys[1] is mapping._keys[0]
+    assert mapping == {'b': 1, 'd': 2, 'f': 3}
+
+    mixed = changed.replace({404: 'nf'})
+    assert mixed[404] == 'nf' and mixed['a'] == 0
+    assert list(mixed) == list(CompactMapping(dict(mixed)))
+    assert mixed.replace(removed=[404])._sort_keys is None
+
+
+def test_compact_config():
+    config = Config({'b': 1, 'a': 2}, exclude_default=True, compact=True)
+    assert list(config) == ['a', 'b']
+    assert isinstance(config._snapshot, CompactMapping)
@@ -0,0 +1,135 @@
+import json
+import threading
+
+import pytest
+
+from bestconfig import Config
+from bestconfig.config_provider import ConfigProvider
+
+
+def test_transaction():
+    config = ConfigProvider({'a': 1, 'b': 1, 'old': True})
+    with config.transaction() as tx:
+        tx['a'] = 2
+        tx.update({'b': 2})
+        del tx['old']
+        assert tx['a'] == 2
+        assert 'old' not in tx
+        # До выхода из блока изменения не видны
+        assert config.get('a') == 1
+        assert 'old' in config
+    assert config.to_dict() == {'a': 2, 'b': 2}
+
+    with pytest.raises(RuntimeError):
+        with config.transaction() as tx:
+            tx['a'] = 3
+            raise RuntimeError
+    assert config.a == 2
+
+
+def test_dict_interface():
+    config = ConfigProvider({'a': {'b': 1}})
+    nested = config.a
+    # Вложенный конфиг разделяет снимок с родителем, встроенный dict зеркалит снимок
+    assert nested._snapshot is config._snapshot['a']
+    assert dict(config) == {**config} == {'a': {'b': 1}}
+    assert json.dumps(config) == '{"a": {"b": 1}}'
+    assert json.dumps(nested) == '{"b": 1}'
+    nested.set('b', 2)
+    assert config.get('a.b') == 1
+    assert nested.b == 2
+
+    config['c'] = 3
+    config.update(d=4)
+    assert len(config) == 3
+    assert list(config) == ['a', 'c', 'd']
+    assert config.pop('d') == 4
+    del config['c']
+    assert dict(config.items()) == {'a': {'b': 1}}
+    copy = config.copy()
+    config.clear()
+    assert len(config) == 0
+    assert copy == {'a': {'b': 1}}
+
+
+def test_json_dumps():
+    config = ConfigProvider({'a': {'b': 1}, 'x': 2})
+    assert json.loads(json.dumps(config)) == {'a': {'b': 1}, 'x': 2}
+
+    # Встроенное хранилище следует за каждым опубликованным снимком
+    config.set('y', 3)
+    del config['x']
+    assert json.loads(json.dumps(config)) == {'a': {'b': 1}, 'y': 3}
+    with config.transaction() as tx:
+        tx['a'] = {'b': 2}
+    assert json.loads(json.dumps(config)) == {'a': {'b': 2}, 'y': 3}
+    config.clear()
+    assert json.dumps(config) == '{}'
+
+
+def test_concurrent_readers_and_writer():
+    config = Config(exclude_default=True)
+    config.insert({'first': 0, 'second': 0, 'nested': {'value': 0}})
+    iterations = 2000
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        for i in range(1, iterations + 1):
+            with config.transaction() as tx:
+                tx['first'] = i
+                tx['second'] = i
+                tx['nested'] = {'value': i}
+        done.set()
+
+    def reader():
+        while not done.is_set():
+            snapshot = config.to_dict()
+            if not snapshot['first'] == snapshot['second'] == snapshot['nested']['value']:
+                errors.append(snapshot)
+            items = dict(config.items())
+            if items['first'] != items['second']:
+                errors.append(items)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert config.first == config.second == config.get('nested.value') == iterations
+
+
+def test_concurrent_writers():
+    config = ConfigProvider({})
+
+    def writer(index):
+        for i in range(500):
+            config.set(f'key_{index}_{i}', i)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(config) == 4 * 500
+
+
+def test_transaction_read_modify_write():
+    config = ConfigProvider({'n': 0})
+
+    def increment():
+        for _ in range(2000):
+            with config.transaction() as tx:
+                tx['n'] = tx['n'] + 1
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert config.n == 8000